@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Achievement, Notification
+from django.db.models import Q
+from backend.search import achievement_index
+from .models import (
+    Achievement, Announcement, ArchivedNotification, LeaderboardEntry, Notification, NotificationCounter, ProofUpload,
+)
 
 
 @admin.register(Achievement)
@@ -10,6 +14,13 @@ class AchievementAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
     list_editable = ['status']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of icontains scans over description.
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        matches = achievement_index.search(Achievement.objects.all(), search_term).values('id')
+        return queryset.filter(Q(id__in=matches) | Q(student__username=search_term.strip())), False
+
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -17,3 +28,41 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ['is_read', 'created_at']
     search_fields = ['user__username', 'message']
     readonly_fields = ['created_at']
+
+
+@admin.register(Announcement)
+class AnnouncementAdmin(admin.ModelAdmin):
+    list_display = ['id', 'created_by', 'department', 'year', 'status', 'delivered', 'recipients', 'created_at']
+    list_filter = ['status', 'department', 'year']
+    readonly_fields = ['status', 'recipients', 'delivered', 'last_user_id', 'created_at', 'completed_at']
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'achievement', 'created_at', 'archived_at']
+    list_filter = ['created_at']
+    search_fields = ['user__student_id']
+    readonly_fields = ['created_at', 'archived_at']
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ['user', 'unread', 'version']
+    search_fields = ['user__student_id']
+    readonly_fields = ['version']
+
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    # Maintained by achievements/leaderboard.py; `manage.py rebuild_leaderboard` recomputes it.
+    list_display = ['user', 'department', 'year', 'verified_count', 'points', 'cgpa', 'score']
+    list_filter = ['department', 'year']
+    search_fields = ['user__student_id']
+    readonly_fields = ['department', 'year', 'verified_count', 'points', 'cgpa', 'score']
+
+
+@admin.register(ProofUpload)
+class ProofUploadAdmin(admin.ModelAdmin):
+    list_display = ['id', 'filename', 'owner', 'achievement', 'size', 'status', 'created_at']
+    list_filter = ['status', 'created_at']
+    readonly_fields = ['storage_key', 'storage_upload_id', 'checksum', 'created_at', 'updated_at', 'completed_at']
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AchievementsConfig(AppConfig):
@@ -6,4 +7,9 @@ class AchievementsConfig(AppConfig):
     name = 'achievements'
 
     def ready(self):
+        import achievements.checks
         import achievements.signals
+        from backend.search import restore_search_triggers
+
+        # Covers the profile index too; post_migrate is sent once per app.
+        post_migrate.connect(restore_search_triggers, sender=self, dispatch_uid='restore_search_triggers')
@@ -0,0 +1,117 @@
+"""
+Pub/sub used to push new notifications to connected clients.
+
+``publish`` may be called from any thread (sync views, signal handlers);
+subscribers are asyncio queues owned by the event loop serving the stream.
+The in-process broker only reaches clients connected to the same worker
+process. With ``NOTIFICATION_BROKER = 'redis'`` every process publishes to a
+Redis channel and runs one listener that feeds its local subscribers.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_CHANNEL = 'portal:notifications'
+
+
+class InProcessBroker:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(entry)
+        return entry
+
+    def unsubscribe(self, user_id, entry):
+        with self._lock:
+            entries = self._subscribers.get(user_id)
+            if entries is not None:
+                entries.discard(entry)
+                if not entries:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, payload):
+        with self._lock:
+            entries = list(self._subscribers.get(user_id, ()))
+        for loop, queue in entries:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, payload)
+            except RuntimeError:
+                # The loop was closed under us; its stream is gone.
+                pass
+
+    @staticmethod
+    def _deliver(queue, payload):
+        if queue.full():
+            # A client that stopped reading loses its oldest events rather
+            # than growing the queue without bound.
+            queue.get_nowait()
+        queue.put_nowait(payload)
+
+
+class RedisBroker(InProcessBroker):
+    def __init__(self, url, queue_size=100):
+        super().__init__(queue_size)
+        self.url = url
+        self._listeners = {}
+        self._client = None
+
+    def subscribe(self, user_id):
+        entry = super().subscribe(user_id)
+        loop = entry[0]
+        if loop not in self._listeners:
+            self._listeners[loop] = loop.create_task(self._listen())
+        return entry
+
+    def publish(self, user_id, payload):
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(REDIS_CHANNEL, json.dumps({'user_id': user_id, 'payload': payload}))
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+
+        while True:
+            try:
+                client = aioredis.from_url(self.url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(REDIS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message['type'] != 'message':
+                            continue
+                        data = json.loads(message['data'])
+                        InProcessBroker.publish(self, data['user_id'], data['payload'])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Notification listener lost its Redis connection; reconnecting')
+                await asyncio.sleep(1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                queue_size = settings.NOTIFICATION_STREAM['QUEUE_SIZE']
+                if settings.NOTIFICATION_STREAM['BROKER'] == 'redis':
+                    _broker = RedisBroker(settings.NOTIFICATION_STREAM['REDIS_URL'], queue_size)
+                else:
+                    _broker = InProcessBroker(queue_size)
+    return _broker
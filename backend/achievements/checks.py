@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core import checks
+
+from users.checks import PROCESS_LOCAL_CACHES
+
+
+@checks.register()
+def check_notification_broker(app_configs, **kwargs):
+    """Notifications created by run_tasks must reach streams served by the web process."""
+    if settings.TASKS['BACKEND'] != 'database' or settings.NOTIFICATION_STREAM['BROKER'] == 'redis':
+        return []
+    return [checks.Error(
+        "TASK_BACKEND is 'database' but NOTIFICATION_BROKER is not 'redis', so notifications "
+        'created by run_tasks are published inside the worker process and never reach the '
+        'notification stream.',
+        hint='Set NOTIFICATION_BROKER=redis and REDIS_URL, or use TASK_BACKEND=immediate.',
+        id='achievements.E001',
+    )]
+
+
+@checks.register(deploy=True)
+def check_stream_broker(app_configs, **kwargs):
+    """Every worker process serves streams, so each must hear every notification."""
+    if settings.WEB_CONCURRENCY <= 1 or settings.NOTIFICATION_STREAM['BROKER'] == 'redis':
+        return []
+    return [checks.Error(
+        f"NOTIFICATION_BROKER is not 'redis' but WEB_CONCURRENCY is {settings.WEB_CONCURRENCY}, so a "
+        'notification only reaches the streams served by the worker process that created it.',
+        hint='Set NOTIFICATION_BROKER=redis and REDIS_URL, or run a single worker (WEB_CONCURRENCY=1).',
+        id='achievements.E002',
+    )]
+
+
+@checks.register(deploy=True)
+def check_response_cache(app_configs, **kwargs):
+    """A write invalidates cached responses in the cache it runs next to only."""
+    if not settings.RESPONSE_CACHE['ENABLED']:
+        return []
+    if settings.CACHES[settings.RESPONSE_CACHE['ALIAS']]['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [checks.Error(
+        'RESPONSE_CACHE_ENABLED is on but the response cache is process-local, so other worker '
+        'processes keep serving stale achievement and profile responses after a write.',
+        hint='Set REDIS_URL to use a shared cache, or set RESPONSE_CACHE_ENABLED=False.',
+        id='achievements.E003',
+    )]
@@ -0,0 +1,216 @@
+"""
+Incremental maintenance and reads of the LeaderboardEntry table.
+
+A student's score is the sum of their verified achievements' category
+weights plus their CGPA times ``CGPA_WEIGHT`` (``settings.LEADERBOARD``).
+Achievement changes are applied as deltas to the student's row, profile
+changes rewrite its department, year and CGPA part, and a student without a
+row gets one computed from the database. Changing the weights needs a
+``manage.py rebuild_leaderboard``.
+
+Rows are ordered by score, then verified count, then user id; each scope
+(everyone, a department, a year, both) has an index in that order, so a top-N
+query is one index range and a rank is a count of the index entries ahead of
+the student. Students with the same score share a rank. With Redis configured
+ranks come from sorted sets instead (see achievements/rank_index.py), which
+every write here keeps in step.
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+
+from profiles.models import StudentProfile
+from . import rank_index
+from .models import Achievement, LeaderboardEntry
+
+CENT = Decimal('0.01')
+BATCH_SIZE = 1000
+UPDATE_FIELDS = ['department', 'year', 'verified_count', 'points', 'cgpa', 'score']
+
+
+def weight(category):
+    weights = settings.LEADERBOARD['CATEGORY_WEIGHTS']
+    return Decimal(str(weights.get(category, 1))).quantize(CENT)
+
+
+def cgpa_points(cgpa):
+    if cgpa is None:
+        return Decimal(0)
+    return (Decimal(cgpa) * Decimal(str(settings.LEADERBOARD['CGPA_WEIGHT']))).quantize(CENT)
+
+
+def value(status, category):
+    """(verified count, points) one achievement contributes."""
+    if status != 'verified':
+        return 0, Decimal(0)
+    return 1, weight(category)
+
+
+def apply_deltas(deltas, create=True):
+    """
+    ``deltas`` maps student id to (verified count, points). Students without
+    a row get one computed from the database, which already includes the
+    change, unless ``create`` is false.
+    """
+    # One UPDATE per distinct delta: bulk changes mostly move students by the same amount.
+    students = defaultdict(list)
+    for student_id, delta in deltas.items():
+        if any(delta):
+            students[delta].append(student_id)
+    missing = []
+    rank_index.sync([student_id for student_ids in students.values() for student_id in student_ids])
+    for (count, points), student_ids in students.items():
+        entries = LeaderboardEntry.objects.filter(user_id__in=student_ids)
+        updated = entries.update(
+            verified_count=F('verified_count') + count,
+            points=F('points') + points,
+            score=F('score') + points,
+        )
+        if updated < len(student_ids):
+            missing += set(student_ids) - set(entries.values_list('user_id', flat=True))
+    if missing and create:
+        refresh(missing)
+
+
+def record_changes(changes, create=True):
+    """
+    Apply writes to achievements; ``changes`` have student_id, ``before`` and
+    ``after`` as for ``stats.record_changes``.
+    """
+    deltas = defaultdict(lambda: (0, Decimal(0)))
+    for change in changes:
+        count, points = value(*change['after']) if change['after'] is not None else (0, Decimal(0))
+        if change['before'] is not None:
+            old_count, old_points = value(*change['before'])
+            count, points = count - old_count, points - old_points
+        total_count, total_points = deltas[change['student_id']]
+        deltas[change['student_id']] = (total_count + count, total_points + points)
+    apply_deltas(deltas, create=create)
+
+
+def update_profile(profile):
+    """The profile's department, year or CGPA changed (or it was just created)."""
+    updated = LeaderboardEntry.objects.filter(user_id=profile.user_id).update(
+        department=profile.department,
+        year=profile.year,
+        cgpa=profile.cgpa,
+        score=F('points') + cgpa_points(profile.cgpa),
+    )
+    rank_index.sync([profile.user_id])
+    if not updated:
+        refresh([profile.user_id])
+
+
+def remove(user_id):
+    LeaderboardEntry.objects.filter(user_id=user_id).delete()
+    rank_index.sync([user_id])
+
+
+def build_entries(profiles):
+    """Entries for ``profiles`` (user_id, department, year, cgpa rows), computed from the achievements."""
+    profiles = list(profiles)
+    counts = Counter()
+    points = Counter()
+    rows = (
+        Achievement.objects.filter(status='verified', student_id__in=[profile['user_id'] for profile in profiles])
+        .values('student_id', 'category')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        counts[row['student_id']] += row['total']
+        points[row['student_id']] += weight(row['category']) * row['total']
+    return [
+        LeaderboardEntry(
+            user_id=profile['user_id'], department=profile['department'], year=profile['year'],
+            verified_count=counts[profile['user_id']], points=points[profile['user_id']], cgpa=profile['cgpa'],
+            score=points[profile['user_id']] + cgpa_points(profile['cgpa']),
+        )
+        for profile in profiles
+    ]
+
+
+def refresh(user_ids):
+    """Recompute the rows of these students; ones without a profile get none."""
+    profiles = StudentProfile.objects.filter(user_id__in=set(user_ids)).values('user_id', 'department', 'year', 'cgpa')
+    LeaderboardEntry.objects.bulk_create(
+        build_entries(profiles), update_conflicts=True, unique_fields=['user'], update_fields=UPDATE_FIELDS
+    )
+    rank_index.sync(user_ids)
+
+
+def rebuild():
+    profiles = StudentProfile.objects.order_by('user_id').values('user_id', 'department', 'year', 'cgpa')
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        last_user_id = 0
+        while True:
+            batch = list(profiles.filter(user_id__gt=last_user_id)[:BATCH_SIZE])
+            if not batch:
+                break
+            last_user_id = batch[-1]['user_id']
+            LeaderboardEntry.objects.bulk_create(build_entries(batch))
+        rank_index.rebuild()
+    return LeaderboardEntry.objects.count()
+
+
+def scope_filters(department=None, year=None):
+    filters = {}
+    if department:
+        filters['department'] = department
+    if year:
+        filters['year'] = year
+    return filters
+
+
+def ranked(department=None, year=None):
+    """A scope's entries, best first, in the order of its index."""
+    entries = LeaderboardEntry.objects.filter(**scope_filters(department, year))
+    return entries.order_by('-score', '-verified_count', 'user_id')
+
+
+def top(department=None, year=None, limit=10):
+    """The first ``limit`` entries of a scope, each with its ``rank``."""
+    entries = list(ranked(department, year).select_related('user')[:limit])
+    for position, entry in enumerate(entries, start=1):
+        tied = position > 1 and entry.score == entries[position - 2].score
+        entry.rank = entries[position - 2].rank if tied else position
+    return entries
+
+
+def rank(entry, department=None, year=None):
+    # Counts the index entries ahead of the student, so the cost grows with
+    # the rank: a top student is cheap, the last of 100k reads the whole index.
+    # rank_index answers in O(log n) when Redis is configured.
+    return ranked(department, year).filter(score__gt=entry.score).count() + 1
+
+
+def get_entry(user_id):
+    """
+    The student's entry; None when they have no profile. Serves reads (and
+    replicas), so a student whose row is not written yet gets one computed
+    from their profile and achievements without saving it.
+    """
+    entry = LeaderboardEntry.objects.select_related('user').filter(user_id=user_id).first()
+    if entry is None:
+        profiles = StudentProfile.objects.filter(user_id=user_id).values('user_id', 'department', 'year', 'cgpa')
+        entry = next(iter(build_entries(profiles)), None)
+    return entry
+
+
+def ranks(entry):
+    """The entry's rank in each scope; None for scopes its profile does not fill in."""
+    indexed = rank_index.ranks(entry)
+    if indexed is not None:
+        return indexed
+    return {
+        'overall': rank(entry),
+        'department': rank(entry, department=entry.department) if entry.department else None,
+        'year': rank(entry, year=entry.year) if entry.year else None,
+        'department_year': (
+            rank(entry, department=entry.department, year=entry.year) if entry.department and entry.year else None
+        ),
+    }
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from achievements import retention
+
+
+class Command(BaseCommand):
+    help = (
+        'Move read notifications older than NOTIFICATION_RETENTION["ARCHIVE_AFTER_DAYS"] into the '
+        'archive table in small batches, and purge archived ones past PURGE_AFTER_DAYS.'
+    )
+
+    def add_arguments(self, parser):
+        retention_settings = settings.NOTIFICATION_RETENTION
+        parser.add_argument('--days', type=int, default=retention_settings['ARCHIVE_AFTER_DAYS'],
+                            help='Archive read notifications older than this many days.')
+        parser.add_argument('--purge-days', type=int, default=retention_settings['PURGE_AFTER_DAYS'],
+                            help='Delete archived notifications older than this many days (0: never).')
+        parser.add_argument('--batch-size', type=int, default=retention_settings['BATCH_SIZE'],
+                            help='Notifications moved per transaction.')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches, to spread the load.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived.')
+        parser.add_argument('--partition', action='store_true',
+                            help='First convert the archive table into monthly partitions (PostgreSQL, once).')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days and --batch-size must be at least 1.')
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            count = retention.count_archivable(cutoff)
+            self.stdout.write(f'{count} read notifications older than {options["days"]} days would be archived.')
+            return
+
+        if options['partition']:
+            try:
+                converted = retention.partition_archive()
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(
+                'Partitioned the notification archive.' if converted else 'The archive is already partitioned.'
+            )
+
+        archived = 0
+        for batch in retention.archive_read(cutoff, options['batch_size'], options['pause']):
+            archived += batch
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} read notifications older than {options["days"]} days.'
+        ))
+
+        if options['purge_days']:
+            purged = retention.purge_archive(now - timedelta(days=options['purge_days']), options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Purged {purged} archived notifications older than {options["purge_days"]} days.'
+            ))
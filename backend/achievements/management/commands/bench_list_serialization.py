@@ -0,0 +1,104 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from achievements.models import Achievement
+from achievements.serializers import AchievementSerializer
+from backend.sparse_fields import converter_lookups, field_lookups, narrow_queryset, render_row, row_converters
+from profiles.models import StudentProfile
+from profiles.serializers import StudentProfileSerializer
+from users.models import User
+
+BENCH_STUDENT_ID = 'listbench'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure rows per second of the achievement and profile list serializers: '
+        'model instances through DRF fields (before), with a sparse fieldset, '
+        'and from .values() rows (the fast list path).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows serialized per run.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per variant; the best is reported.')
+        parser.add_argument(
+            '--fields', default='id,title,category,status,created_at',
+            help='Achievement fieldset for the sparse variants.',
+        )
+        parser.add_argument(
+            '--profile-fields', default='id,student_id,full_name,department,year',
+            help='Profile fieldset for the sparse variants.',
+        )
+        parser.add_argument('--cleanup', action='store_true', help='Delete the benchmark rows afterwards.')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        self.ensure_achievements(rows)
+        request = Request(APIRequestFactory().get('/'))
+        context = {'request': request}
+
+        achievements = Achievement.objects.select_related('student', 'verified_by').order_by('-created_at')[:rows]
+        profiles = StudentProfile.objects.select_related('user').order_by('-created_at')[:rows]
+        fields = options['fields'].split(',')
+        profile_fields = options['profile_fields'].split(',')
+
+        for label, serializer_class, queryset, sparse in [
+            ('Achievements', AchievementSerializer, achievements, fields),
+            ('Profiles', StudentProfileSerializer, profiles, profile_fields),
+        ]:
+            self.stdout.write(f'{label} ({queryset.count()} rows):')
+            for variant, fieldset, fast in [
+                ('all fields, instances', None, False),
+                ('all fields, values rows', None, True),
+                ('sparse, instances', sparse, False),
+                ('sparse, values rows', sparse, True),
+            ]:
+                best = min(
+                    self.run(serializer_class, queryset, context, fieldset, fast)
+                    for _ in range(options['repeat'])
+                )
+                count = queryset.count()
+                self.stdout.write(f'  {variant:<26} {count / best:>10.0f} rows/s ({best * 1000:.1f} ms)')
+
+        if options['cleanup']:
+            deleted, _ = User.objects.filter(student_id=BENCH_STUDENT_ID).delete()
+            self.stdout.write(f'Deleted {deleted} benchmark rows.')
+
+    def run(self, serializer_class, queryset, context, fieldset, fast):
+        started = time.perf_counter()
+        serializer = serializer_class(context=context, fields=fieldset)
+        if fast:
+            converters = row_converters(serializer)
+            lookups = converter_lookups(converters) | field_lookups(serializer) | {'pk'}
+            [render_row(converters, row) for row in queryset.values(*lookups)]
+        else:
+            if fieldset is not None:
+                queryset = narrow_queryset(queryset, serializer)
+            serializer_class(queryset, many=True, context=context, fields=fieldset).data
+        return time.perf_counter() - started
+
+    def ensure_achievements(self, count):
+        missing = count - Achievement.objects.count()
+        if missing <= 0:
+            return
+        student, _ = User.objects.get_or_create(
+            student_id=BENCH_STUDENT_ID,
+            defaults={'username': BENCH_STUDENT_ID, 'email': f'{BENCH_STUDENT_ID}@bench.invalid'},
+        )
+        today = timezone.now().date()
+        Achievement.objects.bulk_create([
+            Achievement(
+                student=student,
+                title=f'Benchmark achievement {n}',
+                description='Benchmark description. ' * 20,
+                category='academic',
+                achievement_date=today,
+            )
+            for n in range(missing)
+        ], batch_size=settings.ACHIEVEMENT_EXPORT_CHUNK_SIZE)
+        self.stdout.write(f'Created {missing} benchmark achievements.')
@@ -0,0 +1,94 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+from backend.db_routing import pin_key
+from profiles.models import StudentProfile
+from users.serializers import CustomTokenObtainPairSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Send requests through the API and check which database served them: public and own '
+        'reads from a replica, writes and the writer\'s following reads from the primary. '
+        'Needs at least one replica in DATABASE_REPLICA_URLS; writes are rolled back.'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS['ALIASES']:
+            raise CommandError('No replicas configured; set DATABASE_REPLICA_URLS.')
+        profile = StudentProfile.objects.using(DEFAULT_DB_ALIAS).select_related('user').first()
+        if profile is None:
+            raise CommandError('The primary database has no student profile to test with.')
+
+        token = str(CustomTokenObtainPairSerializer.get_token(profile.user).access_token)
+        student = {'Authorization': f'Bearer {token}'}
+        checks = [
+            ('anonymous achievement list', 'get', '/api/achievements/list/', {}, 'replica'),
+            ('anonymous profile', 'get', f'/api/profiles/{profile.pk}/', {}, 'replica'),
+            ('anonymous portfolio', 'get', f'/api/profiles/portfolio/{profile.user_id}/', {}, 'replica'),
+            ('anonymous leaderboard', 'get', '/api/achievements/leaderboard/', {}, 'replica'),
+            ('student own profile', 'get', '/api/profiles/me/', student, 'replica'),
+            ('student notifications (not routed)', 'get', '/api/achievements/notifications/', student, 'primary'),
+            ('student profile update', 'patch', f'/api/profiles/{profile.pk}/', student, 'primary'),
+            ('student own profile after the update', 'get', '/api/profiles/me/', student, 'primary'),
+            ('student achievements after the update', 'get', '/api/achievements/list/my_achievements/', student, 'primary'),
+            ('anonymous profile after the update', 'get', f'/api/profiles/{profile.pk}/', {}, 'replica'),
+        ]
+
+        cache.delete(pin_key(profile.user_id))
+        failures = 0
+        overrides = {
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            'RESPONSE_CACHE': {**settings.RESPONSE_CACHE, 'ENABLED': False},
+        }
+        try:
+            with override_settings(**overrides), transaction.atomic():
+                client = Client(raise_request_exception=False)
+                for label, method, path, headers, expected in checks:
+                    data = {'bio': profile.bio} if method == 'patch' else None
+                    status, aliases = self.request(client, method, path, headers, data)
+                    served = 'replica' if aliases and aliases <= set(settings.DATABASE_REPLICAS['ALIASES']) else (
+                        'primary' if aliases == {DEFAULT_DB_ALIAS} else 'mixed'
+                    )
+                    detail = f'{label}: {method.upper()} {path} -> {status}, {", ".join(sorted(aliases)) or "no queries"}'
+                    if served == expected:
+                        self.stdout.write(self.style.SUCCESS(f'ok   {detail}'))
+                    else:
+                        failures += 1
+                        self.stdout.write(self.style.ERROR(f'FAIL {detail} (expected {expected})'))
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            cache.delete(pin_key(profile.user_id))
+
+        if failures:
+            raise CommandError(f'{failures} request(s) were served by the wrong database.')
+
+    def request(self, client, method, path, headers, data):
+        aliases = set()
+
+        def record(alias):
+            def wrapper(execute, sql, params, many, context):
+                aliases.add(alias)
+                return execute(sql, params, many, context)
+            return wrapper
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(record(alias)))
+            if method == 'patch':
+                response = client.patch(path, data, content_type='application/json', headers=headers)
+            else:
+                response = client.get(path, headers=headers)
+        return response.status_code, aliases
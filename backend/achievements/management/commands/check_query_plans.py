@@ -0,0 +1,108 @@
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from achievements import leaderboard
+from achievements.models import Achievement, ArchivedNotification, LeaderboardEntry, Notification
+from achievements.views import AchievementViewSet
+
+FILTER_VALUES = {
+    'student_id': '1',
+    'status': 'verified',
+    'category': 'academic',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN every supported achievement filter combination, the notification and '
+        'leaderboard queries, and fail if any of them needs a full table scan or an explicit sort.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failures.')
+
+    def handle(self, *args, **options):
+        failures = []
+
+        for label, queryset in self.get_querysets():
+            plan = self.explain(queryset)
+            problems = self.find_problems(plan)
+            if problems:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'FAIL {label}: {", ".join(problems)}'))
+                self.stdout.write(plan)
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok   {label}'))
+                if options['verbose_plans']:
+                    self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'{len(failures)} query plan(s) do not use an index.')
+
+    def get_querysets(self):
+        factory = APIRequestFactory()
+        names = list(FILTER_VALUES)
+
+        for size in range(len(names) + 1):
+            for combo in combinations(names, size):
+                params = {name: FILTER_VALUES[name] for name in combo}
+                view = AchievementViewSet(
+                    request=Request(factory.get('/', params)), action='list', format_kwarg=None, kwargs={},
+                )
+                queryset = view.get_queryset()
+                label = 'achievements ' + ('&'.join(combo) or 'unfiltered')
+                yield label, queryset[:20]
+                yield label + ' (keyset)', queryset.order_by('-created_at', '-id')[:20]
+
+        yield 'achievements pending queue', Achievement.objects.filter(status='pending').order_by('-created_at', '-id')[:20]
+        yield 'notifications for user', Notification.objects.filter(user_id=1).order_by('-created_at', '-id')[:20]
+        yield 'unread notifications for user', Notification.objects.filter(user_id=1, is_read=False)[:20]
+        yield 'archived notifications for user', (
+            ArchivedNotification.objects.filter(user_id=1).order_by('-created_at', '-id')[:20]
+        )
+
+        department, year = {'department': 'Computer Science'}, {'year': '3'}
+        for scope in [{}, department, year, {**department, **year}]:
+            label = '&'.join(scope) or 'overall'
+            yield f'leaderboard top {label}', leaderboard.ranked(**scope).select_related('user')[:10]
+            yield f'leaderboard rank {label}', leaderboard.ranked(**scope).filter(score__gt=10).order_by().values('pk')
+
+    def explain(self, queryset):
+        if connection.vendor != 'postgresql':
+            return queryset.explain()
+        # Tiny development tables always favour a sequential scan; ask the
+        # planner whether an index *can* serve the query instead.
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                return queryset.explain()
+            finally:
+                cursor.execute('SET enable_seqscan = on')
+
+    def find_problems(self, plan):
+        problems = []
+        tables = [
+            Achievement._meta.db_table, Notification._meta.db_table,
+            ArchivedNotification._meta.db_table, LeaderboardEntry._meta.db_table,
+        ]
+
+        if connection.vendor == 'postgresql':
+            for table in tables:
+                if f'Seq Scan on {table}' in plan:
+                    problems.append(f'sequential scan on {table}')
+            if 'Sort Key' in plan and 'Incremental Sort' not in plan:
+                problems.append('explicit sort')
+        elif connection.vendor == 'sqlite':
+            for line in plan.splitlines():
+                line = line.strip()
+                for table in tables:
+                    if line.endswith(f'SCAN {table}'):
+                        problems.append(f'full scan on {table}')
+                if 'USE TEMP B-TREE' in line and 'ORDER BY' in line:
+                    problems.append('explicit sort')
+
+        return problems
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from achievements import stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the AchievementStat rollup from the achievements table.'
+
+    def handle(self, *args, **options):
+        groups = stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt achievement statistics: {groups} groups.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from achievements import leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Recompute the leaderboard from the profiles and verified achievements, e.g. after changing the weights.'
+
+    def handle(self, *args, **options):
+        entries = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the leaderboard: {entries} students.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from backend.search import SEARCH_INDEXES
+
+
+class Command(BaseCommand):
+    help = (
+        'Recreate any missing search index triggers and re-index every achievement and profile. '
+        'Safe to run repeatedly.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database to repair (default: default).')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        for index in SEARCH_INDEXES:
+            if not index.is_installed(connection):
+                self.stdout.write(self.style.WARNING(f'{index.table}: search migration not applied, skipped.'))
+                continue
+            restored = index.restore_triggers(connection)
+            index.rebuild(connection)
+            detail = f'recreated {", ".join(restored)}' if restored else 'triggers present'
+            self.stdout.write(self.style.SUCCESS(f'{index.table}: re-indexed, {detail}.'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0002_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='ach_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['student', '-created_at', '-id'], name='ach_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='ach_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-created_at', '-id'], name='ach_pending_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='notification_user_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0004_notificationcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AchievementStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('category', models.CharField(max_length=50)),
+                ('department', models.CharField(blank=True, max_length=25)),
+                ('year', models.CharField(blank=True, max_length=4)),
+                ('month', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['month', 'status', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('status', 'category', 'department', 'year', 'month'), name='achievement_stat_group_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:40
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The SQL is frozen here rather than built by backend/search.py, so later
+# changes to that module cannot rewrite what this migration did.
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    CREATE OR REPLACE FUNCTION achievements_achievement_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B')
+            || setweight(to_tsvector('english', coalesce(NEW.category, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER achievements_achievement_search_vector_update
+    BEFORE INSERT OR UPDATE ON achievements_achievement
+    FOR EACH ROW EXECUTE FUNCTION achievements_achievement_search_vector()
+    """,
+    'CREATE INDEX achievements_achievement_search_idx ON achievements_achievement USING gin (search_vector)',
+    'CREATE INDEX achievements_achievement_title_trgm_idx ON achievements_achievement USING gin (title gin_trgm_ops)',
+    'CREATE INDEX achievements_achievement_description_trgm_idx '
+    'ON achievements_achievement USING gin (description gin_trgm_ops)',
+    'UPDATE achievements_achievement SET title = title',
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS achievements_achievement_title_trgm_idx',
+    'DROP INDEX IF EXISTS achievements_achievement_description_trgm_idx',
+    'DROP INDEX IF EXISTS achievements_achievement_search_idx',
+    'DROP TRIGGER IF EXISTS achievements_achievement_search_vector_update ON achievements_achievement',
+    'DROP FUNCTION IF EXISTS achievements_achievement_search_vector()',
+]
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE achievements_achievement_fts USING fts5("
+    "title, description, category, content='achievements_achievement', content_rowid='id')",
+    """
+    CREATE TRIGGER achievements_achievement_fts_insert AFTER INSERT ON achievements_achievement BEGIN
+        INSERT INTO achievements_achievement_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER achievements_achievement_fts_delete AFTER DELETE ON achievements_achievement BEGIN
+        INSERT INTO achievements_achievement_fts(achievements_achievement_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER achievements_achievement_fts_update AFTER UPDATE ON achievements_achievement BEGIN
+        INSERT INTO achievements_achievement_fts(achievements_achievement_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+        INSERT INTO achievements_achievement_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END
+    """,
+    "INSERT INTO achievements_achievement_fts(achievements_achievement_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS achievements_achievement_fts_insert',
+    'DROP TRIGGER IF EXISTS achievements_achievement_fts_delete',
+    'DROP TRIGGER IF EXISTS achievements_achievement_fts_update',
+    'DROP TABLE IF EXISTS achievements_achievement_fts',
+]
+
+
+def run(schema_editor, postgres, sqlite):
+    statements = {'postgresql': postgres, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    run(schema_editor, POSTGRES_FORWARD, SQLITE_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    run(schema_editor, POSTGRES_BACKWARD, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0005_achievementstat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='achievement',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0009_announcements'),
+        ('users', '0004_rosterimport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_entry', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('department', models.CharField(blank=True, max_length=25)),
+                ('year', models.CharField(blank=True, max_length=4)),
+                ('verified_count', models.IntegerField(default=0)),
+                ('points', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cgpa', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('score', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['-score', '-verified_count', 'user_id'],
+                'indexes': [models.Index(fields=['-score', '-verified_count', 'user'], name='leaderboard_score_idx'), models.Index(fields=['department', '-score', '-verified_count', 'user'], name='leaderboard_dept_score_idx'), models.Index(fields=['year', '-score', '-verified_count', 'user'], name='leaderboard_year_score_idx'), models.Index(fields=['department', 'year', '-score', '-verified_count', 'user'], name='leaderboard_dept_year_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# 0007_proof_uploads altered proof_document, which SQLite does by rebuilding
+# the table; that dropped the FTS5 sync triggers created in 0006. PostgreSQL
+# keeps triggers across ALTER TABLE, so this only runs on SQLite.
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER IF NOT EXISTS achievements_achievement_fts_insert AFTER INSERT ON achievements_achievement BEGIN
+        INSERT INTO achievements_achievement_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS achievements_achievement_fts_delete AFTER DELETE ON achievements_achievement BEGIN
+        INSERT INTO achievements_achievement_fts(achievements_achievement_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS achievements_achievement_fts_update AFTER UPDATE ON achievements_achievement BEGIN
+        INSERT INTO achievements_achievement_fts(achievements_achievement_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+        INSERT INTO achievements_achievement_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END
+    """,
+    # Index the rows written while the triggers were missing.
+    "INSERT INTO achievements_achievement_fts(achievements_achievement_fts) VALUES ('rebuild')",
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SQLITE_FORWARD:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0010_leaderboard'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0011_restore_search_triggers'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='proofuploadpart',
+            old_name='created_at',
+            new_name='updated_at',
+        ),
+    ]
@@ -1,10 +1,15 @@
+import uuid
+
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth import get_user_model
+from backend.tracking import TrackedFieldsMixin
+from .storage import get_proof_storage
 
 User = get_user_model()
 
 
-class Achievement(models.Model):
+class Achievement(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('verified', 'Verified'),
@@ -27,7 +32,7 @@ class Achievement(models.Model):
     description = models.TextField()
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    proof_document = models.FileField(upload_to='achievement_proofs/', null=True, blank=True)
+    proof_document = models.FileField(upload_to='achievement_proofs/', storage=get_proof_storage, null=True, blank=True)
     achievement_date = models.DateField(null=True, blank=True)
     verified_by = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True, blank=True,
@@ -36,23 +41,293 @@ class Achievement(models.Model):
     verification_notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL (see backend/search.py).
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return f"{self.title} - {self.student.student_id}"
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='achievement_created_id_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='ach_status_created_idx'),
+            models.Index(fields=['student', '-created_at', '-id'], name='ach_student_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='ach_category_created_idx'),
+            models.Index(
+                fields=['-created_at', '-id'], name='ach_pending_created_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+
+class Announcement(models.Model):
+    """
+    A message a coordinator broadcast to every student in a department and/or
+    year (blank: all of them). Each recipient gets a ``Notification`` that
+    references the announcement instead of a copy of the message; the
+    ``deliver_announcement`` task writes them in chunks and advances
+    ``last_user_id``/``delivered`` with each one.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('delivering', 'Delivering'),
+        ('delivered', 'Delivered'),
+    ]
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='announcements')
+    message = models.TextField()
+    department = models.CharField(max_length=25, blank=True)
+    year = models.CharField(max_length=4, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    recipients = models.PositiveIntegerField(default=0)
+    delivered = models.PositiveIntegerField(default=0)
+    last_user_id = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Announcement {self.pk} ({self.delivered}/{self.recipients})"
+
+    class Meta:
+        ordering = ['-created_at']
 
 
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
-    achievement = models.ForeignKey(Achievement, on_delete=models.CASCADE, related_name='notifications')
-    message = models.TextField()
+    # Exactly one of these is set: a status change or an announcement.
+    achievement = models.ForeignKey(
+        Achievement, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications'
+    )
+    announcement = models.ForeignKey(
+        Announcement, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications'
+    )
+    # Blank for announcements, whose text is stored once on the announcement.
+    message = models.TextField(blank=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Notification for {self.user.student_id}"
 
+    @property
+    def text(self):
+        if self.announcement_id and not self.message:
+            return self.announcement.message
+        return self.message
+
+    @staticmethod
+    def status_change_message(title, status, verification_notes=''):
+        message = f'Your achievement "{title}" has been {status}.'
+        if verification_notes:
+            message += f' Note: {verification_notes}'
+        return message
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_created_idx'),
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notification_user_unread_idx'),
+        ]
+
+
+class ArchivedNotification(models.Model):
+    """
+    A read notification moved out of ``Notification`` by the retention job
+    (achievements/retention.py), keeping its id and ``created_at``. On
+    PostgreSQL the table can be partitioned by month of ``created_at``.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    achievement = models.ForeignKey(
+        Achievement, on_delete=models.CASCADE, null=True, blank=True, related_name='archived_notifications'
+    )
+    announcement = models.ForeignKey(
+        Announcement, on_delete=models.CASCADE, null=True, blank=True, related_name='archived_notifications'
+    )
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived notification for {self.user_id}"
+
+    text = Notification.text
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='archived_notif_user_idx'),
+        ]
+
+
+class NotificationCounter(models.Model):
+    """
+    Per-user unread notification count, kept up to date as notifications are
+    created and read so the badge can be served without scanning notifications.
+    ``version`` changes on every update and backs the endpoint's ETag.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.IntegerField(default=0)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.unread} unread for {self.user_id}"
+
+    @property
+    def etag(self):
+        return f'W/"{max(self.unread, 0)}-{self.version}"'
+
+    @classmethod
+    def adjust(cls, user_id, delta, create=True):
+        updated = cls.objects.filter(user_id=user_id).update(
+            unread=models.F('unread') + delta, version=models.F('version') + 1
+        )
+        if not updated and create:
+            cls.rebuild(user_id)
+
+    @classmethod
+    def record_created(cls, notifications):
+        counts = {}
+        for notification in notifications:
+            if not notification.is_read:
+                counts[notification.user_id] = counts.get(notification.user_id, 0) + 1
+        for user_id, count in counts.items():
+            cls.adjust(user_id, count)
+
+    @classmethod
+    def reset(cls, user_id):
+        updated = cls.objects.filter(user_id=user_id).exclude(unread=0).update(
+            unread=0, version=models.F('version') + 1
+        )
+        if not updated and not cls.objects.filter(user_id=user_id).exists():
+            cls.rebuild(user_id)
+
+    @classmethod
+    def rebuild(cls, user_id):
+        unread = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        counter, created = cls.objects.get_or_create(user_id=user_id, defaults={'unread': unread})
+        if not created:
+            cls.objects.filter(pk=counter.pk).update(unread=unread, version=models.F('version') + 1)
+            counter.refresh_from_db()
+        return counter
+
+
+class AchievementStat(models.Model):
+    """
+    Rollup of achievement counts per (status, category, department, year,
+    month), maintained incrementally from the achievement signals so the
+    dashboard reads one row per group instead of scanning achievements.
+    ``department`` and ``year`` come from the student's profile.
+    """
+    status = models.CharField(max_length=20)
+    category = models.CharField(max_length=50)
+    department = models.CharField(max_length=25, blank=True)
+    year = models.CharField(max_length=4, blank=True)
+    month = models.DateField()
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.status}/{self.category}/{self.department}/{self.year}/{self.month:%Y-%m}: {self.count}"
+
+    class Meta:
+        ordering = ['month', 'status', 'category']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['status', 'category', 'department', 'year', 'month'], name='achievement_stat_group_unique'
+            ),
+        ]
+
+
+class LeaderboardEntry(models.Model):
+    """
+    A student's leaderboard score, maintained incrementally from the
+    achievement and profile signals (see achievements/leaderboard.py).
+    ``score`` is ``points`` (the weighted verified achievements) plus the
+    weighted CGPA; ``department`` and ``year`` are copied from the profile so
+    each scope's ranking is one index range.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='leaderboard_entry')
+    department = models.CharField(max_length=25, blank=True)
+    year = models.CharField(max_length=4, blank=True)
+    verified_count = models.IntegerField(default=0)
+    points = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cgpa = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    score = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.score}"
+
+    class Meta:
+        ordering = ['-score', '-verified_count', 'user_id']
+        indexes = [
+            models.Index(fields=['-score', '-verified_count', 'user'], name='leaderboard_score_idx'),
+            models.Index(fields=['department', '-score', '-verified_count', 'user'], name='leaderboard_dept_score_idx'),
+            models.Index(fields=['year', '-score', '-verified_count', 'user'], name='leaderboard_year_score_idx'),
+            models.Index(
+                fields=['department', 'year', '-score', '-verified_count', 'user'], name='leaderboard_dept_year_idx'
+            ),
+        ]
+
+
+class ProofUpload(models.Model):
+    """
+    A chunked, resumable upload of an achievement's proof document. Parts are
+    written straight to the proof storage as they arrive; the achievement's
+    ``proof_document`` is only set once the upload is completed.
+    """
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('completed', 'Completed'),
+        ('aborted', 'Aborted'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='proof_uploads')
+    achievement = models.ForeignKey(Achievement, on_delete=models.CASCADE, related_name='proof_uploads')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    part_size = models.PositiveIntegerField()
+    storage_key = models.CharField(max_length=500)
+    # Multipart upload id on S3-compatible storage; unused by the local backend.
+    storage_upload_id = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    checksum = models.CharField(max_length=80, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.status})"
+
+    @property
+    def total_parts(self):
+        return max(1, -(-self.size // self.part_size))
+
+    def expected_part_size(self, number):
+        if number < self.total_parts:
+            return self.part_size
+        return self.size - self.part_size * (self.total_parts - 1)
+
     class Meta:
         ordering = ['-created_at']
+
+
+class ProofUploadPart(models.Model):
+    upload = models.ForeignKey(ProofUpload, on_delete=models.CASCADE, related_name='parts')
+    number = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    etag = models.CharField(max_length=255, blank=True)
+    # A part sent again replaces the stored one, so this is when it was last written.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Part {self.number} of {self.upload_id}"
+
+    class Meta:
+        ordering = ['number']
+        constraints = [
+            models.UniqueConstraint(fields=['upload', 'number'], name='proof_upload_part_unique'),
+        ]
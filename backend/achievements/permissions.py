@@ -8,7 +8,7 @@ class IsStudentOwnerOrCoordinator(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.role == 'coordinator':
             return True
-        return obj.student == request.user
+        return obj.student_id == request.user.id
 
 
 class IsCoordinator(permissions.BasePermission):
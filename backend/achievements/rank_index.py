@@ -0,0 +1,164 @@
+"""
+Leaderboard ranks from Redis sorted sets, used when ``LEADERBOARD['REDIS_URL']``
+is set.
+
+Counting the LeaderboardEntry index entries ahead of a student costs time in
+proportion to the rank. Here each scope (everyone, a department, a year, both)
+is a sorted set of user ids by score, and a rank is a ``ZCOUNT`` of the scores
+above the student's, O(log n) however far down the board they are. The four
+counts of ``ranks`` go out in one round trip.
+
+The sets follow the database: every function in leaderboard.py that writes
+entries calls ``sync`` with the students it touched, which re-reads their
+committed rows once the transaction commits. ``rebuild`` (run by
+``leaderboard.rebuild``) refills them from scratch; until it has run once, or
+while Redis is unreachable, ranks are counted in the database instead. Run
+``manage.py rebuild_leaderboard`` after Redis loses its data.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import router, transaction
+
+from .models import LeaderboardEntry
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'portal:leaderboard'
+MEMBERS_KEY = f'{KEY_PREFIX}:members'
+READY_KEY = f'{KEY_PREFIX}:ready'
+BATCH_SIZE = 1000
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client():
+    """A Redis client for the configured URL, or None when ranks are counted in the database."""
+    url = settings.LEADERBOARD['REDIS_URL']
+    if not url:
+        return None
+    client = _clients.get(url)
+    if client is None:
+        import redis
+
+        with _clients_lock:
+            client = _clients.setdefault(url, redis.Redis.from_url(url))
+    return client
+
+
+def scope_key(department='', year=''):
+    # Years are digits, so the last colon always separates the two.
+    return f'{KEY_PREFIX}:scope:{department}:{year}'
+
+
+def scope_keys(department, year):
+    """The sets an entry with this department and year belongs to."""
+    keys = [scope_key()]
+    if department:
+        keys.append(scope_key(department=department))
+    if year:
+        keys.append(scope_key(year=year))
+    if department and year:
+        keys.append(scope_key(department, year))
+    return keys
+
+
+def write_entries(pipeline, rows, members):
+    """Queue the writes that move each ``(user_id, department, year, score)`` row to its sets."""
+    for user_id, department, year, score in rows:
+        previous = members.get(user_id)
+        keys = scope_keys(department, year)
+        if previous is not None:
+            old_keys = set(scope_keys(*previous.decode().rsplit(':', 1))) - set(keys)
+            for key in old_keys:
+                pipeline.zrem(key, user_id)
+        for key in keys:
+            pipeline.zadd(key, {user_id: float(score)})
+        pipeline.hset(MEMBERS_KEY, user_id, f'{department}:{year}')
+
+
+def sync(user_ids):
+    """Bring these students' sets in line with their rows once the transaction commits."""
+    if get_client() is None or not user_ids:
+        return
+    user_ids = sorted(set(user_ids))
+    transaction.on_commit(lambda: sync_now(user_ids), robust=True)
+
+
+def sync_now(user_ids):
+    client = get_client()
+    rows = list(
+        LeaderboardEntry.objects.using(router.db_for_write(LeaderboardEntry))
+        .filter(user_id__in=user_ids).values_list('user_id', 'department', 'year', 'score')
+    )
+    members = dict(zip(user_ids, client.hmget(MEMBERS_KEY, user_ids)))
+    pipeline = client.pipeline()
+    write_entries(pipeline, rows, members)
+    for user_id in set(user_ids) - {row[0] for row in rows}:
+        previous = members[user_id]
+        if previous is not None:
+            for key in scope_keys(*previous.decode().rsplit(':', 1)):
+                pipeline.zrem(key, user_id)
+            pipeline.hdel(MEMBERS_KEY, user_id)
+    pipeline.execute()
+
+
+def rebuild():
+    """Refill every set from the entries once the transaction commits."""
+    if get_client() is not None:
+        transaction.on_commit(rebuild_now)
+
+
+def rebuild_now():
+    client = get_client()
+    # Reads fall back to the database until the sets are complete again.
+    client.delete(READY_KEY)
+    keys = list(client.scan_iter(match=f'{KEY_PREFIX}:*', count=BATCH_SIZE))
+    for start in range(0, len(keys), BATCH_SIZE):
+        client.delete(*keys[start:start + BATCH_SIZE])
+    entries = (
+        LeaderboardEntry.objects.using(router.db_for_write(LeaderboardEntry))
+        .order_by('user_id').values_list('user_id', 'department', 'year', 'score')
+    )
+    last_user_id = 0
+    while True:
+        batch = list(entries.filter(user_id__gt=last_user_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_user_id = batch[-1][0]
+        pipeline = client.pipeline(transaction=False)
+        write_entries(pipeline, batch, {})
+        pipeline.execute()
+    client.set(READY_KEY, 1)
+
+
+def ranks(entry):
+    """
+    The entry's rank in each scope, as ``leaderboard.ranks``; None when the
+    sets cannot answer and the database has to.
+    """
+    client = get_client()
+    if client is None:
+        return None
+    scopes = {
+        'overall': scope_key(),
+        'department': scope_key(department=entry.department) if entry.department else None,
+        'year': scope_key(year=entry.year) if entry.year else None,
+        'department_year': scope_key(entry.department, entry.year) if entry.department and entry.year else None,
+    }
+    keys = {name: key for name, key in scopes.items() if key is not None}
+    try:
+        pipeline = client.pipeline(transaction=False)
+        pipeline.exists(READY_KEY)
+        for key in keys.values():
+            pipeline.zcount(key, f'({float(entry.score)}', '+inf')
+        ready, *counts = pipeline.execute()
+    except Exception:
+        logger.exception('Could not read leaderboard ranks from Redis; counting them in the database')
+        return None
+    if not ready:
+        return None
+    ahead = dict(zip(keys, counts))
+    return {name: ahead[name] + 1 if name in ahead else None for name in scopes}
@@ -0,0 +1,171 @@
+"""
+Notification retention.
+
+``archive_read`` moves read notifications older than a cutoff from
+``Notification`` into ``ArchivedNotification`` in short transactions of
+``batch_size`` rows, walking the primary key so no batch rescans rows that
+were already looked at. Rows are locked with ``SKIP LOCKED`` on PostgreSQL,
+so a batch never waits on a request that is using one of them. Unread
+notifications are never archived, which keeps the unread counters valid.
+
+On PostgreSQL the archive table can be converted once into monthly range
+partitions on ``created_at`` (``partition_archive``); partitions are then
+created as rows arrive and ``purge_archive`` drops whole months instead of
+deleting rows. The hot ``Notification`` table is kept small by archiving
+rather than partitioning: a partitioned table needs ``created_at`` in its
+primary key, and old unread rows must stay in place.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from .models import ArchivedNotification, Notification
+
+ARCHIVE_TABLE = ArchivedNotification._meta.db_table
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(moment):
+    return datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f'{ARCHIVE_TABLE}_p{month:%Y%m}'
+
+
+def archive_read(cutoff, batch_size, pause=0.0):
+    """Archive read notifications created before ``cutoff``; yields the size of each batch."""
+    partitioned = is_partitioned()
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Notification.objects.filter(pk__gt=last_pk, is_read=True, created_at__lt=cutoff)
+                .order_by('pk')
+                .select_for_update(skip_locked=True)
+                .values('pk', 'user_id', 'achievement_id', 'announcement_id', 'message', 'created_at')[:batch_size]
+            )
+            if not rows:
+                return
+            last_pk = rows[-1]['pk']
+            if partitioned:
+                ensure_partitions(min(row['created_at'] for row in rows), max(row['created_at'] for row in rows))
+            ArchivedNotification.objects.bulk_create([
+                ArchivedNotification(
+                    id=row['pk'], user_id=row['user_id'], achievement_id=row['achievement_id'],
+                    announcement_id=row['announcement_id'], message=row['message'], created_at=row['created_at'],
+                )
+                for row in rows
+            ], ignore_conflicts=True)
+            Notification.objects.filter(pk__in=[row['pk'] for row in rows]).delete()
+        yield len(rows)
+        if pause:
+            time.sleep(pause)
+
+
+def count_archivable(cutoff):
+    return Notification.objects.filter(is_read=True, created_at__lt=cutoff).count()
+
+
+def purge_archive(cutoff, batch_size):
+    """Delete archived notifications created before ``cutoff``; returns how many."""
+    if is_partitioned():
+        return drop_partitions_before(cutoff)
+    deleted = 0
+    while True:
+        expired = ArchivedNotification.objects.filter(created_at__lt=cutoff)
+        pks = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += ArchivedNotification.objects.filter(pk__in=pks).delete()[0]
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass', [ARCHIVE_TABLE])
+        return cursor.fetchone() is not None
+
+
+def ensure_partitions(start, end):
+    month = month_start(start)
+    with connection.cursor() as cursor:
+        while month <= end:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {ARCHIVE_TABLE} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [month, next_month(month)],
+            )
+            month = next_month(month)
+
+
+def partitions():
+    """(name, month) of every monthly partition, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = %s::regclass ORDER BY child.relname',
+            [ARCHIVE_TABLE],
+        )
+        names = [name for name, in cursor.fetchall()]
+    prefix = f'{ARCHIVE_TABLE}_p'
+    return [
+        (name, datetime.strptime(name[len(prefix):], '%Y%m').replace(tzinfo=dt_timezone.utc))
+        for name in names if name.startswith(prefix)
+    ]
+
+
+def drop_partitions_before(cutoff):
+    """Drop partitions whose whole month is before ``cutoff``; returns the rows they held."""
+    dropped = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for name, month in partitions():
+            if next_month(month) > cutoff:
+                break
+            cursor.execute(f'SELECT count(*) FROM {name}')
+            dropped += cursor.fetchone()[0]
+            cursor.execute(f'DROP TABLE {name}')
+    return dropped
+
+
+def partition_archive():
+    """
+    Convert the archive table into monthly partitions (PostgreSQL only).
+    Runs in one transaction that locks the table; the archive is only written
+    by the retention job and read by ``?archived=true`` requests. Foreign keys
+    and indexes are recreated from the model, under the names ``migrate``
+    gives them, so later migrations still find them.
+    """
+    if connection.vendor != 'postgresql':
+        raise ValueError('Partitioning the notification archive needs PostgreSQL.')
+    if is_partitioned():
+        return False
+    model = ArchivedNotification
+    old = f'{ARCHIVE_TABLE}_unpartitioned'
+    with connection.schema_editor() as editor:
+        editor.execute(f'ALTER TABLE {ARCHIVE_TABLE} RENAME TO {old}')
+        editor.execute(
+            f'CREATE TABLE {ARCHIVE_TABLE} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT min(created_at), max(created_at) FROM {old}')
+            first, last = cursor.fetchone()
+        if first is not None:
+            ensure_partitions(first, last)
+        editor.execute(f'INSERT INTO {ARCHIVE_TABLE} SELECT * FROM {old}')
+        # Dropping the old table frees its index names for the new ones.
+        editor.execute(f'DROP TABLE {old}')
+        # The primary key of a partitioned table must include the partition key.
+        editor.execute(f'ALTER TABLE {ARCHIVE_TABLE} ADD PRIMARY KEY (id, created_at)')
+        for field in model._meta.local_fields:
+            if field.remote_field and field.db_constraint:
+                editor.execute(editor._create_fk_sql(model, field, '_fk_%(to_table)s_%(to_column)s'))
+        for statement in editor._model_indexes_sql(model):
+            editor.execute(statement)
+    return True
@@ -1,9 +1,14 @@
 from rest_framework import serializers
-from .models import Achievement, Notification
+from django.conf import settings
+from .models import (
+    Achievement, Announcement, ArchivedNotification, LeaderboardEntry, Notification, ProofUpload, ProofUploadPart,
+)
 from users.serializers import UserSerializer
+from backend.metrics import TimedSerializerMixin
+from backend.sparse_fields import SparseFieldsSerializerMixin
 
 
-class AchievementSerializer(serializers.ModelSerializer):
+class AchievementSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.student_id', read_only=True)
     student_user_id = serializers.IntegerField(source='student.id', read_only=True)
     verified_by_name = serializers.CharField(source='verified_by.student_id', read_only=True, allow_null=True)
@@ -19,14 +24,130 @@ class AchievementSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'student', 'verified_by', 'created_at', 'updated_at']
 
     def create(self, validated_data):
-        validated_data['student'] = self.context['request'].user
+        validated_data['student_id'] = self.context['request'].user.id
         return super().create(validated_data)
 
 
-class NotificationSerializer(serializers.ModelSerializer):
-    achievement_title = serializers.CharField(source='achievement.title', read_only=True)
+class NotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    achievement_title = serializers.CharField(source='achievement.title', read_only=True, allow_null=True)
+    message = serializers.CharField(source='text', read_only=True)
 
     class Meta:
         model = Notification
-        fields = ['id', 'user', 'achievement', 'achievement_title', 'message', 'is_read', 'created_at']
-        read_only_fields = ['id', 'user', 'achievement', 'message', 'created_at']
+        fields = ['id', 'user', 'achievement', 'announcement', 'achievement_title', 'message', 'is_read', 'created_at']
+        read_only_fields = ['id', 'user', 'achievement', 'announcement', 'message', 'created_at']
+
+
+class ArchivedNotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    achievement_title = serializers.CharField(source='achievement.title', read_only=True, allow_null=True)
+    message = serializers.CharField(source='text', read_only=True)
+    # Only read notifications are archived.
+    is_read = serializers.BooleanField(default=True, read_only=True)
+
+    class Meta:
+        model = ArchivedNotification
+        fields = [
+            'id', 'user', 'achievement', 'announcement', 'achievement_title', 'message', 'is_read',
+            'created_at', 'archived_at',
+        ]
+        read_only_fields = fields
+
+
+class AnnouncementSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Announcement
+        fields = [
+            'id', 'message', 'department', 'year', 'status', 'recipients', 'delivered', 'progress',
+            'created_by', 'created_at', 'completed_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'recipients', 'delivered', 'created_by', 'created_at', 'completed_at'
+        ]
+
+    def get_progress(self, obj):
+        if obj.status == 'delivered':
+            return 100
+        return min(99, obj.delivered * 100 // obj.recipients) if obj.recipients else 0
+
+
+class LeaderboardEntrySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    student_id = serializers.CharField(source='user.student_id', read_only=True)
+    first_name = serializers.CharField(source='user.first_name', read_only=True)
+    last_name = serializers.CharField(source='user.last_name', read_only=True)
+    rank = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = [
+            'rank', 'user', 'student_id', 'first_name', 'last_name', 'department', 'year',
+            'verified_count', 'points', 'cgpa', 'score',
+        ]
+        read_only_fields = fields
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    department = serializers.CharField(required=False, allow_blank=True, default='')
+    year = serializers.CharField(required=False, allow_blank=True, default='')
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=10)
+
+
+class BulkVerifyItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=['verified', 'rejected'])
+    verification_notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class BulkVerifyFilterSerializer(serializers.Serializer):
+    student_id = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=Achievement.STATUS_CHOICES, required=False)
+    category = serializers.ChoiceField(choices=Achievement.CATEGORY_CHOICES, required=False)
+
+
+class BulkVerifySerializer(serializers.Serializer):
+    items = BulkVerifyItemSerializer(many=True, required=False, allow_empty=False)
+    filter = BulkVerifyFilterSerializer(required=False)
+    status = serializers.ChoiceField(choices=['verified', 'rejected'], required=False)
+    verification_notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        if ('items' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Provide either "items" or "filter".')
+        if 'filter' in attrs and 'status' not in attrs:
+            raise serializers.ValidationError({'status': 'Required when selecting achievements with "filter".'})
+        return attrs
+
+
+class ProofUploadPartSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProofUploadPart
+        fields = ['number', 'size', 'sha256']
+
+
+class ProofUploadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    total_parts = serializers.IntegerField(read_only=True)
+    parts = ProofUploadPartSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ProofUpload
+        fields = [
+            'id', 'achievement', 'filename', 'content_type', 'size', 'part_size', 'total_parts',
+            'status', 'checksum', 'parts', 'created_at', 'completed_at'
+        ]
+        read_only_fields = ['id', 'part_size', 'status', 'checksum', 'created_at', 'completed_at']
+
+    def validate_achievement(self, achievement):
+        if achievement.student_id != self.context['request'].user.id:
+            raise serializers.ValidationError('You can only upload proof for your own achievements.')
+        return achievement
+
+    def validate_size(self, size):
+        max_size = settings.PROOF_UPLOADS['MAX_SIZE']
+        if not 0 < size <= max_size:
+            raise serializers.ValidationError(f'Size must be between 1 and {max_size} bytes.')
+        return size
+
+
+class ProofUploadCompleteSerializer(serializers.Serializer):
+    checksum = serializers.CharField(required=False, allow_blank=True)
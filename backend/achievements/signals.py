@@ -1,24 +1,163 @@
-from django.db.models.signals import post_save, pre_save
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
-from .models import Achievement, Notification
+from django.utils import timezone
+from backend.response_cache import invalidate_objects
+from profiles.portfolio import invalidate_portfolio
+from tasks.queue import enqueue
+from . import stats
+from .broker import get_broker
+from .models import Achievement, Notification, NotificationCounter
+from .stream import notification_payload
+
+CACHE_FILTER_FIELDS = ('student_id', 'status', 'category')
+
+User = get_user_model()
 
 
 @receiver(pre_save, sender=Achievement)
-def create_status_change_notification(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old_instance = Achievement.objects.get(pk=instance.pk)
-            if old_instance.status != instance.status and instance.status in ['verified', 'rejected']:
-                status_text = 'verified' if instance.status == 'verified' else 'rejected'
-                message = f'Your achievement "{instance.title}" has been {status_text}.'
-
-                if instance.verification_notes:
-                    message += f' Note: {instance.verification_notes}'
-
-                Notification.objects.create(
-                    user=instance.student,
-                    achievement=instance,
-                    message=message
-                )
-        except Achievement.DoesNotExist:
-            pass
+def load_previous_status(sender, instance, **kwargs):
+    # Instances loaded through the ORM already know their previous status.
+    # Only fall back to a query for ones built by hand with an existing pk.
+    if instance.pk and not instance.is_tracked('status'):
+        previous = Achievement.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        if previous is not None:
+            instance._loaded_values = {'status': previous}
+
+
+@receiver(post_save, sender=Achievement)
+def achievement_saved(sender, instance, created, update_fields=None, **kwargs):
+    states = [{name: getattr(instance, name) for name in CACHE_FILTER_FIELDS}]
+    if not created:
+        states.append({name: instance.get_previous_value(name) for name in CACHE_FILTER_FIELDS})
+    invalidate_achievement_cache(instance.pk, *states)
+
+    notifications = []
+    status_saved = update_fields is None or 'status' in update_fields
+    if not created and status_saved:
+        notifications = status_change_notifications(instance)
+
+    before = None if created else (instance.get_previous_value('status'), instance.get_previous_value('category'))
+    after = (instance.status, instance.category)
+    changes = []
+    if before != after:
+        changes.append(achievement_change(
+            instance.student_id, instance.created_at, stats.student_group(instance), before, after,
+        ))
+    if changes or notifications:
+        queue_bookkeeping(changes, notifications)
+
+    instance.reset_tracking()
+
+
+@receiver(pre_delete, sender=Achievement)
+def uncount_deleted_achievement(sender, instance, **kwargs):
+    # pre_delete, because a cascading user delete may remove the profile
+    # (and with it the department/year) before the achievement itself. The
+    # user's own leaderboard entry may be going too, so never create one.
+    group = stats.get_profile_groups([instance.student_id]).get(instance.student_id, ('', ''))
+    before = (instance.status, instance.category)
+    queue_bookkeeping(
+        [achievement_change(instance.student_id, instance.created_at, group, before, None)], create_entries=False,
+    )
+
+
+@receiver(post_delete, sender=Achievement)
+def achievement_deleted(sender, instance, **kwargs):
+    invalidate_achievement_cache(instance.pk, {name: getattr(instance, name) for name in CACHE_FILTER_FIELDS})
+
+
+def achievement_change(student_id, created_at, group, before, after):
+    """One change for ``record_achievement_changes``; see ``stats.record_changes``."""
+    return {
+        'student_id': student_id,
+        'created_at': created_at.isoformat(),
+        'group': list(group),
+        'before': before,
+        'after': after,
+    }
+
+
+def status_change_notifications(instance):
+    if instance.has_changed('status') and instance.status in ['verified', 'rejected']:
+        return [{
+            'user_id': instance.student_id,
+            'achievement_id': instance.pk,
+            'message': Notification.status_change_message(
+                instance.title, instance.status, instance.verification_notes
+            ),
+        }]
+    return []
+
+
+def queue_bookkeeping(changes, notifications=(), create_entries=True):
+    """
+    Queue the rollup, leaderboard and notification work for achievement
+    writes as one task, written in the same transaction as the writes.
+    """
+    from .tasks import record_achievement_changes
+
+    enqueue(record_achievement_changes, {
+        'changes': changes, 'notifications': list(notifications), 'create_entries': create_entries,
+    })
+
+
+def invalidate_achievement_cache(pk, *states):
+    invalidate_achievements_cache({pk: states})
+
+
+def invalidate_achievements_cache(changes):
+    """Bulk form of ``invalidate_achievement_cache``: ``changes`` maps each pk to its states."""
+    invalidate_objects('achievements', changes, CACHE_FILTER_FIELDS)
+    for student_id in {state['student_id'] for states in changes.values() for state in states}:
+        invalidate_portfolio(student_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Achievement responses embed the student's and the verifier's student ID.
+    if created or (update_fields is not None and 'student_id' not in update_fields):
+        return
+    achievements = Achievement.objects.filter(Q(student=instance) | Q(verified_by=instance))
+    rows = list(achievements.values_list('pk', *CACHE_FILTER_FIELDS))
+    if not rows:
+        return
+    Achievement.objects.filter(pk__in=[row[0] for row in rows]).update(updated_at=timezone.now())
+    invalidate_achievements_cache({row[0]: [dict(zip(CACHE_FILTER_FIELDS, row[1:]))] for row in rows})
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    if created:
+        notifications_created([instance])
+
+
+def notifications_created(notifications):
+    """
+    Bookkeeping for new notifications, however they were written (save() or
+    bulk_create): bump the unread counters and push them to connected clients.
+    """
+    NotificationCounter.record_created(notifications)
+    publish_notifications(notifications)
+
+
+def publish_notifications(notifications):
+    """Push new notifications to the users' open streams once they are committed."""
+    payloads = [(notification.user_id, notification_payload(notification)) for notification in notifications]
+
+    def publish():
+        broker = get_broker()
+        for user_id, payload in payloads:
+            broker.publish(user_id, payload)
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    # Never create a counter here: this also runs while the user is being
+    # deleted, and a missing counter is rebuilt on its next read anyway.
+    if not instance.is_read:
+        NotificationCounter.adjust(instance.user_id, -1, create=False)
@@ -0,0 +1,143 @@
+"""
+Incremental maintenance and reads of the AchievementStat rollup.
+
+Writers describe what changed as deltas keyed by group, e.g. moving an
+achievement from pending to verified is -1 on its pending group and +1 on
+its verified group. Reads sum the (few) rollup rows.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from profiles.models import StudentProfile
+from .models import Achievement, AchievementStat
+
+GROUP_FIELDS = ('status', 'category', 'department', 'year', 'month')
+
+
+def month_of(created_at):
+    return timezone.localtime(created_at).date().replace(day=1)
+
+
+def group_key(status, category, department, year, created_at):
+    return (status, category, department or '', year or '', month_of(created_at))
+
+
+def get_profile_groups(user_ids):
+    """Map user id to (department, year) for the given students."""
+    rows = StudentProfile.objects.filter(user_id__in=set(user_ids)).values_list('user_id', 'department', 'year')
+    return {user_id: (department, year) for user_id, department, year in rows}
+
+
+def apply_deltas(deltas):
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        lookup = dict(zip(GROUP_FIELDS, key))
+        if AchievementStat.objects.filter(**lookup).update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                AchievementStat.objects.create(count=delta, **lookup)
+        except IntegrityError:
+            # Another transaction created the group first.
+            AchievementStat.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def student_group(achievement):
+    """
+    (department, year) of the achievement's student, read from its profile
+    without a query when the achievement was loaded with
+    ``select_related('student__profile')``.
+    """
+    student_field = Achievement._meta.get_field('student')
+    profile_field = StudentProfile._meta.get_field('user').remote_field
+    if student_field.is_cached(achievement) and profile_field.is_cached(achievement.student):
+        profile = profile_field.get_cached_value(achievement.student)
+        return (profile.department, profile.year) if profile is not None else ('', '')
+    return get_profile_groups([achievement.student_id]).get(achievement.student_id, ('', ''))
+
+
+def record_changes(changes):
+    """
+    Apply writes to achievements. Each change has ``created_at``, ``group``
+    (the student's (department, year) when the write happened), ``before``
+    and ``after``: the achievement's (status, category), or None when it did
+    not exist on that side of the change.
+    """
+    deltas = Counter()
+    for change in changes:
+        department, year = change['group']
+        if change['before'] is not None:
+            deltas[group_key(*change['before'], department, year, change['created_at'])] -= 1
+        if change['after'] is not None:
+            deltas[group_key(*change['after'], department, year, change['created_at'])] += 1
+    apply_deltas(deltas)
+
+
+def move_student(student_id, old_group, new_group):
+    """A student's department or year changed: move all their achievements."""
+    if old_group == new_group:
+        return
+    deltas = Counter()
+    rows = (
+        Achievement.objects.filter(student_id=student_id)
+        .annotate(month=TruncMonth('created_at', output_field=DateField()))
+        .values('status', 'category', 'month')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        deltas[(row['status'], row['category'], old_group[0] or '', old_group[1] or '', row['month'])] -= row['total']
+        deltas[(row['status'], row['category'], new_group[0] or '', new_group[1] or '', row['month'])] += row['total']
+    apply_deltas(deltas)
+
+
+def rebuild():
+    rows = (
+        Achievement.objects
+        .annotate(
+            department=Coalesce('student__profile__department', Value('')),
+            year=Coalesce('student__profile__year', Value('')),
+            month=TruncMonth('created_at', output_field=DateField()),
+        )
+        .values('status', 'category', 'department', 'year', 'month')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        AchievementStat.objects.all().delete()
+        AchievementStat.objects.bulk_create([
+            AchievementStat(
+                status=row['status'], category=row['category'], department=row['department'],
+                year=row['year'], month=row['month'], count=row['total'],
+            )
+            for row in rows
+        ])
+    return AchievementStat.objects.count()
+
+
+def summarize(filters=None):
+    rows = AchievementStat.objects.filter(count__gt=0, **(filters or {})).values_list(*GROUP_FIELDS, 'count')
+    summary = {
+        'total': 0,
+        'by_status': Counter(),
+        'by_category': Counter(),
+        'by_department': Counter(),
+        'by_year': Counter(),
+        'by_month': Counter(),
+    }
+    for status, category, department, year, month, count in rows:
+        summary['total'] += count
+        summary['by_status'][status] += count
+        summary['by_category'][category] += count
+        summary['by_department'][department] += count
+        summary['by_year'][year] += count
+        summary['by_month'][month.strftime('%Y-%m')] += count
+    for key in ['by_status', 'by_category', 'by_department', 'by_year']:
+        summary[key] = dict(summary[key])
+    summary['by_month'] = dict(sorted(summary['by_month'].items()))
+    return summary
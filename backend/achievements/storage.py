@@ -0,0 +1,70 @@
+"""
+Storage for achievement proof documents.
+
+``PROOF_UPLOADS['BACKEND']`` selects where proofs live: ``local`` keeps them
+under ``MEDIA_ROOT`` through the default storage, ``s3`` keeps them in an
+S3-compatible bucket (AWS, MinIO, moto). ``get_proof_storage`` is the
+``storage`` callable of ``Achievement.proof_document``, so the field resolves
+names and URLs against whichever backend the chunked uploads write to.
+"""
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import Storage, default_storage
+from django.utils.deconstruct import deconstructible
+
+
+def get_s3_client():
+    import boto3
+
+    config = settings.PROOF_UPLOADS
+    return boto3.client('s3', endpoint_url=config['S3_ENDPOINT_URL'], region_name=config['S3_REGION'])
+
+
+@deconstructible
+class S3ProofStorage(Storage):
+    url_expiry = 3600
+
+    def __init__(self, bucket=None):
+        self.bucket = bucket or settings.PROOF_UPLOADS['S3_BUCKET']
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_s3_client()
+        return self._client
+
+    def _open(self, name, mode='rb'):
+        body = self.client.get_object(Bucket=self.bucket, Key=name)['Body']
+        return File(body, name=name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        self.client.upload_fileobj(content, self.bucket, name)
+        return name
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+    def exists(self, name):
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+        except ClientError:
+            return False
+        return True
+
+    def size(self, name):
+        return self.client.head_object(Bucket=self.bucket, Key=name)['ContentLength']
+
+    def url(self, name):
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': name}, ExpiresIn=self.url_expiry,
+        )
+
+
+def get_proof_storage():
+    if settings.PROOF_UPLOADS['BACKEND'] == 's3':
+        return S3ProofStorage()
+    return default_storage
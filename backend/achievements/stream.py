@@ -0,0 +1,133 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import is_token_revoked
+
+from .broker import get_broker
+from .models import Notification
+
+
+def notification_payload(notification):
+    return {
+        'id': notification.id,
+        'user': notification.user_id,
+        'achievement': notification.achievement_id,
+        'announcement': notification.announcement_id,
+        'message': notification.text,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+TICKET_SALT = 'achievements.stream.ticket'
+
+
+def issue_ticket(token):
+    """
+    A short-lived ticket that opens a stream for the access token's user.
+
+    EventSource cannot set headers, so browsers pass a ticket in the query
+    string instead of the access token, which would end up in access logs.
+    The ticket carries the token's user, issue and expiry times, so a stream
+    opened with it ends, and is revoked, exactly like one opened with the token.
+    """
+    claims = {
+        jwt_settings.USER_ID_CLAIM: token[jwt_settings.USER_ID_CLAIM],
+        'iat': token.get('iat', 0),
+        'exp': token['exp'],
+    }
+    return signing.dumps(claims, salt=TICKET_SALT, compress=True)
+
+
+def authenticate(request):
+    """The claims a stream is opened with, from the Authorization header or a ticket."""
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) == 2 and parts[0] in jwt_settings.AUTH_HEADER_TYPES:
+        try:
+            return AccessToken(parts[1]).payload
+        except TokenError:
+            return None
+    ticket = request.GET.get('ticket')
+    if ticket:
+        try:
+            return signing.loads(
+                ticket, salt=TICKET_SALT, max_age=settings.NOTIFICATION_STREAM['TICKET_MAX_AGE'],
+            )
+        except signing.BadSignature:
+            return None
+    return None
+
+
+def format_event(payload):
+    return f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+
+
+@require_GET
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of the authenticated user's new notifications.
+
+    The access token (or ticket, see ``issue_ticket``) is validated from its
+    signature and claims alone, so an idle connection holds no thread and no
+    database connection. The stream ends when the token expires; the client
+    reconnects with a fresh one and sends Last-Event-ID to receive anything it
+    missed.
+    """
+    claims = authenticate(request)
+    if claims is None:
+        return JsonResponse({'detail': 'A valid access token or stream ticket is required.'}, status=401)
+    if await sync_to_async(is_token_revoked)(claims):
+        return JsonResponse({'detail': 'Token has been revoked'}, status=401)
+
+    user_id = int(claims[jwt_settings.USER_ID_CLAIM])
+    expires_at = claims['exp']
+    last_event_id = request.headers.get('Last-Event-ID')
+
+    async def events():
+        broker = get_broker()
+        # Subscribe before the replay query so nothing created meanwhile is
+        # lost; what the replay already sent is skipped when it arrives.
+        entry = broker.subscribe(user_id)
+        queue = entry[1]
+        heartbeat = settings.NOTIFICATION_STREAM['HEARTBEAT_SECONDS']
+        replayed = set()
+        try:
+            yield 'retry: 3000\n\n'
+            if last_event_id and last_event_id.isdigit():
+                missed = (
+                    Notification.objects.select_related('announcement')
+                    .filter(user_id=user_id, id__gt=int(last_event_id)).order_by('id')
+                )
+                async for notification in missed:
+                    replayed.add(notification.id)
+                    yield format_event(notification_payload(notification))
+
+            while True:
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    return
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=min(heartbeat, remaining))
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                if payload['id'] in replayed:
+                    continue
+                yield format_event(payload)
+        finally:
+            broker.unsubscribe(user_id, entry)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
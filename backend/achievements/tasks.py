@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from profiles.models import StudentProfile
+from tasks.queue import task
+
+from . import leaderboard, stats
+from .models import Achievement, Announcement, Notification, NotificationCounter
+
+
+@task()
+def create_notifications(notifications):
+    """``notifications`` are dicts with user_id, achievement_id and message."""
+    from .signals import notifications_created
+
+    live = set(
+        Achievement.objects.filter(pk__in={item['achievement_id'] for item in notifications})
+        .values_list('pk', flat=True)
+    )
+    # Achievements deleted since the task was queued take their notifications with them.
+    created = Notification.objects.bulk_create([
+        Notification(**item) for item in notifications if item['achievement_id'] in live
+    ])
+    notifications_created(created)
+
+
+@task()
+def record_achievement_changes(changes, notifications=(), create_entries=True):
+    """
+    Bookkeeping for achievement writes, queued in the transaction that made
+    them: ``changes`` (see ``stats.record_changes``, with ``created_at`` in
+    ISO 8601) update the statistics rollup and the leaderboard, and
+    ``notifications`` are created as by ``create_notifications``.
+    """
+    changes = [{**change, 'created_at': parse_datetime(change['created_at'])} for change in changes]
+    stats.record_changes(changes)
+    leaderboard.record_changes(changes, create=create_entries)
+    if notifications:
+        create_notifications(notifications)
+
+
+def announcement_recipients(announcement):
+    """User ids of the students an announcement is for, in delivery order."""
+    profiles = StudentProfile.objects.all()
+    if announcement.department:
+        profiles = profiles.filter(department=announcement.department)
+    if announcement.year:
+        profiles = profiles.filter(year=announcement.year)
+    return profiles.order_by('user_id').values_list('user_id', flat=True)
+
+
+@task(timeout=1800, atomic=False)
+def deliver_announcement(announcement_id):
+    """
+    Write one notification per recipient, ``ANNOUNCEMENT_CHUNK_SIZE`` at a
+    time. Each chunk commits together with the announcement's cursor, so a
+    retried task continues after the last delivered chunk.
+    """
+    from .signals import publish_notifications
+
+    chunk_size = settings.ANNOUNCEMENT_CHUNK_SIZE
+    while True:
+        with transaction.atomic():
+            announcement = Announcement.objects.select_for_update().filter(pk=announcement_id).first()
+            if announcement is None or announcement.status == 'delivered':
+                return
+            remaining = announcement_recipients(announcement).filter(user_id__gt=announcement.last_user_id)
+            user_ids = list(remaining[:chunk_size])
+            if not user_ids:
+                Announcement.objects.filter(pk=announcement_id).update(
+                    status='delivered', recipients=announcement.delivered, completed_at=timezone.now(),
+                )
+                return
+
+            created = Notification.objects.bulk_create([
+                Notification(user_id=user_id, announcement=announcement) for user_id in user_ids
+            ])
+            # Every recipient gets exactly one notification. Missing counters
+            # are rebuilt from the notifications on their next read.
+            NotificationCounter.objects.filter(user_id__in=user_ids).update(
+                unread=F('unread') + 1, version=F('version') + 1
+            )
+            Announcement.objects.filter(pk=announcement_id).update(
+                status='delivering', delivered=F('delivered') + len(user_ids), last_user_id=user_ids[-1],
+            )
+            publish_notifications(created)
+
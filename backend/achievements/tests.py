@@ -0,0 +1,811 @@
+import csv
+import datetime
+import io
+import json
+from base64 import b64encode
+from contextlib import ExitStack, contextmanager
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.db_routing import ReplicaRouter
+from backend.metrics import MetricsMiddleware, Registry, RequestRecorder, TimedListSerializer, current_request
+from backend.search import achievement_index, restore_search_triggers
+from profiles.models import StudentProfile
+from . import leaderboard, rank_index, stats as achievement_stats
+from .broker import get_broker
+from .checks import check_notification_broker, check_response_cache, check_stream_broker
+from .management.commands.check_query_plans import Command as CheckQueryPlans
+from tasks.models import Task
+from tasks.queue import get_task_function
+from users.models import User
+from .models import Achievement, AchievementStat, Announcement, LeaderboardEntry, Notification
+from .pagination import KeysetPagination
+from .serializers import AchievementSerializer
+from .tasks import create_notifications, deliver_announcement
+from .stream import authenticate, notification_payload
+
+
+def make_user(student_id, role='student'):
+    return User.objects.create_user(
+        student_id=student_id, username=student_id, email=f'{student_id}@example.com', password='pw', role=role,
+    )
+
+
+# TestCase rows are never committed, so API reads must not go to a replica.
+PRIMARY_ONLY = {**settings.DATABASE_REPLICAS, 'ALIASES': []}
+
+
+@override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False}, DATABASE_REPLICAS=PRIMARY_ONLY)
+class SearchIndexTests(TestCase):
+    """The test database is built by a full ``migrate``, like a fresh deployment."""
+
+    def setUp(self):
+        cache.clear()
+        self.student = make_user('S001')
+        self.client = APIClient()
+
+    def search(self, query):
+        response = self.client.get('/api/achievements/list/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_new_and_edited_rows_are_found_after_migrate(self):
+        achievement = Achievement.objects.create(
+            student=self.student, title='Python workshop', description='Taught beginners', category='technical',
+        )
+        self.assertEqual(self.search('python'), [achievement.pk])
+
+        achievement.title = 'Rust workshop'
+        achievement.save()
+        self.assertEqual(self.search('python'), [])
+        self.assertEqual(self.search('rust'), [achievement.pk])
+
+    def test_missing_triggers_are_restored(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Table rebuilds only drop triggers on SQLite.')
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {achievement_index.fts_table}_insert')
+        achievement = Achievement.objects.create(
+            student=self.student, title='Chess final', description='Won', category='sports',
+        )
+        self.assertEqual(self.search('chess'), [])
+
+        self.assertEqual(restore_search_triggers(), [f'{achievement_index.fts_table}_insert'])
+        self.assertEqual(self.search('chess'), [achievement.pk])
+        self.assertEqual(restore_search_triggers(), [])
+
+
+@override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False}, DATABASE_REPLICAS=PRIMARY_ONLY)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        student = make_user('S001')
+        for number in range(7):
+            Achievement.objects.create(student=student, title=f'Quiz {number}', description='', category='academic')
+        # Most rows share one timestamp, so pages must be split by id within it.
+        tied = timezone.now()
+        Achievement.objects.exclude(title='Quiz 6').update(created_at=tied)
+        Achievement.objects.filter(title='Quiz 6').update(created_at=tied - datetime.timedelta(days=1))
+        self.expected = list(Achievement.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.client = APIClient()
+
+    def walk(self, url, direction):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data[direction]
+        return pages
+
+    def assert_walks_both_ways(self, params):
+        forward = self.walk(f'/api/achievements/list/?pagination=cursor&page_size=2&{params}', 'next')
+        self.assertEqual([pk for page in forward for pk in page], self.expected)
+        self.assertEqual([len(page) for page in forward], [2, 2, 2, 1])
+
+        last = self.client.get(f'/api/achievements/list/?pagination=cursor&page_size=2&{params}')
+        while last.data['next']:
+            last = self.client.get(last.data['next'])
+        backward = self.walk(last.data['previous'], 'previous')
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_pages_split_ties_on_created_at_in_both_directions(self):
+        self.assert_walks_both_ways('')
+
+    @override_settings(FAST_LIST_SERIALIZATION=True)
+    def test_cursors_are_built_from_value_rows(self):
+        encode_cursor = KeysetPagination.encode_cursor
+        with mock.patch.object(KeysetPagination, 'encode_cursor', autospec=True, side_effect=encode_cursor) as encode:
+            self.assert_walks_both_ways('fields=id,title')
+        self.assertTrue(encode.called)
+        self.assertTrue(all(isinstance(call.args[1], dict) for call in encode.call_args_list))
+        response = self.client.get('/api/achievements/list/?pagination=cursor&fields=id,title')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+
+    def test_tampered_cursors_are_not_found(self):
+        valid = self.client.get('/api/achievements/list/?pagination=cursor&page_size=2').data['next']
+        cursor = parse_qs(urlsplit(valid).query)['cursor'][0]
+        tampered = [
+            'not base64!',
+            b64encode(b't=yesterday&i=1').decode(),
+            b64encode(b't=2024-01-01T00:00:00&i=one').decode(),
+            b64encode(b'i=1').decode(),
+            cursor[:-4],
+        ]
+        for value in tampered:
+            response = self.client.get('/api/achievements/list/', {'cursor': value})
+            self.assertEqual(response.status_code, 404, value)
+            self.assertEqual(response.data['detail'], 'Invalid cursor')
+
+
+@override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False}, DATABASE_REPLICAS=PRIMARY_ONLY)
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        student = make_user('S001')
+        coordinator = make_user('C001', role='coordinator')
+        Achievement.objects.create(student=student, title='Hackathon', description='First place', category='technical')
+        Achievement.objects.create(
+            student=student, title='Olympiad', description='Silver', category='academic', status='verified',
+            verified_by=coordinator, achievement_date=datetime.date(2024, 3, 1),
+        )
+        self.client = APIClient()
+
+    def get(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/achievements/list/', params)
+        self.assertEqual(response.status_code, 200)
+        [select] = [query['sql'] for query in queries.captured_queries if 'LIMIT' in query['sql']]
+        return response.data['results'], select
+
+    def test_value_rows_render_like_the_serializer(self):
+        for params in ({}, {'fields': 'id,student_name,verified_by_name,created_at'}, {'exclude': 'description'}):
+            with override_settings(FAST_LIST_SERIALIZATION=True):
+                fast, _ = self.get(params)
+            with override_settings(FAST_LIST_SERIALIZATION=False):
+                regular, _ = self.get(params)
+            self.assertEqual(fast, regular, params)
+
+    def test_fields_narrow_the_query(self):
+        results, select = self.get({'fields': 'id,title'})
+        self.assertEqual(set(results[0]), {'id', 'title'})
+        self.assertNotIn('"description"', select)
+        self.assertNotIn('JOIN', select)
+
+        results, select = self.get({'fields': 'id,student_name'})
+        self.assertEqual(results[0]['student_name'], 'S001')
+        self.assertIn('JOIN "users_user"', select)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/achievements/list/', {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', str(response.data['fields']))
+
+
+@override_settings(DATABASE_REPLICAS=PRIMARY_ONLY)
+class CachedConditionalListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = make_user('S001')
+        self.achievement = Achievement.objects.create(
+            student=self.student, title='Hackathon', description='First place', category='technical',
+        )
+        self.client = APIClient()
+
+    def test_cache_hit_replays_validators_without_queries(self):
+        first = self.client.get('/api/achievements/list/', {'status': 'pending'})
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        with self.assertNumQueries(0):
+            hit = self.client.get('/api/achievements/list/', {'status': 'pending'})
+        self.assertEqual(hit.status_code, 200)
+        self.assertEqual(hit['ETag'], etag)
+        self.assertEqual(hit.data, first.data)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get('/api/achievements/list/', {'status': 'pending'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], etag)
+
+    def test_write_changes_the_cached_etag(self):
+        etag = self.client.get('/api/achievements/list/', {'status': 'pending'})['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.achievement.title = 'Hackathon finals'
+            self.achievement.save()
+        response = self.client.get('/api/achievements/list/', {'status': 'pending'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_student_id_change_changes_the_cached_etag(self):
+        coordinator = make_user('C001', role='coordinator')
+        Achievement.objects.filter(pk=self.achievement.pk).update(verified_by=coordinator)
+        etag = self.client.get('/api/achievements/list/', {'status': 'pending'})['ETag']
+        for user, field in ((self.student, 'student_name'), (coordinator, 'verified_by_name')):
+            with self.captureOnCommitCallbacks(execute=True):
+                user.student_id = f'{user.student_id}X'
+                user.save()
+            response = self.client.get('/api/achievements/list/', {'status': 'pending'}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['results'][0][field], user.student_id)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+
+    def test_write_invalidates_lists_filtered_by_an_unnormalized_value(self):
+        params = {'student_id': f'0{self.student.pk}'}
+        self.assertEqual(len(self.client.get('/api/achievements/list/', params).data['results']), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Achievement.objects.create(
+                student=self.student, title='Olympiad', description='Silver', category='technical',
+            )
+        self.assertEqual(len(self.client.get('/api/achievements/list/', params).data['results']), 2)
+
+
+@override_settings(DATABASE_REPLICAS=PRIMARY_ONLY)
+class ExportTests(TestCase):
+    def setUp(self):
+        self.student = make_user('S001')
+        self.achievement = Achievement.objects.create(
+            student=self.student, title='Hackathon', description='First place', category='technical',
+            achievement_date=datetime.date(2024, 3, 1),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('C001', role='coordinator'))
+
+    def export(self, export_format):
+        response = self.client.get('/api/achievements/list/export/', {'export_format': export_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_both_formats_write_iso_8601(self):
+        header, row = csv.reader(io.StringIO(self.export('csv')))
+        csv_record = dict(zip(header, row))
+        [ndjson_record] = [json.loads(line) for line in self.export('ndjson').splitlines()]
+
+        self.achievement.refresh_from_db()
+        for record in (csv_record, ndjson_record):
+            self.assertEqual(record['created_at'], self.achievement.created_at.isoformat())
+            self.assertEqual(record['updated_at'], self.achievement.updated_at.isoformat())
+            self.assertEqual(record['achievement_date'], '2024-03-01')
+            self.assertEqual(record['student_id'], 'S001')
+        self.assertEqual(list(csv_record), list(ndjson_record))
+
+
+@override_settings(DATABASE_REPLICAS=PRIMARY_ONLY)
+class UnreadCountTests(TestCase):
+    def setUp(self):
+        self.student = make_user('S001')
+        self.achievement = Achievement.objects.create(
+            student=self.student, title='Hackathon', description='First place', category='technical',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def assert_unread(self, expected):
+        response = self.client.get('/api/achievements/notifications/unread_count/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unread_count'], expected)
+        self.assertEqual(Notification.objects.filter(user=self.student, is_read=False).count(), expected)
+
+    def test_counter_follows_creates_reads_and_deletes(self):
+        first, second, third = [
+            Notification.objects.create(user=self.student, achievement=self.achievement, message=f'Update {number}')
+            for number in range(3)
+        ]
+        self.assert_unread(3)
+        create_notifications([
+            {'user_id': self.student.pk, 'achievement_id': self.achievement.pk, 'message': f'Bulk {number}'}
+            for number in range(2)
+        ])
+        self.assert_unread(5)
+
+        for _ in range(2):
+            response = self.client.post(f'/api/achievements/notifications/{first.pk}/mark_read/')
+            self.assertEqual(response.status_code, 200)
+            self.assert_unread(4)
+        second.delete()
+        self.assert_unread(3)
+        self.assertEqual(self.client.post('/api/achievements/notifications/mark_all_read/').status_code, 200)
+        self.assert_unread(0)
+        third.delete()
+        self.assert_unread(0)
+
+    def test_etag_answers_304_until_the_count_changes(self):
+        response = self.client.get('/api/achievements/notifications/unread_count/')
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/achievements/notifications/unread_count/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        Notification.objects.create(user=self.student, achievement=self.achievement, message='Verified')
+        response = self.client.get('/api/achievements/notifications/unread_count/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unread_count'], 1)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+@override_settings(DATABASE_REPLICAS=PRIMARY_ONLY)
+class AchievementStatTests(TestCase):
+    def setUp(self):
+        self.student = make_user('S001')
+        self.profile = self.student.profile
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.department, self.profile.year = 'CSE', '3'
+            self.profile.save()
+
+    def rollup(self):
+        rows = AchievementStat.objects.filter(count__gt=0).values_list(*achievement_stats.GROUP_FIELDS, 'count')
+        return sorted(rows)
+
+    def assert_matches_rebuild(self):
+        incremental = self.rollup()
+        with transaction.atomic():
+            achievement_stats.rebuild()
+            rebuilt = self.rollup()
+            transaction.set_rollback(True)
+        self.assertEqual(incremental, rebuilt)
+        return incremental
+
+    def test_incremental_rollup_matches_a_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first, second = [
+                Achievement.objects.create(student=self.student, title=title, description='', category='technical')
+                for title in ('Hackathon', 'Olympiad')
+            ]
+        self.assertEqual(self.assert_matches_rebuild()[0][:4], ('pending', 'technical', 'CSE', '3'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.status = 'verified'
+            first.save()
+        self.assert_matches_rebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assert_matches_rebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.department = 'ECE'
+            self.profile.save()
+        self.assertEqual([row[:3] for row in self.assert_matches_rebuild()], [('verified', 'technical', 'ECE')])
+
+
+@override_settings(DATABASE_REPLICAS=PRIMARY_ONLY, ANNOUNCEMENT_CHUNK_SIZE=2)
+class AnnouncementDeliveryTests(TestCase):
+    def setUp(self):
+        self.recipients = [make_user(f'P00{number}') for number in range(5)]
+        StudentProfile.objects.filter(user__in=self.recipients).update(department='Physics')
+        StudentProfile.objects.filter(user=make_user('S001')).update(department='Chemistry')
+        self.announcement = Announcement.objects.create(message='Lab closed on Friday', department='Physics')
+
+    def deliver(self):
+        sizes = []
+        bulk_create = Notification.objects.bulk_create
+
+        def record(objs, *args, **kwargs):
+            sizes.append(len(objs))
+            return bulk_create(objs, *args, **kwargs)
+        with mock.patch.object(Notification.objects, 'bulk_create', side_effect=record):
+            deliver_announcement(announcement_id=self.announcement.pk)
+        return sizes
+
+    def assert_delivered_once(self):
+        received = Notification.objects.filter(announcement=self.announcement)
+        self.assertEqual(sorted(received.values_list('user_id', flat=True)), [user.pk for user in self.recipients])
+        self.announcement.refresh_from_db()
+        self.assertEqual(
+            (self.announcement.status, self.announcement.delivered, self.announcement.recipients),
+            ('delivered', 5, 5),
+        )
+
+    def test_delivering_twice_notifies_each_recipient_once(self):
+        self.assertEqual(self.deliver(), [2, 2, 1])
+        self.assertEqual(self.deliver(), [])
+        self.assert_delivered_once()
+
+    def test_a_retry_continues_after_the_last_committed_chunk(self):
+        with mock.patch('achievements.signals.publish_notifications', side_effect=[None, RuntimeError]):
+            with self.assertRaises(RuntimeError):
+                self.deliver()
+        self.announcement.refresh_from_db()
+        self.assertEqual((self.announcement.delivered, self.announcement.last_user_id), (2, self.recipients[1].pk))
+        self.assertEqual(Notification.objects.filter(announcement=self.announcement).count(), 2)
+
+        self.assertEqual(self.deliver(), [2, 1])
+        self.assert_delivered_once()
+
+
+class NotificationBrokerCheckTests(TestCase):
+    def test_database_tasks_need_the_redis_broker(self):
+        stream = settings.NOTIFICATION_STREAM
+        with override_settings(TASKS={**settings.TASKS, 'BACKEND': 'database'}):
+            with override_settings(NOTIFICATION_STREAM={**stream, 'BROKER': 'memory'}):
+                self.assertEqual([error.id for error in check_notification_broker(None)], ['achievements.E001'])
+            with override_settings(NOTIFICATION_STREAM={**stream, 'BROKER': 'redis'}):
+                self.assertEqual(check_notification_broker(None), [])
+        with override_settings(TASKS={**settings.TASKS, 'BACKEND': 'immediate'}):
+            self.assertEqual(check_notification_broker(None), [])
+
+
+    def test_several_workers_need_the_redis_broker(self):
+        stream = settings.NOTIFICATION_STREAM
+        with override_settings(WEB_CONCURRENCY=2, NOTIFICATION_STREAM={**stream, 'BROKER': 'memory'}):
+            self.assertEqual([error.id for error in check_stream_broker(None)], ['achievements.E002'])
+        with override_settings(WEB_CONCURRENCY=2, NOTIFICATION_STREAM={**stream, 'BROKER': 'redis'}):
+            self.assertEqual(check_stream_broker(None), [])
+        with override_settings(WEB_CONCURRENCY=1, NOTIFICATION_STREAM={**stream, 'BROKER': 'memory'}):
+            self.assertEqual(check_stream_broker(None), [])
+
+
+class ResponseCacheCheckTests(TestCase):
+    def test_the_response_cache_must_be_shared(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        enabled = {**settings.RESPONSE_CACHE, 'ENABLED': True}
+        with override_settings(CACHES=locmem, RESPONSE_CACHE=enabled):
+            self.assertEqual([error.id for error in check_response_cache(None)], ['achievements.E003'])
+        with override_settings(CACHES=locmem, RESPONSE_CACHE={**enabled, 'ENABLED': False}):
+            self.assertEqual(check_response_cache(None), [])
+        with override_settings(CACHES=redis, RESPONSE_CACHE=enabled):
+            self.assertEqual(check_response_cache(None), [])
+
+
+@override_settings(DATABASE_REPLICAS=PRIMARY_ONLY, NOTIFICATION_STREAM={**settings.NOTIFICATION_STREAM, 'BROKER': 'memory'})
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.user = make_user('S001')
+        self.token = AccessToken.for_user(self.user)
+        self.factory = RequestFactory()
+
+    def ticket(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = client.post('/api/achievements/notifications/stream_ticket/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['ticket']
+
+    def test_a_ticket_opens_the_stream_for_its_user(self):
+        ticket = self.ticket()
+        self.assertNotIn(str(self.token), ticket)
+        claims = authenticate(self.factory.get('/api/achievements/notifications/stream/', {'ticket': ticket}))
+        self.assertEqual(int(claims['user_id']), self.user.id)
+        self.assertEqual(claims['exp'], self.token['exp'])
+
+    def test_expired_tickets_and_tokens_in_the_query_are_refused(self):
+        ticket = self.ticket()
+        with override_settings(NOTIFICATION_STREAM={**settings.NOTIFICATION_STREAM, 'TICKET_MAX_AGE': -1}):
+            self.assertIsNone(authenticate(self.factory.get('/stream/', {'ticket': ticket})))
+        self.assertIsNone(authenticate(self.factory.get('/stream/', {'ticket': ticket[:-2]})))
+        self.assertIsNone(authenticate(self.factory.get('/stream/', {'token': str(self.token)})))
+        response = self.client.get('/api/achievements/notifications/stream/', {'token': str(self.token)})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_notifications_published_during_the_replay_are_sent_once(self):
+        first = await Notification.objects.acreate(user=self.user, message='first')
+        response = await self.async_client.get(
+            '/api/achievements/notifications/stream/',
+            headers={'Authorization': f'Bearer {self.token}', 'Last-Event-ID': '0'},
+        )
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b'retry: 3000\n\n')
+        # Subscribed before the replay, so a notification committed meanwhile
+        # is both replayed and queued.
+        broker = get_broker()
+        broker.publish(self.user.id, notification_payload(first))
+        sent = [await anext(events)]
+        second = await Notification.objects.acreate(user=self.user, message='second')
+        broker.publish(self.user.id, notification_payload(second))
+        sent.append(await anext(events))
+        await events.aclose()
+        self.assertEqual([chunk.split(b'\n')[0] for chunk in sent], [f'id: {first.id}'.encode(), f'id: {second.id}'.encode()])
+
+
+@override_settings(DATABASE_REPLICAS=PRIMARY_ONLY, TASKS={**settings.TASKS, 'BACKEND': 'database'})
+class VerifyQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        student = make_user('S001')
+        self.achievement = Achievement.objects.create(
+            student=student, title='Science fair', description='Second place', category='academic',
+        )
+        Task.objects.all().delete()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('C001', role='coordinator'))
+
+    def test_verify_is_one_update_and_one_insert(self):
+        # get_object, then the achievement UPDATE and the INSERT of the task
+        # that writes the notification, stats and leaderboard, in one
+        # transaction (a savepoint inside the test's own).
+        with CaptureQueriesContext(connection) as queries, self.assertNumQueries(5):
+            response = self.client.post(
+                f'/api/achievements/list/{self.achievement.pk}/verify/', {'status': 'verified'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'verified')
+        self.assertEqual(response.data['verified_by_name'], 'C001')
+        statements = [query['sql'].split()[0].upper() for query in queries.captured_queries]
+        self.assertEqual(statements, ['SELECT', 'SAVEPOINT', 'UPDATE', 'INSERT', 'RELEASE'])
+
+        [queued] = Task.objects.all()
+        get_task_function(queued.name)(**queued.kwargs)
+        self.assertEqual(Notification.objects.filter(achievement=self.achievement).count(), 1)
+
+
+@override_settings(DATABASE_REPLICAS=PRIMARY_ONLY)
+class BulkVerifyTests(TestCase):
+    def setUp(self):
+        self.student = make_user('S001')
+        self.coordinator = make_user('C001', role='coordinator')
+        self.pending = Achievement.objects.create(
+            student=self.student, title='Science fair', description='Second place', category='academic',
+        )
+        self.verified = Achievement.objects.create(
+            student=self.student, title='Debate', description='Finalist', category='cultural',
+            status='verified', verified_by=self.coordinator,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.coordinator)
+
+    def test_only_changed_rows_are_written_and_invalidated(self):
+        verified_at = self.verified.updated_at
+        items = [{'id': self.pending.pk, 'status': 'verified'}, {'id': self.verified.pk, 'status': 'verified'}]
+        with mock.patch('achievements.signals.invalidate_objects') as invalidate, \
+                mock.patch('achievements.signals.invalidate_portfolio') as invalidate_portfolio:
+            response = self.client.post('/api/achievements/list/bulk_verify/', {'items': items}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        [changes] = [call.args[1] for call in invalidate.call_args_list]
+        self.assertEqual(set(changes), {self.pending.pk})
+        invalidate_portfolio.assert_called_once_with(self.student.pk)
+        self.verified.refresh_from_db()
+        self.assertEqual(self.verified.updated_at, verified_at)
+
+    def test_rollup_and_leaderboard_are_updated_by_the_queued_task(self):
+        StudentProfile.objects.filter(user=self.student).update(department='CSE', year='3')
+        achievement_stats.rebuild()
+        leaderboard.rebuild()
+        before = achievement_stats.summarize()
+        items = [{'id': self.pending.pk, 'status': 'verified'}]
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post('/api/achievements/list/bulk_verify/', {'items': items}, format='json')
+        self.assertEqual(achievement_stats.summarize(), before)
+
+        for callback in callbacks:
+            callback()
+        incremental = achievement_stats.summarize()
+        self.assertEqual(incremental['by_status'], {'verified': 2})
+        achievement_stats.rebuild()
+        self.assertEqual(incremental, achievement_stats.summarize())
+        self.assertEqual(LeaderboardEntry.objects.get(user=self.student).verified_count, 2)
+
+
+class QueryPlanTests(TestCase):
+    """The check_query_plans queries must be served by an index on the test database too."""
+
+    def test_filtered_lists_use_indexes(self):
+        command = CheckQueryPlans()
+        for label, queryset in command.get_querysets():
+            with self.subTest(label):
+                plan = command.explain(queryset)
+                self.assertEqual(command.find_problems(plan), [], plan)
+
+    def test_single_filters_use_their_composite_index(self):
+        command = CheckQueryPlans()
+        cases = [
+            ({'status': 'verified'}, 'ach_status_created_idx'),
+            ({'student_id': 1}, 'ach_student_created_idx'),
+            ({'category': 'academic'}, 'ach_category_created_idx'),
+        ]
+        for filters, index in cases:
+            with self.subTest(index):
+                queryset = Achievement.objects.filter(**filters).order_by('-created_at', '-id')[:20]
+                self.assertIn(index, command.explain(queryset))
+
+
+@contextmanager
+def routed_reads():
+    """Collect what the router answered for every read: an alias, or None for the primary."""
+    answers = []
+    db_for_read = ReplicaRouter.db_for_read
+
+    def record(router, model, **hints):
+        answers.append(db_for_read(router, model, **hints))
+        return answers[-1]
+
+    with mock.patch.object(ReplicaRouter, 'db_for_read', record):
+        yield answers
+
+
+# The primary stands in for the replica, so routing can be checked on a
+# single database: the router names it only when it chose the replica.
+@override_settings(
+    DATABASE_REPLICAS={**settings.DATABASE_REPLICAS, 'ALIASES': [DEFAULT_DB_ALIAS]},
+    RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False},
+)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = make_user('S001')
+        StudentProfile.objects.filter(user=self.student).update(bio='Chess club')
+        self.profile = StudentProfile.objects.get(user=self.student)
+        self.client = APIClient()
+
+    def get_routes(self, path, user=None):
+        self.client.force_authenticate(user)
+        with routed_reads() as answers:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return set(answers)
+
+    def test_public_reads_go_to_the_replica(self):
+        self.assertEqual(self.get_routes('/api/achievements/list/'), {DEFAULT_DB_ALIAS})
+        self.assertEqual(self.get_routes(f'/api/profiles/{self.profile.pk}/'), {DEFAULT_DB_ALIAS})
+        self.assertEqual(self.get_routes('/api/achievements/notifications/', self.student), {None})
+
+    def test_writer_reads_from_the_primary_after_a_write(self):
+        self.assertEqual(self.get_routes('/api/profiles/me/', self.student), {DEFAULT_DB_ALIAS})
+
+        self.client.force_authenticate(self.student)
+        response = self.client.patch(f'/api/profiles/{self.profile.pk}/', {'bio': 'Go club'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get_routes('/api/profiles/me/', self.student), {None})
+        self.assertEqual(self.get_routes(f'/api/profiles/{self.profile.pk}/'), {DEFAULT_DB_ALIAS})
+
+
+@skipUnless(settings.DATABASE_REPLICAS['ALIASES'], 'Set DATABASE_REPLICA_URLS to test against a replica.')
+@override_settings(RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False})
+class ReplicaDatabaseTests(TransactionTestCase):
+    """Against a real second alias; test replicas mirror the primary, so rows must be committed."""
+    databases = '__all__'
+
+    def served_by(self, path, user=None):
+        aliases = set()
+
+        def record(alias):
+            def wrapper(execute, sql, params, many, context):
+                aliases.add(alias)
+                return execute(sql, params, many, context)
+            return wrapper
+
+        client = APIClient()
+        client.force_authenticate(user)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(record(alias)))
+            self.assertEqual(client.get(path).status_code, 200)
+        return aliases
+
+    def test_public_reads_are_served_by_a_replica(self):
+        cache.clear()
+        student = make_user('S001')
+        profile = StudentProfile.objects.get(user=student)
+        replicas = set(settings.DATABASE_REPLICAS['ALIASES'])
+
+        self.assertLessEqual(self.served_by(f'/api/profiles/{profile.pk}/'), replicas)
+        self.assertEqual(self.served_by('/api/achievements/notifications/', student), {DEFAULT_DB_ALIAS})
+
+
+class MetricsTests(TestCase):
+    def test_metrics_need_staff_or_the_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+
+        staff = make_user('A001')
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+        self.client.logout()
+
+        with override_settings(METRICS={**settings.METRICS, 'TOKEN': 'secret'}):
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    @override_settings(DATABASE_REPLICAS=PRIMARY_ONLY, RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False})
+    async def test_queries_of_a_view_are_counted(self):
+        registry = Registry()
+        with mock.patch('backend.metrics.registry', registry):
+            response = await self.async_client.get('/api/achievements/list/')
+        self.assertEqual(response.status_code, 200)
+        stats = registry.endpoints[('AchievementViewSet.list', 'GET')]
+        self.assertGreater(stats.queries.sum, 0)
+        self.assertGreater(stats.query_seconds, 0)
+
+    async def test_queries_in_another_thread_are_counted(self):
+        # In async mode the middleware runs on the event loop while sync
+        # views run, with their own connections, in other threads.
+        def view(request):
+            return HttpResponse(str(Achievement.objects.count()))
+
+        async def get_response(request):
+            return await sync_to_async(view, thread_sensitive=False)(request)
+
+        registry = Registry()
+        with mock.patch('backend.metrics.registry', registry):
+            await MetricsMiddleware(get_response)(RequestFactory().get('/'))
+        self.assertEqual(registry.endpoints[('unmatched', 'GET')].queries.sum, 1)
+
+    def test_serializer_data_is_timed_without_patching_drf(self):
+        self.assertNotIn('timed', vars(serializers.BaseSerializer.data.fget))
+        student = make_user('S001')
+        Achievement.objects.create(student=student, title='Quiz', description='Won', category='academic')
+
+        recorder = RequestRecorder()
+        token = current_request.set(recorder)
+        try:
+            listed = AchievementSerializer(Achievement.objects.all(), many=True)
+            self.assertIsInstance(listed, TimedListSerializer)
+            self.assertEqual(len(listed.data), 1)
+        finally:
+            current_request.reset(token)
+        self.assertGreater(recorder.serialization_seconds, 0)
+
+
+@override_settings(DATABASE_REPLICAS=PRIMARY_ONLY)
+class LeaderboardEntryTests(TestCase):
+    def test_missing_entry_is_computed_without_a_write(self):
+        student = make_user('S001')
+        StudentProfile.objects.filter(user=student).update(department='Physics', year='2')
+        Achievement.objects.create(student=student, title='Olympiad', category='academic', status='verified')
+        LeaderboardEntry.objects.filter(user=student).delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(f'/api/achievements/leaderboard/{student.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['verified_count'], response.data['ranks']['overall']), (1, 1))
+        self.assertFalse(LeaderboardEntry.objects.filter(user=student).exists())
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+
+
+@skipUnless(settings.LEADERBOARD['REDIS_URL'], 'Set REDIS_URL to test the Redis rank index.')
+@override_settings(DATABASE_REPLICAS=PRIMARY_ONLY)
+class RankIndexTests(TestCase):
+    def setUp(self):
+        self.students = []
+        with self.captureOnCommitCallbacks(execute=True):
+            for number, (department, year, cgpa) in enumerate([
+                ('Physics', '2', '8.00'), ('Physics', '3', '9.00'), ('Chemistry', '2', '8.00'), ('', '', None),
+            ]):
+                student = make_user(f'S00{number}')
+                StudentProfile.objects.filter(user=student).update(department=department, year=year, cgpa=cgpa)
+                self.students.append(student)
+            leaderboard.rebuild()
+
+    def assert_ranks_match_the_database(self):
+        for entry in LeaderboardEntry.objects.all():
+            indexed = rank_index.ranks(entry)
+            with override_settings(LEADERBOARD={**settings.LEADERBOARD, 'REDIS_URL': ''}):
+                self.assertEqual(indexed, leaderboard.ranks(entry))
+
+    def test_ranks_follow_achievement_and_profile_changes(self):
+        self.assert_ranks_match_the_database()
+        with self.captureOnCommitCallbacks(execute=True):
+            Achievement.objects.create(
+                student=self.students[2], title='Olympiad', category='academic', status='verified',
+            )
+        self.assert_ranks_match_the_database()
+        profile = StudentProfile.objects.get(user=self.students[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.department, profile.year = 'Chemistry', '3'
+            profile.save()
+        self.assert_ranks_match_the_database()
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentProfile.objects.filter(user=self.students[1]).delete()
+        self.assert_ranks_match_the_database()
+        self.assertEqual(rank_index.ranks(LeaderboardEntry.objects.get(user=self.students[2]))['overall'], 1)
+
+    def test_the_database_answers_until_the_index_is_built(self):
+        rank_index.get_client().delete(rank_index.READY_KEY)
+        self.assertIsNone(rank_index.ranks(LeaderboardEntry.objects.first()))
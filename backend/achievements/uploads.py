@@ -0,0 +1,213 @@
+"""
+Chunked, resumable proof-document uploads.
+
+A client initiates an upload, PUTs its parts (any order, retrying any part as
+often as needed) and then completes it. Each part is streamed from the
+request to storage in small reads, hashing as it goes, so neither the part
+nor the file is held in memory. The upload's checksum is the SHA-256 of the
+concatenated part digests, suffixed with the part count (the S3 composite
+checksum scheme), so it never requires re-reading the file.
+
+``LocalUploadBackend`` writes each part at its offset in a staging file
+under ``MEDIA_ROOT`` and moves it into place on completion;
+``S3UploadBackend`` maps the parts onto an S3 multipart upload.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import Achievement, ProofUpload, ProofUploadPart
+from .storage import get_proof_storage, get_s3_client
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+class HashingReader:
+    """File-like view of the next ``length`` bytes of ``stream`` that hashes what it reads."""
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.remaining = length
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size)
+        if not data:
+            raise UploadError('Upload ended before the declared Content-Length')
+        self.remaining -= len(data)
+        self.digest.update(data)
+        return data
+
+    def __iter__(self):
+        while True:
+            data = self.read(READ_SIZE)
+            if not data:
+                return
+            yield data
+
+
+def composite_checksum(part_digests):
+    combined = hashlib.sha256(b''.join(bytes.fromhex(digest) for digest in part_digests))
+    return f'{combined.hexdigest()}-{len(part_digests)}'
+
+
+class LocalUploadBackend:
+    def __init__(self):
+        self.storage = get_proof_storage()
+
+    def staging_path(self, upload):
+        return self.storage.path(f'proof_uploads/{upload.pk}.part')
+
+    def start(self, upload):
+        path = self.staging_path(upload)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as staging:
+            staging.truncate(upload.size)
+        return ''
+
+    def write_part(self, upload, number, reader):
+        with open(self.staging_path(upload), 'r+b') as staging:
+            staging.seek((number - 1) * upload.part_size)
+            for data in reader:
+                staging.write(data)
+        return ''
+
+    def complete(self, upload, parts):
+        final_path = self.storage.path(upload.storage_key)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(self.staging_path(upload), final_path)
+
+    def abort(self, upload):
+        try:
+            os.remove(self.staging_path(upload))
+        except FileNotFoundError:
+            pass
+
+
+class S3UploadBackend:
+    def __init__(self):
+        self.bucket = settings.PROOF_UPLOADS['S3_BUCKET']
+        self.client = get_s3_client()
+
+    def start(self, upload):
+        response = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=upload.storage_key,
+            ContentType=upload.content_type or 'application/octet-stream',
+        )
+        return response['UploadId']
+
+    def write_part(self, upload, number, reader):
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=upload.storage_key, UploadId=upload.storage_upload_id,
+            PartNumber=number, Body=reader, ContentLength=reader.remaining,
+        )
+        return response['ETag']
+
+    def complete(self, upload, parts):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=upload.storage_key, UploadId=upload.storage_upload_id,
+            MultipartUpload={'Parts': [{'ETag': part.etag, 'PartNumber': part.number} for part in parts]},
+        )
+
+    def abort(self, upload):
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=upload.storage_key, UploadId=upload.storage_upload_id,
+            )
+        except ClientError:
+            pass
+
+
+def get_upload_backend():
+    if settings.PROOF_UPLOADS['BACKEND'] == 's3':
+        return S3UploadBackend()
+    return LocalUploadBackend()
+
+
+def start_upload(owner_id, achievement, filename, size, content_type=''):
+    upload = ProofUpload(
+        owner_id=owner_id,
+        achievement=achievement,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        part_size=settings.PROOF_UPLOADS['PART_SIZE'],
+    )
+    upload.storage_key = f'achievement_proofs/{upload.pk}/{get_valid_filename(filename)}'
+    upload.storage_upload_id = get_upload_backend().start(upload)
+    upload.save()
+    return upload
+
+
+def store_part(upload, number, stream, length, expected_sha256=None):
+    if upload.status != 'uploading':
+        raise UploadError(f'Upload is {upload.status}')
+    if not 1 <= number <= upload.total_parts:
+        raise UploadError(f'Part number must be between 1 and {upload.total_parts}')
+    expected_size = upload.expected_part_size(number)
+    if length != expected_size:
+        raise UploadError(f'Part {number} must be exactly {expected_size} bytes')
+
+    reader = HashingReader(stream, length)
+    try:
+        etag = get_upload_backend().write_part(upload, number, reader)
+        sha256 = reader.digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise UploadError(f'Checksum mismatch for part {number}')
+    except UploadError:
+        # Whatever was stored before for this part may have been overwritten.
+        ProofUploadPart.objects.filter(upload=upload, number=number).delete()
+        raise
+
+    part, _ = ProofUploadPart.objects.update_or_create(
+        upload=upload, number=number, defaults={'size': length, 'sha256': sha256, 'etag': etag},
+    )
+    return part
+
+
+def complete_upload(upload, expected_checksum=None):
+    with transaction.atomic():
+        upload = ProofUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status != 'uploading':
+            raise UploadError(f'Upload is {upload.status}')
+        parts = list(upload.parts.all())
+        missing = sorted(set(range(1, upload.total_parts + 1)) - {part.number for part in parts})
+        if missing:
+            raise UploadError(f'Missing parts: {", ".join(map(str, missing))}')
+
+        checksum = composite_checksum([part.sha256 for part in parts])
+        if expected_checksum and expected_checksum.lower() != checksum:
+            raise UploadError('Checksum mismatch')
+
+        get_upload_backend().complete(upload, parts)
+        upload.status = 'completed'
+        upload.checksum = checksum
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=['status', 'checksum', 'completed_at', 'updated_at'])
+
+        achievement = Achievement.objects.get(pk=upload.achievement_id)
+        achievement.proof_document = upload.storage_key
+        achievement.save(update_fields=['proof_document', 'updated_at'])
+    return upload
+
+
+def abort_upload(upload):
+    if upload.status != 'uploading':
+        raise UploadError(f'Upload is {upload.status}')
+    get_upload_backend().abort(upload)
+    upload.status = 'aborted'
+    upload.save(update_fields=['status', 'updated_at'])
@@ -1,11 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AchievementViewSet, NotificationViewSet
+from .views import AchievementViewSet, AnnouncementViewSet, LeaderboardViewSet, NotificationViewSet, ProofUploadViewSet
+from .stream import notification_stream
 
 router = DefaultRouter()
 router.register(r'list', AchievementViewSet, basename='achievement')
 router.register(r'notifications', NotificationViewSet, basename='notification')
+router.register(r'announcements', AnnouncementViewSet, basename='announcement')
+router.register(r'leaderboard', LeaderboardViewSet, basename='leaderboard')
+router.register(r'uploads', ProofUploadViewSet, basename='proof-upload')
 
 urlpatterns = [
+    path('notifications/stream/', notification_stream, name='notification-stream'),
     path('', include(router.urls)),
 ]
@@ -1,20 +1,54 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
+from django.contrib.auth import get_user_model
 from django.db.models import Q
-from .models import Achievement, Notification
-from .serializers import AchievementSerializer, NotificationSerializer
+from .models import Achievement, Announcement, ArchivedNotification, Notification, NotificationCounter, ProofUpload
+import csv
+import datetime
+import json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .serializers import (
+    AchievementSerializer, NotificationSerializer, ArchivedNotificationSerializer, AnnouncementSerializer,
+    BulkVerifySerializer, LeaderboardEntrySerializer, LeaderboardQuerySerializer,
+    ProofUploadSerializer, ProofUploadCompleteSerializer,
+)
 from .permissions import IsStudentOwnerOrCoordinator, IsCoordinator
+from . import leaderboard
+from . import stats as achievement_stats
+from . import uploads
+from .tasks import announcement_recipients, deliver_announcement
+from .pagination import KeysetOptInMixin
+from .stream import issue_ticket
+from .signals import CACHE_FILTER_FIELDS, achievement_change, invalidate_achievements_cache, queue_bookkeeping
+from backend.conditional import ConditionalRequestMixin
+from backend.db_routing import ReplicaReadMixin
+from backend.response_cache import ResponseCacheMixin
+from backend.search import achievement_index
+from backend.sparse_fields import SparseFieldsViewMixin
+from tasks.queue import enqueue
 
+User = get_user_model()
 
-class AchievementViewSet(viewsets.ModelViewSet):
+
+class AchievementViewSet(ReplicaReadMixin, ResponseCacheMixin, ConditionalRequestMixin, KeysetOptInMixin,
+                         SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Achievement.objects.select_related('student', 'verified_by').all()
     serializer_class = AchievementSerializer
+    cache_namespace = 'achievements'
+    cache_filter_fields = CACHE_FILTER_FIELDS
+    # Keyset cursors are built from these.
+    sparse_required_fields = ('created_at',)
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             permission_classes = [permissions.AllowAny]
-        elif self.action in ['verify', 'pending']:
+        elif self.action in ['verify', 'bulk_verify', 'pending', 'export', 'stats']:
             permission_classes = [permissions.IsAuthenticated, IsCoordinator]
         else:
             permission_classes = [permissions.IsAuthenticated, IsStudentOwnerOrCoordinator]
@@ -22,32 +56,46 @@ class AchievementViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = Achievement.objects.select_related('student', 'verified_by').all()
+        if self.action == 'verify':
+            # The queued bookkeeping needs the student's department and year.
+            queryset = queryset.select_related('student__profile')
+        queryset = self.filter_by_params(queryset, self.request.query_params)
+
+        search = self.request.query_params.get('search', None)
+        if search and self.action == 'list':
+            queryset = achievement_index.search(queryset, search)
 
-        student_id = self.request.query_params.get('student_id', None)
+        return queryset
+
+    def filter_by_params(self, queryset, params):
+        student_id = params.get('student_id', None)
         if student_id:
             queryset = queryset.filter(student_id=student_id)
 
-        status_filter = self.request.query_params.get('status', None)
+        status_filter = params.get('status', None)
         if status_filter:
             queryset = queryset.filter(status=status_filter)
 
-        category = self.request.query_params.get('category', None)
+        category = params.get('category', None)
         if category:
             queryset = queryset.filter(category=category)
 
         return queryset
 
+    def list_unpaginated_unless_keyset(self, queryset):
+        # These actions have always returned a plain list; only page them when
+        # the client opts into keyset pagination.
+        return self.list_rows(queryset, paginate=self.use_keyset_pagination())
+
     @action(detail=False, methods=['get'])
     def my_achievements(self, request):
-        achievements = Achievement.objects.filter(student=request.user)
-        serializer = self.get_serializer(achievements, many=True)
-        return Response(serializer.data)
+        achievements = Achievement.objects.select_related('student', 'verified_by').filter(student_id=request.user.id)
+        return self.list_unpaginated_unless_keyset(achievements)
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsCoordinator])
     def pending(self, request):
-        pending_achievements = Achievement.objects.filter(status='pending')
-        serializer = self.get_serializer(pending_achievements, many=True)
-        return Response(serializer.data)
+        pending_achievements = Achievement.objects.select_related('student', 'verified_by').filter(status='pending')
+        return self.list_unpaginated_unless_keyset(pending_achievements)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsCoordinator])
     def verify(self, request, pk=None):
@@ -62,30 +110,372 @@ class AchievementViewSet(viewsets.ModelViewSet):
             )
 
         achievement.status = new_status
-        achievement.verified_by = request.user
+        # The response names the verifier; build them from the request rather
+        # than loading the row again (request.user may be a claims-only TokenUser).
+        achievement.verified_by = User(pk=request.user.id, student_id=request.user.student_id)
         achievement.verification_notes = verification_notes
-        achievement.save()
+        with transaction.atomic():
+            achievement.save(update_fields=['status', 'verified_by', 'verification_notes', 'updated_at'])
 
         serializer = self.get_serializer(achievement)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsCoordinator])
+    def bulk_verify(self, request):
+        serializer = BulkVerifySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        max_batch = settings.ACHIEVEMENT_BULK_VERIFY_MAX_BATCH
+
+        if 'items' in data:
+            items = data['items']
+        else:
+            queryset = self.filter_by_params(Achievement.objects.all(), data['filter'])
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:max_batch + 1])
+            items = [
+                {'id': pk, 'status': data['status'], 'verification_notes': data.get('verification_notes', '')}
+                for pk in ids
+            ]
+
+        if len(items) > max_batch:
+            return Response(
+                {'error': f'At most {max_batch} achievements can be verified per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = []
+        groups = {}
+        changes = []
+        cache_changes = {}
+        notifications = []
+
+        with transaction.atomic():
+            ids = [item['id'] for item in items]
+            current = {
+                row['id']: row
+                # The profile is on the nullable side of an outer join, which
+                # PostgreSQL cannot lock; only the achievements need it.
+                for row in Achievement.objects.select_for_update(of=('self',))
+                .filter(pk__in=ids)
+                .values(
+                    'id', 'student_id', 'title', 'status', 'category', 'created_at',
+                    'verification_notes', 'verified_by_id', 'student__profile__department', 'student__profile__year',
+                )
+            }
+
+            seen = set()
+            for item in items:
+                pk = item['id']
+                if pk in seen:
+                    results.append({'id': pk, 'success': False, 'error': 'Duplicate id in request'})
+                    continue
+                seen.add(pk)
+
+                row = current.get(pk)
+                if row is None:
+                    results.append({'id': pk, 'success': False, 'error': 'Achievement not found'})
+                    continue
+
+                notes = item.get('verification_notes', '')
+                results.append({'id': pk, 'success': True, 'status': item['status']})
+                if (row['status'], row['verification_notes'], row['verified_by_id']) == (
+                    item['status'], notes, request.user.id
+                ):
+                    # Already in this state: nothing to write or invalidate.
+                    continue
+
+                groups.setdefault((item['status'], notes), []).append(pk)
+                if row['status'] != item['status']:
+                    changes.append(achievement_change(
+                        row['student_id'], row['created_at'],
+                        (row['student__profile__department'] or '', row['student__profile__year'] or ''),
+                        (row['status'], row['category']), (item['status'], row['category']),
+                    ))
+                    notifications.append({
+                        'user_id': row['student_id'],
+                        'achievement_id': pk,
+                        'message': Notification.status_change_message(row['title'], item['status'], notes),
+                    })
+                cache_changes[pk] = (row, {**row, 'status': item['status']})
+
+            now = timezone.now()
+            for (new_status, notes), group_ids in groups.items():
+                Achievement.objects.filter(pk__in=group_ids).update(
+                    status=new_status,
+                    verified_by_id=request.user.id,
+                    verification_notes=notes,
+                    updated_at=now,
+                )
+            invalidate_achievements_cache(cache_changes)
+            if changes:
+                queue_bookkeeping(changes, notifications)
+
+        updated = sum(1 for result in results if result['success'])
+        return Response({
+            'updated': updated,
+            'failed': len(results) - updated,
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsCoordinator])
+    def stats(self, request):
+        filters = {
+            name: request.query_params[name]
+            for name in ['status', 'category', 'department', 'year']
+            if request.query_params.get(name)
+        }
+        return Response(achievement_stats.summarize(filters))
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsCoordinator])
+    def export(self, request):
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in ['csv', 'ndjson']:
+            return Response(
+                {'error': 'export_format must be either "csv" or "ndjson"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_by_params(Achievement.objects.all(), request.query_params)
+        for param, lookup in [('date_from', 'created_at__date__gte'), ('date_to', 'created_at__date__lte')]:
+            value = request.query_params.get(param)
+            if value:
+                date = parse_date(value)
+                if date is None:
+                    return Response(
+                        {'error': f'{param} must be a date in YYYY-MM-DD format'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                queryset = queryset.filter(**{lookup: date})
+
+        # values() + iterator() streams plain tuples through a server-side
+        # cursor, so memory stays flat however many rows are exported.
+        rows = queryset.order_by('id').values(*EXPORT_FIELDS.values()).iterator(
+            chunk_size=settings.ACHIEVEMENT_EXPORT_CHUNK_SIZE
+        )
+
+        if export_format == 'csv':
+            response = StreamingHttpResponse(export_csv_rows(rows), content_type='text/csv')
+        else:
+            response = StreamingHttpResponse(export_ndjson_rows(rows), content_type='application/x-ndjson')
+        filename = f'achievements-{timezone.now():%Y%m%d-%H%M%S}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: write() hands the line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+EXPORT_FIELDS = {
+    'id': 'id',
+    'student_id': 'student__student_id',
+    'first_name': 'student__first_name',
+    'last_name': 'student__last_name',
+    'department': 'student__profile__department',
+    'year': 'student__profile__year',
+    'title': 'title',
+    'category': 'category',
+    'status': 'status',
+    'achievement_date': 'achievement_date',
+    'verified_by': 'verified_by__student_id',
+    'verification_notes': 'verification_notes',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
 
-class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+
+def export_value(value):
+    # Both formats write dates and timestamps as full ISO 8601.
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def export_csv_rows(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS.keys())
+    for row in rows:
+        yield writer.writerow(export_value(row[lookup]) for lookup in EXPORT_FIELDS.values())
+
+
+def export_ndjson_rows(rows):
+    for row in rows:
+        record = {name: export_value(row[lookup]) for name, lookup in EXPORT_FIELDS.items()}
+        yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+
+class NotificationViewSet(KeysetOptInMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        if self.show_archived():
+            return (
+                ArchivedNotification.objects.select_related('achievement', 'announcement')
+                .filter(user_id=self.request.user.id)
+            )
+        return Notification.objects.select_related('achievement', 'announcement').filter(user_id=self.request.user.id)
+
+    def get_serializer_class(self):
+        if self.show_archived():
+            return ArchivedNotificationSerializer
+        return super().get_serializer_class()
+
+    def show_archived(self):
+        # Archived notifications are read-only history: list and retrieve only.
+        return self.action in ['list', 'retrieve'] and self.request.query_params.get('archived') in ['true', '1']
 
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         notification = self.get_object()
+        with transaction.atomic():
+            # Only the request that actually flips the flag decrements the counter.
+            marked = Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+            if marked:
+                NotificationCounter.adjust(notification.user_id, -1)
         notification.is_read = True
-        notification.save()
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
-        return Response({'status': 'all notifications marked as read'})
\ No newline at end of file
+        with transaction.atomic():
+            Notification.objects.filter(user_id=request.user.id, is_read=False).update(is_read=True)
+            NotificationCounter.reset(request.user.id)
+        return Response({'status': 'all notifications marked as read'})
+
+    @action(detail=False, methods=['post'])
+    def stream_ticket(self, request):
+        if request.auth is None:
+            return Response(
+                {'error': 'Stream tickets are issued for access tokens only'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            'ticket': issue_ticket(request.auth),
+            'expires_in': settings.NOTIFICATION_STREAM['TICKET_MAX_AGE'],
+        })
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        counter = NotificationCounter.objects.filter(user_id=request.user.id).first()
+        if counter is None:
+            counter = NotificationCounter.rebuild(request.user.id)
+
+        headers = {'ETag': counter.etag, 'Cache-Control': 'private, no-cache'}
+        if_none_match = request.headers.get('If-None-Match', '')
+        if counter.etag in [tag.strip() for tag in if_none_match.split(',')]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response({'unread_count': max(counter.unread, 0)}, headers=headers)
+
+
+class AnnouncementViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Coordinators broadcast a message to every student in a department and/or
+    year. Creating one returns ``202``; the background worker delivers it and
+    ``recipients``/``delivered``/``progress`` report how far it got.
+    """
+    queryset = Announcement.objects.all()
+    serializer_class = AnnouncementSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCoordinator]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            announcement = serializer.save(created_by_id=request.user.id)
+            announcement.recipients = announcement_recipients(announcement).count()
+            announcement.save(update_fields=['recipients'])
+            enqueue(
+                deliver_announcement, {'announcement_id': announcement.pk},
+                idempotency_key=f'announcement:{announcement.pk}',
+            )
+        return Response(self.get_serializer(announcement).data, status=status.HTTP_202_ACCEPTED)
+
+
+class LeaderboardViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
+    """
+    Public leaderboard, read from the precomputed ``LeaderboardEntry`` table:
+    ``list`` is the top ``limit`` students overall or within a department
+    and/or year, ``retrieve`` is one student's entry with their rank in each
+    scope.
+    """
+    serializer_class = LeaderboardEntrySerializer
+    permission_classes = [permissions.AllowAny]
+    lookup_value_regex = r'\d+'
+
+    def list(self, request):
+        query = LeaderboardQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        entries = leaderboard.top(params['department'], params['year'], params['limit'])
+        return Response({
+            'department': params['department'],
+            'year': params['year'],
+            'results': self.get_serializer(entries, many=True).data,
+        })
+
+    def retrieve(self, request, pk=None):
+        entry = leaderboard.get_entry(int(pk))
+        if entry is None:
+            return Response({'error': 'Student not found'}, status=status.HTTP_404_NOT_FOUND)
+        ranks = leaderboard.ranks(entry)
+        entry.rank = ranks['overall']
+        return Response({**self.get_serializer(entry).data, 'ranks': ranks})
+
+
+class ProofUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                         mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Chunked, resumable proof-document uploads: create, PUT each part to
+    ``parts/<number>/``, then ``complete``. Retrieving an upload lists the
+    parts already stored, so an interrupted client knows where to resume.
+    """
+    serializer_class = ProofUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return ProofUpload.objects.prefetch_related('parts').filter(owner_id=self.request.user.id)
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        serializer.instance = uploads.start_upload(
+            self.request.user.id, data['achievement'], data['filename'], data['size'], data.get('content_type', ''),
+        )
+
+    @action(detail=True, methods=['put'], url_path=r'parts/(?P<number>[0-9]+)')
+    def upload_part(self, request, pk=None, number=None):
+        upload = self.get_object()
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length <= 0 or request.stream is None:
+            return Response({'error': 'A Content-Length request body is required'}, status=status.HTTP_411_LENGTH_REQUIRED)
+
+        try:
+            part = uploads.store_part(
+                upload, int(number), request.stream, length, expected_sha256=request.headers.get('X-Content-SHA256'),
+            )
+        except uploads.UploadError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'number': part.number, 'size': part.size, 'sha256': part.sha256})
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        serializer = ProofUploadCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = uploads.complete_upload(self.get_object(), serializer.validated_data.get('checksum'))
+        except uploads.UploadError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(upload).data)
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            uploads.abort_upload(self.get_object())
+        except uploads.UploadError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
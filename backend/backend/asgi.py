@@ -7,5 +7,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Sync code runs in a new thread for every request, so a kept connection
+# would be left behind in a thread that is gone. Use DATABASE_POOL or
+# PgBouncer for connection reuse instead.
+os.environ.setdefault('DATABASE_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -0,0 +1,135 @@
+"""
+Conditional requests for resources with an ``updated_at`` column.
+
+``retrieve`` responses carry an ``ETag`` and ``Last-Modified`` derived from
+the object's ``updated_at``; ``list`` responses carry a collection validator
+derived from ``max(updated_at)`` and the row count of the filtered queryset,
+so adding, changing or deleting a matching row changes it. Both validators
+cost one small query, and a matching ``If-None-Match`` (or
+``If-Modified-Since`` on a detail) is answered with ``304 Not Modified``
+before anything is serialized. Behind ``ResponseCacheMixin`` the query only
+runs on a cache miss; hits replay the validators stored with the entry.
+
+Updates and deletes honour ``If-Match`` (and ``If-Unmodified-Since``): the
+row is locked, its validator compared, and a stale one gets ``412
+Precondition Failed`` instead of overwriting someone else's change.
+
+Preconditions are evaluated with Django's ``get_conditional_response``, so
+they follow RFC 9110 ordering.
+"""
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+CONDITIONAL_HEADERS = ('HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_UNMODIFIED_SINCE')
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest())
+
+
+class ConditionalRequestMixin:
+    """
+    Adds validators and precondition handling to a model viewset.
+
+    The 304 shortcut on ``retrieve`` skips object-level permission checks, so
+    only use it where reading the object is allowed to anyone who can list it.
+    ``updated_at`` must change whenever the representation does, including
+    bulk ``update()`` calls and changes to related rows the serializer shows.
+    """
+    version_field = 'updated_at'
+
+    def object_validators(self, kwargs, lock=False):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        if lock:
+            queryset = queryset.select_for_update(of=('self',))
+        row = queryset.values_list('pk', self.version_field).first()
+        if row is None or row[1] is None:
+            return None
+        pk, updated_at = row
+        return make_etag(pk, updated_at.isoformat(), self.request.accepted_renderer.format), updated_at
+
+    def collection_validators(self):
+        summary = self.filter_queryset(self.get_queryset()).aggregate(
+            latest=Max(self.version_field), count=Count('pk'),
+        )
+        latest = summary['latest']
+        stamp = latest.isoformat() if latest is not None else ''
+        return make_etag(stamp, summary['count'], self.request.accepted_renderer.format), latest
+
+    def check_preconditions(self, request, etag, last_modified):
+        """A 304/412 response if a precondition settles the request, else None."""
+        if not any(header in request.META for header in CONDITIONAL_HEADERS):
+            return None
+        timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+        result = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if result is None:
+            return None
+        if result.status_code == status.HTTP_304_NOT_MODIFIED:
+            return self.add_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+        return Response(
+            {'error': 'The resource has changed since it was last fetched'},
+            status=status.HTTP_412_PRECONDITION_FAILED,
+        )
+
+    def add_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.collection_validators()
+        # Deleting the most recently updated row moves max(updated_at)
+        # backwards, so only the ETag can tell whether a collection changed.
+        not_modified = self.check_preconditions(request, etag, None)
+        if not_modified is not None:
+            return self.add_validators(not_modified, etag, last_modified)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self.add_validators(response, etag, last_modified)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.object_validators(kwargs)
+        if validators is None:
+            return super().retrieve(request, *args, **kwargs)
+        not_modified = self.check_preconditions(request, *validators)
+        if not_modified is not None:
+            return not_modified
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self.add_validators(response, *validators)
+        return response
+
+    def update(self, request, *args, **kwargs):
+        response = self.conditional_write(super().update, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            validators = self.object_validators(kwargs)
+            if validators is not None:
+                self.add_validators(response, *validators)
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        return self.conditional_write(super().destroy, request, *args, **kwargs)
+
+    def conditional_write(self, handler, request, *args, **kwargs):
+        if 'HTTP_IF_MATCH' not in request.META and 'HTTP_IF_UNMODIFIED_SINCE' not in request.META:
+            return handler(request, *args, **kwargs)
+        # Permission errors take precedence over a failed precondition.
+        self.get_object()
+        with transaction.atomic():
+            # Hold the row until the write is done, so nobody can change it
+            # between the comparison and the update.
+            validators = self.object_validators(kwargs, lock=True)
+            if validators is not None:
+                failed = self.check_preconditions(request, *validators)
+                if failed is not None:
+                    return failed
+            return handler(request, *args, **kwargs)
@@ -0,0 +1,141 @@
+"""
+Read-replica routing.
+
+Reads go to the primary (``default``) unless the current request opted in to
+the replicas: ``ReplicaReadMixin`` does that for safe requests to the
+achievement and profile views, which serve the bulk of the public traffic.
+
+Replicas lag behind the primary, so reads fall back to it when they could
+observe that lag:
+
+* a request that has written anything reads from the primary from then on;
+* a user who wrote something is pinned to the primary for
+  ``DATABASE_REPLICAS['STICKY_SECONDS']`` (read-your-writes). Pins live in
+  the default cache, so they are shared between processes only with Redis;
+* ``ResponseCacheMixin`` reads a recently invalidated entry from the primary,
+  so a lagging replica cannot put the old rows back into the cache.
+"""
+import contextvars
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_KEY_PREFIX = 'db-pin'
+
+routing_state = contextvars.ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def replica_aliases():
+    return settings.DATABASE_REPLICAS['ALIASES']
+
+
+def pin_key(user_id):
+    return f'{PIN_KEY_PREFIX}:{user_id}'
+
+
+def is_pinned(user):
+    return user is not None and user.is_authenticated and bool(cache.get(pin_key(user.id)))
+
+
+def pin(user):
+    cache.set(pin_key(user.id), True, timeout=settings.DATABASE_REPLICAS['STICKY_SECONDS'])
+
+
+def use_replica():
+    """Send the current request's remaining reads to one replica."""
+    state = routing_state.get()
+    if state is not None and not state.wrote and replica_aliases():
+        state.replica = random.choice(replica_aliases())
+
+
+def use_primary():
+    state = routing_state.get()
+    if state is not None:
+        state.replica = None
+
+
+def recently_changed(version_ns):
+    """Whether a change at ``version_ns`` (a ``time.time_ns()``) may not have reached the replicas yet."""
+    return time.time_ns() - version_ns < settings.DATABASE_REPLICAS['STICKY_SECONDS'] * 1_000_000_000
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is not None and state.replica and not state.wrote:
+            return state.replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_aliases()
+
+
+class ReplicaRoutingMiddleware:
+    """Tracks routing per request and pins users whose request wrote something."""
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        self.finish(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        self.finish(request, state)
+        return response
+
+    def finish(self, request, state):
+        if not state.wrote or not replica_aliases():
+            return
+        # DRF stores the user it authenticated on the underlying request too.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin(user)
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from a replica unless the user is pinned to the primary."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and replica_aliases() and not is_pinned(request.user):
+            use_replica()
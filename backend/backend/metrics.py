@@ -0,0 +1,320 @@
+"""
+Per-endpoint request metrics and a Prometheus text ``/metrics`` endpoint.
+
+``MetricsMiddleware`` labels every request with the view that handled it
+(``AchievementViewSet.pending``, ``StudentProfileViewSet.retrieve``, ...) and
+records its latency, database query count and time, serialization time
+(``.data`` of serializers using ``TimedSerializerMixin`` plus rendering the
+response body) and response size.
+
+Queries are counted by ``record_query``, an execute wrapper installed on every
+database connection when it is created. Under ASGI sync views run in threads
+of their own, each with its own connections, so the wrapper finds the
+request's recorder through a context variable, which Django copies into
+those threads, rather than being installed around the request.
+
+Within one request, queries with the same SQL shape are counted; a shape
+repeated ``METRICS['N_PLUS_ONE_THRESHOLD']`` times or more is logged as a
+likely N+1 pattern.
+
+Metrics live in process memory, so every server process reports its own;
+Prometheus should scrape each process (or sum over the ``instance`` label).
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+current_request = contextvars.ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.response_bytes = 0
+        self.responses = {}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.n_plus_one = {}
+
+    def record(self, view, method, status_code, recorder, seconds, size):
+        with self.lock:
+            stats = self.endpoints.get((view, method))
+            if stats is None:
+                stats = self.endpoints[(view, method)] = EndpointStats()
+            stats.latency.observe(seconds)
+            stats.responses[status_code] = stats.responses.get(status_code, 0) + 1
+            if size is not None:
+                stats.response_bytes += size
+            if recorder is not None:
+                stats.queries.observe(recorder.queries)
+                stats.query_seconds += recorder.query_seconds
+                stats.serialization_seconds += recorder.serialization_seconds
+
+    def record_n_plus_one(self, view):
+        with self.lock:
+            self.n_plus_one[view] = self.n_plus_one.get(view, 0) + 1
+
+    def render(self):
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def histogram(name, labels, histogram_stats):
+            for bound, count in zip(histogram_stats.buckets, histogram_stats.counts):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram_stats.count}')
+            lines.append(f'{name}_sum{{{labels}}} {histogram_stats.sum}')
+            lines.append(f'{name}_count{{{labels}}} {histogram_stats.count}')
+
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            labelled = [(format_labels(view=view, method=method), stats) for (view, method), stats in endpoints]
+
+            family('http_requests_total', 'counter', 'Responses by view, method and status code.')
+            for (view, method), stats in endpoints:
+                for status_code, count in sorted(stats.responses.items()):
+                    lines.append(f'http_requests_total{{{format_labels(view=view, method=method, status=status_code)}}} {count}')
+            family('http_request_duration_seconds', 'histogram', 'Time from request to response.')
+            for labels, stats in labelled:
+                histogram('http_request_duration_seconds', labels, stats.latency)
+            family('http_request_db_queries', 'histogram', 'Database queries per request.')
+            for labels, stats in labelled:
+                histogram('http_request_db_queries', labels, stats.queries)
+            family('http_request_db_seconds_total', 'counter', 'Time spent in database queries.')
+            for labels, stats in labelled:
+                lines.append(f'http_request_db_seconds_total{{{labels}}} {stats.query_seconds}')
+            family('http_request_serialization_seconds_total', 'counter', 'Time spent in serializers and renderers.')
+            for labels, stats in labelled:
+                lines.append(f'http_request_serialization_seconds_total{{{labels}}} {stats.serialization_seconds}')
+            family('http_response_size_bytes_total', 'counter', 'Response body bytes (streamed responses excluded).')
+            for labels, stats in labelled:
+                lines.append(f'http_response_size_bytes_total{{{labels}}} {stats.response_bytes}')
+            family('http_request_n_plus_one_total', 'counter', 'Requests that repeated one SQL shape too often.')
+            for view, count in sorted(self.n_plus_one.items()):
+                lines.append(f'http_request_n_plus_one_total{{{format_labels(view=view)}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def format_labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+NUMBER = re.compile(r'\b\d+\b')
+
+
+def sql_shape(sql):
+    """``sql`` with literal numbers and placeholder lists of any length folded together."""
+    return NUMBER.sub('N', PLACEHOLDER_LIST.sub('(%s...)', sql))
+
+
+class RequestRecorder:
+    """Collects the database and serialization work of one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_seconds += time.perf_counter() - started
+            self.queries += 1
+            shape = sql_shape(sql)
+            self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated_shapes(self, threshold):
+        return [(shape, count) for shape, count in self.shapes.items() if count >= threshold]
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_request.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+connection_created.connect(install_query_recorder, dispatch_uid='metrics.install_query_recorder')
+
+
+@contextmanager
+def timed_serialization():
+    recorder = current_request.get()
+    if recorder is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.serialization_seconds += time.perf_counter() - started
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Adds the time spent in ``.data`` to the current request's metrics, for
+    single objects and ``many=True`` lists alike. Nested serializers render
+    through ``to_representation``, so only the top-level one is timed.
+    """
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        serializer = super().many_init(*args, **kwargs)
+        if type(serializer) is serializers.ListSerializer:
+            serializer.__class__ = TimedListSerializer
+        return serializer
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    func = match.func
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if view_class is None:
+        return getattr(func, '__name__', match.view_name)
+    actions = getattr(func, 'actions', None)
+    if actions:
+        return f'{view_class.__name__}.{actions.get(request.method.lower(), request.method.lower())}'
+    return view_class.__name__
+
+
+def response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = RequestRecorder()
+        started = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        self.finish(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        recorder = RequestRecorder()
+        started = time.perf_counter()
+        with self.recording(recorder):
+            response = await self.get_response(request)
+        self.finish(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def recording(self, recorder):
+        # Connections opened before this module was imported missed the signal.
+        for alias in connections:
+            install_query_recorder(connections[alias])
+        token = current_request.set(recorder)
+        stack = ExitStack()
+        stack.callback(current_request.reset, token)
+        return stack
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that too.
+        recorder = current_request.get()
+        if recorder is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                recorder.serialization_seconds += time.perf_counter() - started
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, recorder, seconds):
+        view = view_label(request)
+        registry.record(view, request.method, response.status_code, recorder, seconds, response_size(response))
+        repeated = recorder.repeated_shapes(settings.METRICS['N_PLUS_ONE_THRESHOLD'])
+        if repeated:
+            registry.record_n_plus_one(view)
+            for shape, count in repeated:
+                logger.warning(
+                    'Possible N+1 query in %s %s (%s): %d queries with the same shape: %s',
+                    request.method, request.path, view, count, shape[:300],
+                )
+
+
+def metrics_view(request):
+    # Without a token only staff sessions may read the metrics; they name
+    # every endpoint and reveal traffic patterns.
+    token = settings.METRICS['TOKEN']
+    authorized = bool(token) and request.headers.get('Authorization') == f'Bearer {token}'
+    if not authorized and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,187 @@
+"""
+Response cache for the public, read-heavy list/retrieve endpoints.
+
+Cached entries are grouped under tags (``detail:<pk>`` for one object,
+``list:<filters>`` for one filter combination of a list). Every tag has a
+version stored in the cache and the version is part of each entry's key, so
+invalidating a tag is a single write that orphans exactly the entries built
+from it; nothing else is flushed.
+
+Entries keep the response's ``ETag`` and ``Last-Modified`` (see
+backend/conditional.py) next to the data, so a hit replays them, and answers
+a matching ``If-None-Match`` with ``304``, without touching the database.
+
+The cache alias is a regular Django cache, so the backend is whatever
+``CACHES`` configures: the in-process LRU (LocMemCache) by default, or Redis.
+"""
+import hashlib
+import time
+from itertools import combinations
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from backend.db_routing import recently_changed, use_primary
+
+KEY_PREFIX = 'rc'
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE['ALIAS']]
+
+
+def version_key(namespace, tag):
+    return f'{KEY_PREFIX}:v:{namespace}:{tag}'
+
+
+def list_tag(filters):
+    return 'list:' + '&'.join(f'{name}={filters[name]}' for name in sorted(filters))
+
+
+def detail_tag(pk):
+    return f'detail:{pk}'
+
+
+def get_versions(namespace, tags):
+    cache = get_cache()
+    keys = {version_key(namespace, tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    versions = {}
+    missing = {}
+    for key, tag in keys.items():
+        if key in found:
+            versions[tag] = found[key]
+        else:
+            # A fresh, time-based version can never collide with entries cached
+            # under a version that was evicted earlier.
+            versions[tag] = missing[key] = time.time_ns()
+    if missing:
+        cache.set_many(missing, timeout=None)
+    return versions
+
+
+def invalidate_tags(namespace, tags):
+    if tags:
+        now = time.time_ns()
+        get_cache().set_many({version_key(namespace, tag): now for tag in tags}, timeout=None)
+
+
+def tags_for_object(pk, filter_fields, states):
+    """
+    Tags affected by a write to one object: its detail entry plus every list
+    whose filters match the object before or after the write.
+    """
+    tags = {detail_tag(pk)}
+    for state in states:
+        for size in range(len(filter_fields) + 1):
+            for combo in combinations(filter_fields, size):
+                tags.add(list_tag({name: state[name] for name in combo}))
+    return tags
+
+
+def invalidate_object(namespace, pk, filter_fields=(), states=({},)):
+    invalidate_objects(namespace, {pk: states}, filter_fields)
+
+
+def invalidate_objects(namespace, objects, filter_fields=()):
+    """Bulk form of ``invalidate_object``: ``objects`` maps each written pk to its states."""
+    tags = set()
+    for pk, states in objects.items():
+        tags |= tags_for_object(pk, filter_fields, states)
+    # Evict after commit, otherwise a concurrent read could cache the old rows
+    # again before the write becomes visible.
+    transaction.on_commit(lambda: invalidate_tags(namespace, tags))
+
+
+class ResponseCacheMixin:
+    """
+    Caches the serialized data of ``list`` and ``retrieve`` responses.
+
+    ``cache_namespace`` names the entries and ``cache_filter_fields`` lists the
+    query parameters that partition the list (they must be model fields and
+    match the fields passed to ``invalidate_object`` for the same namespace).
+
+    List it before ``ConditionalRequestMixin`` so a hit skips the validator
+    query; on a miss that mixin computes the validators that get stored.
+    """
+    cache_namespace = None
+    cache_filter_fields = ()
+
+    def list(self, request, *args, **kwargs):
+        filters = self.get_cache_filters(request)
+        if filters is None:
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(list_tag(filters), super().list, request, *args, **kwargs)
+
+    def get_cache_filters(self, request):
+        """
+        The list's filter values, converted by their model fields the way the
+        queryset filter converts them, so ``?student_id=05`` and
+        ``?student_id=5`` share the tag that ``invalidate_object`` builds from
+        the saved object. ``None`` when a value does not convert; such a
+        request is not cached.
+        """
+        opts = self.queryset.model._meta
+        filters = {}
+        for name in self.cache_filter_fields:
+            value = request.query_params.get(name)
+            if value:
+                try:
+                    filters[name] = opts.get_field(name).to_python(value)
+                except ValidationError:
+                    return None
+        return filters
+
+    def retrieve(self, request, *args, **kwargs):
+        tag = detail_tag(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return self.cached_response(tag, super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, tag, handler, request, *args, **kwargs):
+        if not settings.RESPONSE_CACHE['ENABLED']:
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        version = get_versions(self.cache_namespace, [tag])[tag]
+        key = self.get_response_cache_key(request, tag, version)
+
+        entry = cache.get(key)
+        if entry is not None:
+            return self.replay_cached(request, entry)
+
+        if recently_changed(version):
+            # A replica may not have the change that bumped the version yet.
+            use_primary()
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            entry = {
+                'data': response.data,
+                'headers': {name: response[name] for name in VALIDATOR_HEADERS if response.has_header(name)},
+            }
+            cache.set(key, entry, timeout=settings.RESPONSE_CACHE['TTL'][self.cache_namespace])
+        return response
+
+    def replay_cached(self, request, entry):
+        headers = entry['headers']
+        etag = headers.get('ETag')
+        # As in ConditionalRequestMixin.list, a list's Last-Modified can move
+        # backwards when rows are deleted, so only its ETag validates.
+        last_modified = None if self.action == 'list' else parse_http_date_safe(headers.get('Last-Modified', ''))
+        if etag or last_modified:
+            conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if conditional is not None and conditional.status_code == status.HTTP_304_NOT_MODIFIED:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry['data'], headers=headers)
+
+    def get_response_cache_key(self, request, tag, version):
+        query = '&'.join(sorted(request.GET.urlencode().split('&')))
+        raw = '|'.join([request.get_host(), request.path, query, request.accepted_renderer.format])
+        digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        return f'{KEY_PREFIX}:r:{self.cache_namespace}:{tag}:{version}:{digest}'
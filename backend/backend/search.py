@@ -0,0 +1,209 @@
+"""
+Ranked full-text search for achievements and profiles.
+
+On PostgreSQL each searchable table has a ``search_vector`` tsvector column,
+filled by a trigger on every insert/update and covered by a GIN index, plus
+trigram GIN indexes for fuzzy (misspelt or partial) matches. On SQLite an
+FTS5 external-content table is kept in sync by triggers instead. The
+triggers and indexes are created by the apps' migrations, so nothing is
+rebuilt at query time.
+
+The schema editor does not know about the triggers: SQLite drops them when a
+later migration rebuilds the table. ``restore_search_triggers`` runs after
+every ``migrate`` and puts missing ones back (``manage.py
+rebuild_search_index`` does the same and re-indexes every row).
+"""
+import re
+
+from django.db import connection, connections, router
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+SEARCH_CONFIG = 'english'
+TRIGRAM_WEIGHT = 0.5
+# bm25() column weights on SQLite, mirroring PostgreSQL's A-D ranking weights.
+FTS5_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+
+class SearchIndex:
+    """
+    ``weighted_fields`` maps columns to tsvector weights (A-D);
+    ``trigram_fields`` get a trigram index for fuzzy matching.
+    """
+
+    def __init__(self, table, weighted_fields, trigram_fields):
+        self.table = table
+        self.weighted_fields = weighted_fields
+        self.trigram_fields = trigram_fields
+
+    @property
+    def fts_table(self):
+        return f'{self.table}_fts'
+
+    def postgres_trigger_sql(self):
+        vector = ' || '.join(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.{field}, '')), '{weight}')"
+            for field, weight in self.weighted_fields.items()
+        )
+        return {
+            f'{self.table}_search_vector_update': [
+                f"""
+                CREATE OR REPLACE FUNCTION {self.table}_search_vector() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector := {vector};
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+                """,
+                f"""
+                CREATE TRIGGER {self.table}_search_vector_update
+                BEFORE INSERT OR UPDATE ON {self.table}
+                FOR EACH ROW EXECUTE FUNCTION {self.table}_search_vector()
+                """,
+            ],
+        }
+
+    def sqlite_trigger_sql(self):
+        fields = ', '.join(self.weighted_fields)
+        new_values = ', '.join(f'new.{field}' for field in self.weighted_fields)
+        old_values = ', '.join(f'old.{field}' for field in self.weighted_fields)
+        fts = self.fts_table
+        insert = f'INSERT INTO {fts}(rowid, {fields}) VALUES (new.id, {new_values});'
+        delete = f"INSERT INTO {fts}({fts}, rowid, {fields}) VALUES ('delete', old.id, {old_values});"
+        return {
+            f'{fts}_insert': [f'CREATE TRIGGER {fts}_insert AFTER INSERT ON {self.table} BEGIN {insert} END'],
+            f'{fts}_delete': [f'CREATE TRIGGER {fts}_delete AFTER DELETE ON {self.table} BEGIN {delete} END'],
+            f'{fts}_update': [f'CREATE TRIGGER {fts}_update AFTER UPDATE ON {self.table} BEGIN {delete} {insert} END'],
+        }
+
+    def is_installed(self, connection):
+        """Whether the search migration has run on this database."""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                columns = connection.introspection.get_table_description(cursor, self.table)
+            return any(column.name == 'search_vector' for column in columns)
+        if connection.vendor == 'sqlite':
+            return self.fts_table in connection.introspection.table_names()
+        return False
+
+    def existing_triggers(self, connection):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT tgname FROM pg_trigger WHERE tgrelid = %s::regclass AND NOT tgisinternal', [self.table]
+                )
+            else:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [self.table])
+            return {name for name, in cursor.fetchall()}
+
+    def trigger_sql(self, connection):
+        return self.postgres_trigger_sql() if connection.vendor == 'postgresql' else self.sqlite_trigger_sql()
+
+    def restore_triggers(self, connection):
+        """
+        Recreate the sync triggers that are missing, e.g. because SQLite
+        rebuilt the table for a later migration; returns their names.
+        """
+        if not self.is_installed(connection):
+            return []
+        existing = self.existing_triggers(connection)
+        missing = [name for name in self.trigger_sql(connection) if name not in existing]
+        with connection.cursor() as cursor:
+            for name in missing:
+                for statement in self.trigger_sql(connection)[name]:
+                    cursor.execute(statement)
+        return missing
+
+    def rebuild(self, connection):
+        """Re-index every row from the table."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                first = next(iter(self.weighted_fields))
+                # Fires the trigger for every row.
+                cursor.execute(f'UPDATE {self.table} SET {first} = {first}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')")
+
+    def restore(self, connection):
+        """Restore missing triggers and, if any were missing, rebuild the index they failed to maintain."""
+        restored = self.restore_triggers(connection)
+        if restored:
+            self.rebuild(connection)
+        return restored
+
+    def search(self, queryset, query):
+        """Filter ``queryset`` to matches of ``query``, best first."""
+        query = query.strip()
+        if not query:
+            return queryset
+        if connection.vendor == 'postgresql':
+            return self.search_postgres(queryset, query)
+        if connection.vendor == 'sqlite':
+            return self.search_sqlite(queryset, query)
+        condition = Q()
+        for field in self.weighted_fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition)
+
+    def search_postgres(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        similarities = [TrigramWordSimilarity(query, field) for field in self.trigram_fields]
+        similarity = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+
+        fuzzy = Q()
+        for field in self.trigram_fields:
+            fuzzy |= Q(**{f'{field}__trigram_word_similar': query})
+
+        return (
+            queryset
+            .filter(Q(search_vector=search_query) | fuzzy)
+            .annotate(search_rank=SearchRank(F('search_vector'), search_query) + Value(TRIGRAM_WEIGHT) * similarity)
+            .order_by('-search_rank', '-id')
+        )
+
+    def search_sqlite(self, queryset, query):
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return queryset.none()
+        # Quote every term (FTS5 syntax is not user input) and prefix-match it.
+        match = ' '.join(f'"{term}"*' for term in terms)
+        fts = self.fts_table
+        weights = ', '.join(str(FTS5_WEIGHTS[weight]) for weight in self.weighted_fields.values())
+        return (
+            queryset
+            .filter(id__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', (match,)))
+            .annotate(search_rank=RawSQL(
+                f'SELECT -bm25({fts}, {weights}) FROM {fts} WHERE {fts} MATCH %s AND {fts}.rowid = {self.table}.id',
+                (match,), output_field=FloatField(),
+            ))
+            .order_by('-search_rank', '-id')
+        )
+
+
+achievement_index = SearchIndex(
+    'achievements_achievement',
+    weighted_fields={'title': 'A', 'description': 'B', 'category': 'C'},
+    trigram_fields=['title', 'description'],
+)
+
+profile_index = SearchIndex(
+    'profiles_studentprofile',
+    weighted_fields={'bio': 'A', 'department': 'B'},
+    trigram_fields=['bio'],
+)
+
+
+SEARCH_INDEXES = [achievement_index, profile_index]
+
+
+def restore_search_triggers(using='default', **kwargs):
+    """``post_migrate`` receiver; returns the names of the triggers it recreated."""
+    restored = []
+    if not router.allow_migrate(using, 'achievements') or not router.allow_migrate(using, 'profiles'):
+        return restored
+    for index in SEARCH_INDEXES:
+        restored += index.restore(connections[using])
+    return restored
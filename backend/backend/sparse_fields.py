@@ -0,0 +1,228 @@
+"""
+Sparse fieldsets for the read endpoints.
+
+``?fields=a,b`` keeps only the named top-level fields of a response and
+``?exclude=a,b`` drops them. The serializer is trimmed first and the query is
+then narrowed to the columns (and joins) the remaining fields read, so a
+trimmed list also fetches less.
+
+List endpoints additionally serialize straight from ``.values()`` rows when
+every remaining field can be rendered from a row: plain model fields are
+converted with their serializer field's ``to_representation`` and nothing
+else, skipping the per-object attribute lookups and model instantiation of
+the regular path. The output is identical either way.
+"""
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def split_field_names(value):
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Accepts ``fields=`` and ``exclude=`` keyword arguments that trim the
+    serializer's fields.
+
+    ``field_lookups`` lists the model lookups of fields whose source is the
+    whole object (``SerializerMethodField``). Such a field is rendered from a
+    ``.values()`` row by a ``<method_name>_from_row(row)`` method, if the
+    serializer has one.
+    """
+    field_lookups = {}
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = set(fields or ()) | set(exclude or ())
+        unknown = sorted(requested - set(self.fields))
+        if unknown:
+            raise serializers.ValidationError({'fields': f'Unknown field(s): {", ".join(unknown)}'})
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in exclude or ():
+            self.fields.pop(name, None)
+
+
+def field_lookups(serializer, prefix=''):
+    """Model lookups read by ``serializer``'s readable fields."""
+    lookups = set()
+    for field in serializer._readable_fields:
+        if field.source == '*':
+            lookups.update(prefix + lookup for lookup in getattr(serializer, 'field_lookups', {}).get(field.field_name, ()))
+        elif isinstance(field, serializers.BaseSerializer):
+            lookups.update(field_lookups(field, prefix + field.source.replace('.', '__') + '__'))
+        else:
+            lookups.add(prefix + field.source.replace('.', '__'))
+    return lookups
+
+
+def narrow_queryset(queryset, serializer, required=()):
+    """Load only the columns and joins ``serializer`` reads."""
+    lookups = field_lookups(serializer) | set(required)
+    relations = {lookup.rsplit('__', 1)[0] for lookup in lookups if '__' in lookup}
+    queryset = queryset.select_related(None)
+    if relations:
+        queryset = queryset.select_related(*relations)
+    return queryset.only(*lookups)
+
+
+def file_url(storage, request):
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def datetime_converter(field):
+    """
+    ``DateTimeField.to_representation`` with the timezone resolved once
+    instead of per value; anything but an aware datetime in ISO 8601 output
+    goes through the field itself.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if field_timezone is None or not isinstance(output_format, str) or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if not timezone.is_aware(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def row_converters(serializer, prefix=''):
+    """
+    ``[(name, lookup, convert)]`` rendering ``serializer`` from a ``.values()``
+    row, or None if one of its fields needs the model instance.
+    """
+    model = serializer.Meta.model
+    request = serializer.context.get('request')
+    converters = []
+    for field in serializer._readable_fields:
+        name = field.field_name
+        if isinstance(field, serializers.SerializerMethodField):
+            convert = getattr(serializer, f'{field.method_name}_from_row', None)
+            if convert is None or prefix or name not in getattr(serializer, 'field_lookups', {}):
+                return None
+            converters.append((name, None, convert))
+        elif field.source == '*':
+            return None
+        elif isinstance(field, serializers.ListSerializer):
+            return None
+        elif isinstance(field, serializers.BaseSerializer):
+            nested_prefix = prefix + field.source.replace('.', '__') + '__'
+            nested = row_converters(field, nested_prefix)
+            if nested is None:
+                return None
+            converters.append((name, None, nested_converter(nested, nested_prefix + 'pk')))
+        elif isinstance(field, serializers.RelatedField):
+            if not isinstance(field, serializers.PrimaryKeyRelatedField):
+                return None
+            converters.append((name, prefix + field.source.replace('.', '__'), None))
+        elif isinstance(field, serializers.FileField):
+            if '.' in field.source:
+                return None
+            storage = model._meta.get_field(field.source).storage
+            convert = file_url(storage, request) if getattr(field, 'use_url', True) else None
+            converters.append((name, prefix + field.source, convert))
+        elif isinstance(field, serializers.DateTimeField):
+            converters.append((name, prefix + field.source.replace('.', '__'), datetime_converter(field)))
+        else:
+            converters.append((name, prefix + field.source.replace('.', '__'), field.to_representation))
+    return converters
+
+
+def nested_converter(converters, pk_lookup):
+    def convert(row):
+        if row[pk_lookup] is None:
+            return None
+        return render_row(converters, row)
+    convert.lookups = {pk_lookup}
+    return convert
+
+
+def render_row(converters, row):
+    data = {}
+    for name, lookup, convert in converters:
+        if lookup is None:
+            data[name] = convert(row)
+        else:
+            value = row[lookup]
+            data[name] = value if convert is None or value is None else convert(value)
+    return data
+
+
+def converter_lookups(converters):
+    lookups = set()
+    for name, lookup, convert in converters:
+        if lookup is not None:
+            lookups.add(lookup)
+        else:
+            lookups.update(getattr(convert, 'lookups', ()))
+    return lookups
+
+
+class SparseFieldsViewMixin:
+    """
+    Reads ``fields``/``exclude`` from the query string of safe requests and
+    applies them to the serializer and the queryset. ``list`` and
+    ``list_rows`` take the ``.values()`` path when the serializer allows it.
+
+    ``sparse_required_fields`` are always loaded, e.g. the columns a
+    paginator needs.
+    """
+    sparse_required_fields = ()
+
+    def get_sparse_fields(self):
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return {}
+        params = self.request.query_params
+        options = {
+            'fields': split_field_names(params.get('fields')),
+            'exclude': split_field_names(params.get('exclude')),
+        }
+        return {name: value for name, value in options.items() if value is not None}
+
+    def get_serializer(self, *args, **kwargs):
+        for name, value in self.get_sparse_fields().items():
+            kwargs.setdefault(name, value)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        return narrow_queryset(queryset, self.get_serializer(), self.sparse_required_fields)
+
+    def list(self, request, *args, **kwargs):
+        return self.list_rows(self.filter_queryset(self.get_queryset()))
+
+    def list_rows(self, queryset, paginate=True):
+        serializer = self.get_serializer()
+        converters = row_converters(serializer) if settings.FAST_LIST_SERIALIZATION else None
+        if converters is None:
+            queryset = narrow_queryset(queryset, serializer, self.sparse_required_fields)
+            page = self.paginate_queryset(queryset) if paginate else None
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        lookups = converter_lookups(converters) | field_lookups(serializer) | {'pk'} | set(self.sparse_required_fields)
+        rows = queryset.values(*lookups)
+        page = self.paginate_queryset(rows) if paginate else None
+        data = [render_row(converters, row) for row in (rows if page is None else page)]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
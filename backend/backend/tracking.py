@@ -0,0 +1,38 @@
+from django.db import models
+
+
+class TrackedFieldsMixin:
+    """
+    Remembers the field values a model instance was loaded with, so save
+    handlers can tell what changed without reading the row again.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if value is not models.DEFERRED
+        }
+        return instance
+
+    def is_tracked(self, field_name):
+        return field_name in getattr(self, '_loaded_values', {})
+
+    def get_loaded_value(self, field_name):
+        return self._loaded_values[field_name]
+
+    def get_previous_value(self, field_name):
+        """The loaded value when known, otherwise the current one."""
+        if self.is_tracked(field_name):
+            return self.get_loaded_value(field_name)
+        return getattr(self, field_name)
+
+    def has_changed(self, field_name):
+        return self.is_tracked(field_name) and self.get_loaded_value(field_name) != getattr(self, field_name)
+
+    def reset_tracking(self):
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields if field.attname not in deferred
+        }
@@ -0,0 +1,155 @@
+"""
+In-process load harness.
+
+Each simulated client is a ``Session`` around Django's test ``Client``, so
+requests go through the full middleware, authentication, view and
+serializer stack without a server or network in between. Every request is
+recorded with its latency and database query count, and ``run_scenario``
+runs a scenario on several such clients in parallel threads.
+
+Reports are plain dicts, so they can be stored as a JSON baseline and
+compared with a later run. Latency depends on the machine; the query counts
+do not, which makes them the most reliable regression signal.
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import NamedTuple
+
+from django.db import connections
+from django.test import Client
+
+from backend.metrics import RequestRecorder
+from users.serializers import CustomTokenObtainPairSerializer
+
+
+class Sample(NamedTuple):
+    label: str
+    status: int
+    seconds: float
+    queries: int
+
+
+class Session:
+    """One simulated client. ``authenticate`` makes later requests carry that user's token."""
+
+    def __init__(self):
+        self.client = Client(raise_request_exception=False)
+        self.samples = []
+        self.token = None
+
+    def authenticate(self, user):
+        self.token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+
+    def logout(self):
+        self.token = None
+
+    def record(self, label, send):
+        recorder = RequestRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = send()
+        self.samples.append(Sample(label, response.status_code, time.perf_counter() - started, recorder.queries))
+        return response
+
+    def headers(self):
+        return {'Authorization': f'Bearer {self.token}'} if self.token else {}
+
+    def get(self, label, path):
+        return self.record(label, lambda: self.client.get(path, headers=self.headers()))
+
+    def post(self, label, path, data=None):
+        return self.record(
+            label, lambda: self.client.post(path, data or {}, content_type='application/json', headers=self.headers()),
+        )
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(samples, elapsed=None):
+    latencies = sorted(sample.seconds * 1000 for sample in samples)
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    summary = {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample.status >= 500),
+        'statuses': dict(sorted(statuses.items())),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'queries_per_request': round(sum(sample.queries for sample in samples) / len(samples), 2) if samples else 0,
+    }
+    if elapsed:
+        summary['throughput_rps'] = round(len(samples) / elapsed, 1)
+    return summary
+
+
+def run_scenario(name, scenario, data, iterations, concurrency, random_seed=0):
+    """Run ``scenario`` ``iterations`` times on each of ``concurrency`` clients."""
+    def client(number):
+        rng = random.Random(f'{random_seed}:{name}:{number}')
+        session = Session()
+        try:
+            for _ in range(iterations):
+                scenario(session, data, rng)
+        finally:
+            connections.close_all()
+        return session.samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = [sample for samples in pool.map(client, range(concurrency)) for sample in samples]
+    elapsed = time.perf_counter() - started
+
+    report = summarize(samples, elapsed)
+    by_label = {}
+    for sample in samples:
+        by_label.setdefault(sample.label, []).append(sample)
+    report['steps'] = {label: summarize(label_samples) for label, label_samples in sorted(by_label.items())}
+    return report
+
+
+def compare(baseline, current, tolerance):
+    """
+    Lines describing how ``current`` differs from ``baseline`` and the subset
+    that are regressions: p95 latency or throughput worse than ``tolerance``
+    (a fraction), or more queries per request.
+    """
+    lines, regressions = [], []
+    for name, report in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            lines.append(f'{name}: not in baseline')
+            continue
+        if before.get('throughput_rps') and report.get('throughput_rps'):
+            change = report['throughput_rps'] / before['throughput_rps'] - 1
+            line = f'{name}: throughput {before["throughput_rps"]} -> {report["throughput_rps"]} req/s ({change:+.0%})'
+            lines.append(line)
+            if change < -tolerance:
+                regressions.append(line)
+        for label, step in report['steps'].items():
+            previous = before['steps'].get(label)
+            if previous is None:
+                continue
+            if previous['p95_ms']:
+                change = step['p95_ms'] / previous['p95_ms'] - 1
+                line = f'  {label}: p95 {previous["p95_ms"]} -> {step["p95_ms"]} ms ({change:+.0%})'
+                lines.append(line)
+                if change > tolerance:
+                    regressions.append(line)
+            if step['queries_per_request'] > previous['queries_per_request'] + 0.5:
+                line = (
+                    f'  {label}: queries per request {previous["queries_per_request"]} -> '
+                    f'{step["queries_per_request"]}'
+                )
+                lines.append(line)
+                regressions.append(line)
+    return lines, regressions
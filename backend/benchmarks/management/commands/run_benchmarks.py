@@ -0,0 +1,108 @@
+import json
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from achievements.models import Achievement
+from benchmarks.harness import compare, run_scenario
+from benchmarks.scenarios import SCENARIOS, load_data
+from benchmarks.seed import SEED_PREFIX
+from users.models import User
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the benchmark scenarios in-process against the seeded data and report throughput, '
+        'p50/p95/p99 latency and queries per request, optionally against a stored baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', choices=sorted(SCENARIOS),
+            help='Scenario to run (repeatable; default: all).',
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Iterations per simulated client.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Simulated clients running in parallel.')
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument('--no-cache', action='store_true', help='Disable the response cache for the run.')
+        parser.add_argument('--compare', nargs='?', const=str(DEFAULT_BASELINE), help='Baseline JSON to compare with.')
+        parser.add_argument('--save-baseline', nargs='?', const=str(DEFAULT_BASELINE), help='Write the report here.')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95/throughput change (fraction).')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit non-zero on regressions.')
+
+    def handle(self, *args, **options):
+        data = load_data()
+        if data is None:
+            raise CommandError('No benchmark data; run "python manage.py seed_benchmark_data" first.')
+
+        names = options['scenario'] or list(SCENARIOS)
+        overrides = {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver']}
+        if options['no_cache']:
+            overrides['RESPONSE_CACHE'] = {**settings.RESPONSE_CACHE, 'ENABLED': False}
+
+        report = {'meta': self.describe(options), 'scenarios': {}}
+        with override_settings(**overrides):
+            for name in names:
+                result = run_scenario(
+                    name, SCENARIOS[name], data, options['iterations'], options['concurrency'], options['random_seed'],
+                )
+                report['scenarios'][name] = result
+                self.print_result(name, result)
+
+        if options['compare']:
+            self.compare(report, Path(options['compare']), options)
+        if options['save_baseline']:
+            path = Path(options['save_baseline'])
+            path.write_text(json.dumps(report, indent=2) + '\n')
+            self.stdout.write(f'Saved baseline to {path}.')
+
+    def describe(self, options):
+        return {
+            'created_at': timezone.now().isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'students': User.objects.filter(student_id__startswith=SEED_PREFIX, role='student').count(),
+            'achievements': Achievement.objects.filter(student__student_id__startswith=SEED_PREFIX).count(),
+            'iterations': options['iterations'],
+            'concurrency': options['concurrency'],
+            'response_cache': settings.RESPONSE_CACHE['ENABLED'] and not options['no_cache'],
+        }
+
+    def print_result(self, name, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{name}: {result["requests"]} requests, {result["throughput_rps"]} req/s, '
+            f'{result["errors"]} errors, statuses {result["statuses"]}'
+        ))
+        self.stdout.write(f'  {"step":<32} {"n":>5} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8}')
+        for label, step in result['steps'].items():
+            self.stdout.write(
+                f'  {label:<32} {step["requests"]:>5} {step["p50_ms"]:>8} {step["p95_ms"]:>8} '
+                f'{step["p99_ms"]:>8} {step["queries_per_request"]:>8}'
+            )
+
+    def compare(self, report, path, options):
+        if not path.exists():
+            raise CommandError(f'Baseline {path} does not exist; create it with --save-baseline.')
+        baseline = json.loads(path.read_text())
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Compared with {path} ({baseline["meta"]["created_at"]}):'))
+        for key in ('database', 'students', 'iterations', 'concurrency', 'response_cache'):
+            if baseline['meta'].get(key) != report['meta'][key]:
+                self.stdout.write(self.style.WARNING(
+                    f'  {key} differs: baseline {baseline["meta"].get(key)}, now {report["meta"][key]}'
+                ))
+        lines, regressions = compare(baseline, report, options['tolerance'])
+        for line in lines:
+            self.stdout.write(self.style.ERROR(line) if line in regressions else line)
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+        elif options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regression(s) against the baseline.')
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(regressions)} regression(s) against the baseline.'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import seed
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Seed reproducible users, profiles, achievements and notifications for the benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000, help='Student accounts (each with a profile).')
+        parser.add_argument('--coordinators', type=int, default=10, help='Coordinator accounts.')
+        parser.add_argument('--achievements-per-student', type=float, default=6, help='Mean achievements per student.')
+        parser.add_argument('--random-seed', type=int, default=0, help='Same seed, same data.')
+        parser.add_argument('--reset', action='store_true', help='Delete previously seeded data first.')
+        parser.add_argument('--clear', action='store_true', help='Only delete previously seeded data.')
+
+    def handle(self, *args, **options):
+        if options['reset'] or options['clear']:
+            deleted = seed.clear()
+            self.stdout.write(f'Deleted {deleted} seeded rows.')
+            if options['clear']:
+                return
+        elif User.objects.filter(student_id__startswith=seed.SEED_PREFIX).exists():
+            raise CommandError('Benchmark data already exists; pass --reset to replace it.')
+
+        counts = seed.seed(
+            students=options['students'],
+            coordinators=options['coordinators'],
+            achievements_per_student=options['achievements_per_student'],
+            random_seed=options['random_seed'],
+        )
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary}.'))
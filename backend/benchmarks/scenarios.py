@@ -0,0 +1,101 @@
+"""
+Benchmark scenarios: what one simulated user does in one iteration.
+
+Each scenario is a function ``(session, data, rng)`` that issues a short
+sequence of requests, labelling every request so the report can break
+latency and query counts down per step. ``rng`` is seeded per client, so a
+run with the same data and options issues the same requests.
+"""
+from dataclasses import dataclass
+
+from achievements.models import Achievement
+from profiles.models import StudentProfile
+from users.models import User
+
+from .seed import CATEGORIES, SEED_PASSWORD, SEED_PREFIX
+
+SAMPLE_SIZE = 2000
+SEARCH_TERMS = ['hackathon', 'scholarship', 'marathon', 'research paper', 'volunteer']
+
+
+@dataclass
+class BenchmarkData:
+    students: list
+    coordinators: list
+    profile_ids: list
+    achievement_ids: list
+
+
+def load_data():
+    """Seeded accounts and a sample of their rows, or None if nothing was seeded."""
+    seeded = User.objects.filter(student_id__startswith=SEED_PREFIX).order_by('pk')
+    students = list(seeded.filter(role='student')[:SAMPLE_SIZE])
+    coordinators = list(seeded.filter(role='coordinator'))
+    if not students or not coordinators:
+        return None
+    return BenchmarkData(
+        students=students,
+        coordinators=coordinators,
+        profile_ids=list(
+            StudentProfile.objects.filter(user__student_id__startswith=SEED_PREFIX)
+            .order_by('pk').values_list('pk', flat=True)[:SAMPLE_SIZE]
+        ),
+        achievement_ids=list(
+            Achievement.objects.filter(student__student_id__startswith=SEED_PREFIX)
+            .order_by('pk').values_list('pk', flat=True)[:SAMPLE_SIZE]
+        ),
+    )
+
+
+def public_browsing(session, data, rng):
+    """An anonymous visitor browsing achievements and profiles."""
+    session.logout()
+    session.get('achievements.list', '/api/achievements/list/?status=verified')
+    session.get('achievements.list.category', f'/api/achievements/list/?status=verified&category={rng.choice(list(CATEGORIES))}')
+    session.get('achievements.list.page', f'/api/achievements/list/?status=verified&page={rng.randint(2, 5)}')
+    session.get('achievements.search', f'/api/achievements/list/?search={rng.choice(SEARCH_TERMS)}')
+    session.get('achievements.retrieve', f'/api/achievements/list/{rng.choice(data.achievement_ids)}/')
+    session.get('profiles.list', f'/api/profiles/?page={rng.randint(1, 5)}')
+    session.get('profiles.retrieve', f'/api/profiles/{rng.choice(data.profile_ids)}/')
+
+
+def student_dashboard(session, data, rng):
+    """A student opening their dashboard."""
+    session.authenticate(rng.choice(data.students))
+    session.get('auth.me', '/api/auth/me/')
+    session.get('profiles.me', '/api/profiles/me/')
+    session.get('achievements.my_achievements', '/api/achievements/list/my_achievements/')
+    session.get('notifications.unread_count', '/api/achievements/notifications/unread_count/')
+    session.get('notifications.list', '/api/achievements/notifications/')
+
+
+def coordinator_review(session, data, rng):
+    """A coordinator working through the review queue."""
+    session.authenticate(rng.choice(data.coordinators))
+    response = session.get('achievements.pending', '/api/achievements/list/pending/?pagination=cursor&page_size=20')
+    pending = response.json().get('results', []) if response.status_code == 200 else []
+    if pending:
+        achievement = rng.choice(pending)
+        session.post('achievements.verify', f'/api/achievements/list/{achievement["id"]}/verify/', {
+            'status': rng.choice(['verified', 'verified', 'verified', 'rejected']),
+            'verification_notes': 'Checked during benchmark',
+        })
+    session.get('achievements.stats', '/api/achievements/list/stats/')
+
+
+def login_storm(session, data, rng):
+    """Logins, about one in ten with an unknown student ID."""
+    session.logout()
+    if rng.random() < 0.1:
+        student_id = f'nobody{rng.randint(0, 9999)}'
+    else:
+        student_id = rng.choice(data.students).student_id
+    session.post('auth.login', '/api/auth/login/', {'student_id': student_id, 'password': SEED_PASSWORD})
+
+
+SCENARIOS = {
+    'public_browsing': public_browsing,
+    'student_dashboard': student_dashboard,
+    'coordinator_review': coordinator_review,
+    'login_storm': login_storm,
+}
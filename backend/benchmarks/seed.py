@@ -0,0 +1,195 @@
+"""
+Reproducible benchmark data.
+
+``seed`` creates students (with profiles), coordinators, achievements and
+notifications whose shape follows what the portal sees in practice: most
+students have a handful of achievements and a few have very many, most
+achievements are verified, a quarter wait for review, and timestamps are
+spread over the last two years. The same ``random_seed`` always produces the
+same data.
+
+Rows are written with ``bulk_create``, so no signals run; the notification
+counters, the statistics rollup and the leaderboard are rebuilt at the end
+instead. Every seeded account's student ID starts with ``SEED_PREFIX``, which
+is how ``clear`` finds them again.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from achievements import leaderboard, stats
+from achievements.models import Achievement, Notification, NotificationCounter
+from backend.response_cache import invalidate_tags, list_tag
+from profiles.models import StudentProfile
+from users.models import User
+
+SEED_PREFIX = 'seed'
+SEED_PASSWORD = 'seed-password'
+BATCH_SIZE = 1000
+HISTORY_DAYS = 730
+
+DEPARTMENTS = {
+    'Computer Science': 30,
+    'Electrical Engineering': 18,
+    'Mechanical Engineering': 15,
+    'Business Administration': 15,
+    'Mathematics': 8,
+    'Physics': 7,
+    'Civil Engineering': 7,
+}
+YEARS = {'1': 30, '2': 27, '3': 23, '4': 20}
+CATEGORIES = {
+    'academic': 25, 'technical': 22, 'sports': 14, 'cultural': 12,
+    'leadership': 9, 'community': 8, 'research': 6, 'other': 4,
+}
+STATUSES = {'verified': 60, 'pending': 25, 'rejected': 15}
+TITLE_WORDS = {
+    'academic': ["Dean's List", 'Merit Scholarship', 'Top of Class', 'Academic Excellence Award'],
+    'technical': ['Hackathon Winner', 'Open Source Contribution', 'Cloud Certification', 'Coding Contest Finalist'],
+    'sports': ['Football Championship', 'Marathon Finisher', 'Chess Tournament', 'Swimming Gold Medal'],
+    'cultural': ['Drama Festival Lead', 'Music Competition', 'Dance Showcase', 'Art Exhibition'],
+    'leadership': ['Student Council President', 'Club Founder', 'Event Organizer', 'Team Captain'],
+    'community': ['Blood Donation Drive', 'Teaching Volunteer', 'Beach Cleanup Organizer', 'NGO Internship'],
+    'research': ['Conference Paper', 'Journal Publication', 'Research Assistantship', 'Poster Award'],
+    'other': ['Language Certificate', 'Photography Prize', 'Debate Finalist', 'Quiz Champion'],
+}
+REJECTION_NOTES = ['Proof document is unreadable.', 'Date does not match the certificate.', 'Duplicate submission.']
+
+
+def weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``bulk_create`` keep the ``created_at``/``updated_at`` values we set."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def clear():
+    """Delete every seeded account and, through cascades, their data."""
+    deleted, _ = User.objects.filter(student_id__startswith=SEED_PREFIX).delete()
+    stats.rebuild()
+    return deleted
+
+
+def seed(students=1000, coordinators=10, achievements_per_student=6, random_seed=0):
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    password = make_password(SEED_PASSWORD)
+    counts = {}
+
+    def moment(days_ago_max=HISTORY_DAYS):
+        return now - timedelta(seconds=rng.randrange(days_ago_max * 86400))
+
+    with transaction.atomic(), explicit_timestamps(StudentProfile, Achievement, Notification):
+        users = [
+            User(
+                username=f'{SEED_PREFIX}c{n:05d}', student_id=f'{SEED_PREFIX}c{n:05d}',
+                email=f'{SEED_PREFIX}c{n:05d}@seed.invalid', role='coordinator',
+                first_name='Coordinator', last_name=str(n), password=password, date_joined=moment(),
+            )
+            for n in range(coordinators)
+        ]
+        users += [
+            User(
+                username=f'{SEED_PREFIX}{n:06d}', student_id=f'{SEED_PREFIX}{n:06d}',
+                email=f'{SEED_PREFIX}{n:06d}@seed.invalid', role='student',
+                first_name=f'Student{n}', last_name=rng.choice(['Sharma', 'Patel', 'Khan', 'Garcia', 'Smith', 'Chen']),
+                password=password, date_joined=moment(),
+            )
+            for n in range(students)
+        ]
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        seeded = dict(User.objects.filter(student_id__startswith=SEED_PREFIX).values_list('student_id', 'pk'))
+        coordinator_ids = [seeded[f'{SEED_PREFIX}c{n:05d}'] for n in range(coordinators)]
+        student_ids = [seeded[f'{SEED_PREFIX}{n:06d}'] for n in range(students)]
+        counts['users'] = len(users)
+
+        profiles = []
+        for user_id in student_ids:
+            created_at = moment()
+            profiles.append(StudentProfile(
+                user_id=user_id,
+                department=weighted(rng, DEPARTMENTS),
+                year=weighted(rng, YEARS),
+                cgpa=Decimal(str(round(min(10.0, max(4.0, rng.gauss(7.4, 1.1))), 2))),
+                bio=f'Interested in {weighted(rng, CATEGORIES)} and {weighted(rng, CATEGORIES)} activities.',
+                created_at=created_at, updated_at=created_at,
+            ))
+        StudentProfile.objects.bulk_create(profiles, batch_size=BATCH_SIZE)
+        counts['profiles'] = len(profiles)
+
+        achievements = []
+        for user_id in student_ids:
+            # Exponential spread: many students with a few achievements, a long tail with many.
+            for _ in range(min(int(rng.expovariate(1 / achievements_per_student)), 20 * achievements_per_student)):
+                category = weighted(rng, CATEGORIES)
+                status = weighted(rng, STATUSES)
+                created_at = moment()
+                reviewed = status != 'pending'
+                achievements.append(Achievement(
+                    student_id=user_id,
+                    title=f'{rng.choice(TITLE_WORDS[category])} {created_at.year}',
+                    description=' '.join(rng.choice(TITLE_WORDS[category]) for _ in range(rng.randint(5, 40))),
+                    category=category,
+                    status=status,
+                    achievement_date=(created_at - timedelta(days=rng.randint(0, 60))).date(),
+                    verified_by_id=rng.choice(coordinator_ids) if reviewed and coordinator_ids else None,
+                    verification_notes=rng.choice(REJECTION_NOTES) if status == 'rejected' else '',
+                    created_at=created_at,
+                    updated_at=min(now, created_at + timedelta(days=rng.randint(1, 14))) if reviewed else created_at,
+                ))
+        Achievement.objects.bulk_create(achievements, batch_size=BATCH_SIZE)
+        counts['achievements'] = len(achievements)
+
+        reviewed = (
+            Achievement.objects.filter(student__student_id__startswith=SEED_PREFIX).exclude(status='pending')
+            .order_by('pk').values_list('pk', 'student_id', 'title', 'status', 'verification_notes', 'updated_at')
+        )
+        notifications = [
+            Notification(
+                user_id=student_id, achievement_id=pk,
+                message=Notification.status_change_message(title, status, notes),
+                is_read=rng.random() < 0.7, created_at=updated_at,
+            )
+            for pk, student_id, title, status, notes, updated_at in reviewed.iterator(chunk_size=BATCH_SIZE)
+        ]
+        Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+        counts['notifications'] = len(notifications)
+
+        unread = {}
+        for notification in notifications:
+            if not notification.is_read:
+                unread[notification.user_id] = unread.get(notification.user_id, 0) + 1
+        NotificationCounter.objects.bulk_create([
+            NotificationCounter(user_id=user_id, unread=unread.get(user_id, 0)) for user_id in student_ids
+        ], batch_size=BATCH_SIZE)
+
+    stats.rebuild()
+    leaderboard.rebuild()
+    # Cached lists that may now be missing rows; per-student lists of seeded
+    # students cannot have been cached before they existed.
+    invalidate_tags('profiles', [list_tag({})])
+    invalidate_tags('achievements', {
+        list_tag({'status': status, 'category': category}) for status in STATUSES for category in CATEGORIES
+    } | {list_tag({'status': status}) for status in STATUSES} | {
+        list_tag({'category': category}) for category in CATEGORIES
+    } | {list_tag({})})
+    return counts
@@ -0,0 +1,15 @@
+"""
+gunicorn settings: ``cd backend && gunicorn -c gunicorn.conf.py``.
+
+uvicorn workers serve the ASGI application, so an idle notification stream
+holds no thread. Django runs each request's sync views and middleware in a
+thread of its own, so a request that waits (a login hashing its password, a
+slow export) does not hold up the others or the streams.
+"""
+import os
+
+wsgi_app = 'backend.asgi:application'
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'uvicorn.workers.UvicornWorker'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
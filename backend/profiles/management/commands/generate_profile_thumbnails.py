@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from profiles.models import StudentProfile
+from profiles.thumbnails import generate_variants
+
+
+def generate(profile_id, force):
+    try:
+        generate_variants(profile_id, force=force)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Generate missing or stale profile picture thumbnails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Parallel threads (default: CPU count).')
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that look up to date.')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or os.cpu_count() or 1
+        profile_ids = list(
+            StudentProfile.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+            .values_list('pk', flat=True)
+        )
+        failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(generate, pk, options['force']): pk for pk in profile_ids}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'Profile {futures[future]}: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {len(profile_ids)} profile pictures ({failed} failed).'
+        ))
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:40
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The SQL is frozen here rather than built by backend/search.py, so later
+# changes to that module cannot rewrite what this migration did.
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    CREATE OR REPLACE FUNCTION profiles_studentprofile_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := setweight(to_tsvector('english', coalesce(NEW.bio, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(NEW.department, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER profiles_studentprofile_search_vector_update
+    BEFORE INSERT OR UPDATE ON profiles_studentprofile
+    FOR EACH ROW EXECUTE FUNCTION profiles_studentprofile_search_vector()
+    """,
+    'CREATE INDEX profiles_studentprofile_search_idx ON profiles_studentprofile USING gin (search_vector)',
+    'CREATE INDEX profiles_studentprofile_bio_trgm_idx ON profiles_studentprofile USING gin (bio gin_trgm_ops)',
+    'UPDATE profiles_studentprofile SET bio = bio',
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS profiles_studentprofile_bio_trgm_idx',
+    'DROP INDEX IF EXISTS profiles_studentprofile_search_idx',
+    'DROP TRIGGER IF EXISTS profiles_studentprofile_search_vector_update ON profiles_studentprofile',
+    'DROP FUNCTION IF EXISTS profiles_studentprofile_search_vector()',
+]
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE profiles_studentprofile_fts USING fts5("
+    "bio, department, content='profiles_studentprofile', content_rowid='id')",
+    """
+    CREATE TRIGGER profiles_studentprofile_fts_insert AFTER INSERT ON profiles_studentprofile BEGIN
+        INSERT INTO profiles_studentprofile_fts(rowid, bio, department) VALUES (new.id, new.bio, new.department);
+    END
+    """,
+    """
+    CREATE TRIGGER profiles_studentprofile_fts_delete AFTER DELETE ON profiles_studentprofile BEGIN
+        INSERT INTO profiles_studentprofile_fts(profiles_studentprofile_fts, rowid, bio, department)
+        VALUES ('delete', old.id, old.bio, old.department);
+    END
+    """,
+    """
+    CREATE TRIGGER profiles_studentprofile_fts_update AFTER UPDATE ON profiles_studentprofile BEGIN
+        INSERT INTO profiles_studentprofile_fts(profiles_studentprofile_fts, rowid, bio, department)
+        VALUES ('delete', old.id, old.bio, old.department);
+        INSERT INTO profiles_studentprofile_fts(rowid, bio, department) VALUES (new.id, new.bio, new.department);
+    END
+    """,
+    "INSERT INTO profiles_studentprofile_fts(profiles_studentprofile_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS profiles_studentprofile_fts_insert',
+    'DROP TRIGGER IF EXISTS profiles_studentprofile_fts_delete',
+    'DROP TRIGGER IF EXISTS profiles_studentprofile_fts_update',
+    'DROP TABLE IF EXISTS profiles_studentprofile_fts',
+]
+
+
+def run(schema_editor, postgres, sqlite):
+    statements = {'postgresql': postgres, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    run(schema_editor, POSTGRES_FORWARD, SQLITE_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    run(schema_editor, POSTGRES_BACKWARD, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_remove_student_id_from_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# 0005_picture_variants added a column with a default, which SQLite does by
+# rebuilding the table; that dropped the FTS5 sync triggers created in 0004.
+# PostgreSQL keeps triggers across ALTER TABLE, so this only runs on SQLite.
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER IF NOT EXISTS profiles_studentprofile_fts_insert AFTER INSERT ON profiles_studentprofile BEGIN
+        INSERT INTO profiles_studentprofile_fts(rowid, bio, department) VALUES (new.id, new.bio, new.department);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS profiles_studentprofile_fts_delete AFTER DELETE ON profiles_studentprofile BEGIN
+        INSERT INTO profiles_studentprofile_fts(profiles_studentprofile_fts, rowid, bio, department)
+        VALUES ('delete', old.id, old.bio, old.department);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS profiles_studentprofile_fts_update AFTER UPDATE ON profiles_studentprofile BEGIN
+        INSERT INTO profiles_studentprofile_fts(profiles_studentprofile_fts, rowid, bio, department)
+        VALUES ('delete', old.id, old.bio, old.department);
+        INSERT INTO profiles_studentprofile_fts(rowid, bio, department) VALUES (new.id, new.bio, new.department);
+    END
+    """,
+    # Index the rows written while the triggers were missing.
+    "INSERT INTO profiles_studentprofile_fts(profiles_studentprofile_fts) VALUES ('rebuild')",
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SQLITE_FORWARD:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_picture_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
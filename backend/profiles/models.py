@@ -1,13 +1,17 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth import get_user_model
 from django.core.validators import MinLengthValidator
+from backend.tracking import TrackedFieldsMixin
 
 User = get_user_model()
 
 
-class StudentProfile(models.Model):
+class StudentProfile(TrackedFieldsMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     profile_picture = models.ImageField(upload_to='profile_pictures/', null=True, blank=True)
+    # Thumbnail file names, filled in the background (see profiles/thumbnails.py).
+    picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(blank=True)
     department = models.CharField(max_length=25, blank=True)
     year = models.CharField(max_length=4, blank=True)
@@ -17,6 +21,8 @@ class StudentProfile(models.Model):
     github_url = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL (see backend/search.py).
+    search_vector = SearchVectorField(null=True, editable=False)
 
     @property
     def student_id(self):
@@ -0,0 +1,51 @@
+"""
+A student's public portfolio: profile, verified achievements grouped by
+category and per-category counts, built with two queries.
+
+Responses are cached in the ``profiles`` namespace under ``portfolio_tag``,
+keyed by the student's user id so achievement writes (which only know the
+student) can invalidate them without looking the profile up.
+"""
+from django.db import transaction
+from django.db.models import Prefetch
+
+from achievements.models import Achievement
+from achievements.serializers import AchievementSerializer
+from backend.response_cache import invalidate_tags
+from .models import StudentProfile
+from .serializers import StudentProfileSerializer
+
+
+def portfolio_tag(user_id):
+    return f'portfolio:{user_id}'
+
+
+def invalidate_portfolio(user_id):
+    transaction.on_commit(lambda: invalidate_tags('profiles', [portfolio_tag(user_id)]))
+
+
+def portfolio_queryset():
+    verified = (
+        Achievement.objects.filter(status='verified')
+        .select_related('verified_by')
+        .defer('search_vector')
+        .order_by('-created_at', '-id')
+    )
+    # The reverse relation sets achievement.student to the prefetched user,
+    # so the serializer's student fields need no further queries.
+    return StudentProfile.objects.select_related('user').prefetch_related(
+        Prefetch('user__achievements', queryset=verified, to_attr='portfolio_achievements')
+    )
+
+
+def build_portfolio(profile, context):
+    achievements = AchievementSerializer(profile.user.portfolio_achievements, many=True, context=context).data
+    grouped = {}
+    for achievement in achievements:
+        grouped.setdefault(achievement['category'], []).append(achievement)
+    return {
+        'profile': StudentProfileSerializer(profile, context=context).data,
+        'achievements': {category: grouped[category] for category, _ in Achievement.CATEGORY_CHOICES if category in grouped},
+        'counts': {category: len(grouped.get(category, [])) for category, _ in Achievement.CATEGORY_CHOICES},
+        'total': len(achievements),
+    }
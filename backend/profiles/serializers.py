@@ -1,23 +1,56 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import StudentProfile
 from users.serializers import UserSerializer
+from backend.metrics import TimedSerializerMixin
+from backend.sparse_fields import SparseFieldsSerializerMixin
 
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     student_id = serializers.CharField(source='user.student_id', read_only=True)
     email = serializers.CharField(source='user.email', read_only=True)
     full_name = serializers.SerializerMethodField()
+    profile_picture_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = StudentProfile
         fields = [
             'id', 'user', 'student_id', 'email', 'full_name',
-            'profile_picture', 'bio', 'department',
+            'profile_picture', 'profile_picture_variants', 'bio', 'department',
             'year', 'cgpa', 'phone', 'linkedin_url', 'github_url',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'student_id', 'created_at', 'updated_at']
 
+    field_lookups = {
+        'full_name': ['user__first_name', 'user__last_name', 'user__student_id'],
+        'profile_picture_variants': ['profile_picture', 'picture_variants'],
+    }
+
+    def get_profile_picture_variants(self, obj):
+        return self.variant_urls(obj.profile_picture.name, obj.picture_variants)
+
+    def get_profile_picture_variants_from_row(self, row):
+        return self.variant_urls(row['profile_picture'], row['picture_variants'])
+
+    def variant_urls(self, picture, variants):
+        # Variants of an older picture are never served for a new one; until
+        # the new ones are ready clients fall back to profile_picture.
+        variants = variants or {}
+        if not picture or variants.get('source') != picture:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for size, formats in variants['sizes'].items():
+            urls[size] = {}
+            for extension, name in formats.items():
+                url = default_storage.url(name)
+                urls[size][extension] = request.build_absolute_uri(url) if request else url
+        return urls
+
     def get_full_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}".strip() or obj.user.student_id
+
+    def get_full_name_from_row(self, row):
+        return f"{row['user__first_name']} {row['user__last_name']}".strip() or row['user__student_id']
@@ -1,12 +1,66 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from backend.response_cache import invalidate_object
+from achievements import leaderboard
+from achievements import stats as achievement_stats
 from .models import StudentProfile
+from .portfolio import invalidate_portfolio
+from tasks.queue import enqueue
+from . import tasks as profile_tasks
 
 User = get_user_model()
 
 
 @receiver(post_save, sender=User)
 def create_student_profile(sender, instance, created, **kwargs):
+    # In the registering transaction, so a student never exists without one.
     if created and instance.role == 'student':
         StudentProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def user_profile_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no profile response shows.
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    profiles = StudentProfile.objects.filter(user=instance)
+    pks = list(profiles.values_list('pk', flat=True))
+    # Profile responses embed the user, so their ETags must change with it.
+    profiles.update(updated_at=timezone.now())
+    for pk in pks:
+        invalidate_object('profiles', pk)
+    if pks:
+        invalidate_portfolio(instance.pk)
+
+
+@receiver(post_save, sender=StudentProfile)
+def profile_saved(sender, instance, created, **kwargs):
+    invalidate_object('profiles', instance.pk)
+    invalidate_portfolio(instance.user_id)
+
+    if (created and instance.profile_picture) or instance.has_changed('profile_picture'):
+        enqueue(
+            profile_tasks.generate_thumbnails, {'profile_id': instance.pk},
+            idempotency_key=f'thumbnails:{instance.pk}:{instance.profile_picture.name}',
+        )
+
+    if not created and (instance.has_changed('department') or instance.has_changed('year')):
+        achievement_stats.move_student(
+            instance.user_id,
+            (instance.get_loaded_value('department'), instance.get_loaded_value('year')),
+            (instance.department, instance.year),
+        )
+
+    if created or any(instance.has_changed(name) for name in ('department', 'year', 'cgpa')):
+        leaderboard.update_profile(instance)
+
+    instance.reset_tracking()
+
+
+@receiver(post_delete, sender=StudentProfile)
+def profile_deleted(sender, instance, **kwargs):
+    invalidate_object('profiles', instance.pk)
+    invalidate_portfolio(instance.user_id)
+    leaderboard.remove(instance.user_id)
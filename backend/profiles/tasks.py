@@ -0,0 +1,8 @@
+from tasks.queue import task
+
+from .thumbnails import generate_variants
+
+
+@task(retry_delay=30, atomic=False)
+def generate_thumbnails(profile_id):
+    generate_variants(profile_id)
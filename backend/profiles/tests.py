@@ -0,0 +1,151 @@
+import hashlib
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from achievements.models import Achievement
+from users.models import User
+from .models import StudentProfile
+from .thumbnails import VARIANT_DIR, generate_variants, variant_names
+
+
+# TestCase rows are never committed, so API reads must not go to a replica.
+@override_settings(
+    RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False},
+    DATABASE_REPLICAS={**settings.DATABASE_REPLICAS, 'ALIASES': []},
+)
+class ProfileSearchTests(TestCase):
+    def test_new_and_edited_profiles_are_found_after_migrate(self):
+        user = User.objects.create_user(student_id='S001', username='S001', email='s001@example.com', password='pw')
+        profile = user.profile
+        profile.bio, profile.department = 'Robotics club captain', 'Mechanical'
+        profile.save()
+        client = APIClient()
+
+        response = client.get('/api/profiles/', {'search': 'robotics'})
+        self.assertEqual([row['id'] for row in response.data['results']], [profile.pk])
+
+        profile.bio = 'Debate society'
+        profile.save()
+        self.assertEqual(client.get('/api/profiles/', {'search': 'robotics'}).data['results'], [])
+        response = client.get('/api/profiles/', {'search': 'debate'})
+        self.assertEqual([row['id'] for row in response.data['results']], [profile.pk])
+
+
+@override_settings(DATABASE_REPLICAS={**settings.DATABASE_REPLICAS, 'ALIASES': []})
+class StudentProfileCreationTests(TestCase):
+    def test_registration_creates_the_profile(self):
+        response = APIClient().post('/api/auth/register/', {
+            'student_id': 'S001', 'email': 's001@example.com', 'password': 'pw-123456', 'role': 'student',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(StudentProfile.objects.filter(user_id=response.data['id']).exists())
+
+    def test_me_does_not_write(self):
+        user = User.objects.create_user(student_id='S001', username='S001', email='s001@example.com', password='pw')
+        StudentProfile.objects.filter(user=user).delete()
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/profiles/me/')
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+        self.assertFalse(StudentProfile.objects.filter(user=user).exists())
+
+
+
+@override_settings(DATABASE_REPLICAS={**settings.DATABASE_REPLICAS, 'ALIASES': []})
+class PortfolioTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(student_id='S001', username='S001', email='s001@example.com', password='pw')
+        coordinator = User.objects.create_user(
+            student_id='C001', username='C001', email='c001@example.com', password='pw', role='coordinator',
+        )
+        for title, category in [('Hackathon', 'technical'), ('Olympiad', 'academic'), ('Robotics', 'technical')]:
+            Achievement.objects.create(
+                student=self.user, title=title, description='', category=category, status='verified',
+                verified_by=coordinator,
+            )
+        self.pending = Achievement.objects.create(student=self.user, title='Chess', description='', category='sports')
+        self.url = f'/api/profiles/portfolio/{self.user.pk}/'
+
+    def test_portfolio_is_two_queries_then_cached(self):
+        client = APIClient()
+        with self.assertNumQueries(2):
+            response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['counts']['technical'], 2)
+        self.assertEqual(response.data['achievements']['technical'][0]['verified_by_name'], 'C001')
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get(self.url).data, response.data)
+
+    def test_achievement_changes_invalidate_the_portfolio(self):
+        client = APIClient()
+        self.assertEqual(client.get(self.url).data['total'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending.status = 'verified'
+            self.pending.save()
+        response = client.get(self.url)
+        self.assertEqual((response.data['total'], response.data['counts']['sports']), (4, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending.delete()
+        self.assertEqual(client.get(self.url).data['total'], 3)
+
+def png(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (300, 200), color).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(
+    RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False},
+    DATABASE_REPLICAS={**settings.DATABASE_REPLICAS, 'ALIASES': []},
+)
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        user = User.objects.create_user(student_id='S001', username='S001', email='s001@example.com', password='pw')
+        self.profile = user.profile
+
+    def upload(self, color):
+        # Loaded fresh, as by the API, so the picture change is detected.
+        self.profile = StudentProfile.objects.get(pk=self.profile.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.profile_picture.save('me.png', png(color))
+        self.profile.refresh_from_db()
+        return variant_names(self.profile.picture_variants)
+
+    def test_variant_names_hash_their_content(self):
+        names = self.upload('red')
+        self.assertEqual(self.profile.picture_variants['source'], self.profile.profile_picture.name)
+        self.assertEqual(len(names), 6)
+        for name in names:
+            with default_storage.open(name, 'rb') as variant:
+                digest = hashlib.sha256(variant.read()).hexdigest()[:12]
+            self.assertRegex(name, rf'^{VARIANT_DIR}/me[^/]*-\d+\.{digest}\.(webp|jpeg)$')
+
+        generate_variants(self.profile.pk, force=True)
+        self.profile.refresh_from_db()
+        self.assertEqual(variant_names(self.profile.picture_variants), names)
+
+    def test_a_new_picture_gets_new_variants(self):
+        old = self.upload('red')
+        new = self.upload('blue')
+        self.assertTrue(old and new)
+        self.assertFalse(old & new)
+        self.assertTrue(all(default_storage.exists(name) for name in new))
+        self.assertFalse(any(default_storage.exists(name) for name in old))
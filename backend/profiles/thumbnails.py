@@ -0,0 +1,75 @@
+"""
+Profile picture thumbnails.
+
+After a picture is uploaded, a background task (profiles.tasks) renders
+square variants of it in every configured size and format. Variant file
+names contain a hash of their content, so they can be served with a
+far-future, immutable cache lifetime: a new picture always gets new URLs.
+The names are stored in ``StudentProfile.picture_variants`` as
+``{'source': picture, 'sizes': {size: {format: name}}}``.
+"""
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from backend.response_cache import invalidate_object
+from .models import StudentProfile
+from .portfolio import invalidate_portfolio
+
+VARIANT_DIR = 'profile_pictures/thumbs'
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def render_variants(picture_name):
+    """Render and store every variant of ``picture_name``; returns their names."""
+    config = settings.PROFILE_THUMBNAILS
+    with default_storage.open(picture_name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image = image.convert('RGB')
+
+    stem = os.path.splitext(os.path.basename(picture_name))[0]
+    variants = {}
+    for size_name, size in config['SIZES'].items():
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for extension in config['FORMATS']:
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, PIL_FORMATS[extension], quality=config['QUALITY'], optimize=True)
+            content = buffer.getvalue()
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            name = f'{VARIANT_DIR}/{stem}-{size}.{digest}.{extension}'
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(content))
+            variants.setdefault(size_name, {})[extension] = name
+    return variants
+
+
+def variant_names(picture_variants):
+    return {name for formats in picture_variants.get('sizes', {}).values() for name in formats.values()}
+
+
+def generate_variants(profile_id, force=False):
+    """Bring a profile's variants up to date with its current picture."""
+    profile = StudentProfile.objects.filter(pk=profile_id).only('user_id', 'profile_picture', 'picture_variants').first()
+    if profile is None:
+        return
+    picture = profile.profile_picture.name or ''
+    previous = profile.picture_variants or {}
+    if previous.get('source') == picture and not force:
+        return
+
+    variants = {'source': picture, 'sizes': render_variants(picture)} if picture else {}
+    # Only store the result if the picture was not replaced meanwhile.
+    updated = StudentProfile.objects.filter(pk=profile_id, profile_picture=picture).update(
+        picture_variants=variants, updated_at=timezone.now(),
+    )
+    if updated:
+        invalidate_object('profiles', profile_id)
+        invalidate_portfolio(profile.user_id)
+        for name in variant_names(previous) - variant_names(variants):
+            default_storage.delete(name)
@@ -1,33 +1,59 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import StudentProfile
+from .portfolio import build_portfolio, portfolio_queryset, portfolio_tag
 from .serializers import StudentProfileSerializer
 from .permissions import IsOwnerOrReadOnly
+from backend.conditional import ConditionalRequestMixin
+from backend.db_routing import ReplicaReadMixin
+from backend.response_cache import ResponseCacheMixin
+from backend.search import profile_index
+from backend.sparse_fields import SparseFieldsViewMixin
 
 
-class StudentProfileViewSet(viewsets.ModelViewSet):
+class StudentProfileViewSet(ReplicaReadMixin, ResponseCacheMixin, ConditionalRequestMixin, SparseFieldsViewMixin,
+                            viewsets.ModelViewSet):
     queryset = StudentProfile.objects.select_related('user').all()
     serializer_class = StudentProfileSerializer
+    cache_namespace = 'profiles'
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'portfolio']:
             permission_classes = [permissions.AllowAny]
         else:
             permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
         return [permission() for permission in permission_classes]
 
+    def get_queryset(self):
+        queryset = StudentProfile.objects.select_related('user').all()
+
+        search = self.request.query_params.get('search', None)
+        if search and self.action == 'list':
+            queryset = profile_index.search(queryset, search)
+
+        return queryset
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
         try:
-            profile = StudentProfile.objects.get(user=request.user)
-            serializer = self.get_serializer(profile)
-            return Response(serializer.data)
+            profile = StudentProfile.objects.get(user_id=request.user.id)
         except StudentProfile.DoesNotExist:
             return Response(
                 {'error': 'Profile not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        serializer = self.get_serializer(profile)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path=r'portfolio/(?P<user_id>\d+)')
+    def portfolio(self, request, user_id):
+        return self.cached_response(portfolio_tag(user_id), self.render_portfolio, request, user_id)
+
+    def render_portfolio(self, request, user_id):
+        profile = get_object_or_404(portfolio_queryset(), user_id=user_id)
+        return Response(build_portfolio(profile, self.get_serializer_context()))
 
     def perform_update(self, serializer):
         serializer.save()
@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'idempotency_key']
+    readonly_fields = ['attempts', 'locked_by', 'lease_expires_at', 'last_error', 'created_at', 'updated_at', 'finished_at']
+    actions = ['retry_tasks']
+
+    @admin.action(description='Retry selected failed tasks')
+    def retry_tasks(self, request, queryset):
+        retried = queryset.filter(status='failed').update(
+            status='queued', attempts=0, run_at=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f'{retried} task(s) queued again.')
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core import checks
+
+
+@checks.register(deploy=True)
+def check_task_backend(app_configs, **kwargs):
+    """In production, side effects must leave the request for a run_tasks worker."""
+    if settings.DEBUG or settings.TASKS['BACKEND'] != 'immediate':
+        return []
+    return [checks.Error(
+        "TASK_BACKEND is 'immediate', so every task (notifications, roster imports, announcement "
+        'delivery, thumbnails) runs in the web process before the response is sent.',
+        hint='Set TASK_BACKEND=database and run `manage.py run_tasks` next to the web service.',
+        id='tasks.E001',
+    )]
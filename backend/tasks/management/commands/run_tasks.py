@@ -0,0 +1,47 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.queue import purge_finished, work
+
+PURGE_EVERY = 3600
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, help='Worker threads (default: TASKS["CONCURRENCY"]).')
+        parser.add_argument('--poll-interval', type=float, help='Seconds to sleep when no task is due.')
+        parser.add_argument('--once', action='store_true', help='Exit once no task is due.')
+
+    def handle(self, *args, **options):
+        config = settings.TASKS
+        concurrency = options['concurrency'] or config['CONCURRENCY']
+        poll_interval = options['poll_interval'] or config['POLL_INTERVAL']
+
+        stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                # Finish the running tasks, then exit.
+                signal.signal(signum, lambda *args: stop.set())
+
+        threads = [
+            threading.Thread(target=work, args=(stop, poll_interval, options['once']), name=f'task-worker-{n}')
+            for n in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f'Running tasks with {concurrency} worker thread(s).')
+
+        last_purge = 0
+        while any(thread.is_alive() for thread in threads):
+            if time.monotonic() - last_purge > PURGE_EVERY:
+                last_purge = time.monotonic()
+                purge_finished(config['KEEP_SUCCEEDED_DAYS'])
+            for thread in threads:
+                thread.join(timeout=1)
+        self.stdout.write('Task workers stopped.')
@@ -0,0 +1,200 @@
+"""
+A small database-backed task queue for side effects that should not run
+inside the request.
+
+Decorate a function with ``@task`` and queue calls with ``enqueue``. The call
+is written to the ``Task`` table in the surrounding transaction, so it
+commits or rolls back together with the writes it describes: a rolled-back
+request never runs its side effects, a task never runs before the rows it
+refers to are visible, and a crash right after the commit cannot lose it.
+``python manage.py run_tasks`` executes queued tasks.
+
+By default a task's function runs in the same transaction that marks the
+task as succeeded, so its database writes happen exactly once even if a
+worker dies mid-task and the task is retried. Long-running tasks that manage
+their own transactions opt out with ``atomic=False`` and must be safe to run
+again. Failed attempts are retried with exponential backoff.
+
+With ``TASKS['BACKEND'] = 'immediate'`` (the default with ``DEBUG`` on) tasks
+run in-process right after the commit instead, which still keeps the request
+waiting for them. The ``database`` backend, the default otherwise, needs at
+least one ``run_tasks`` worker, or queued tasks never run.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+class TaskLeaseLost(Exception):
+    """The task was taken over by another worker while running."""
+
+
+def task(max_attempts=3, retry_delay=10, timeout=300, atomic=True):
+    """
+    Mark a module-level function as a task. Its keyword arguments must be
+    JSON-serializable. ``retry_delay`` is the delay in seconds before the
+    first retry and doubles after every further failure.
+    """
+    def decorator(func):
+        func.task_options = {
+            'max_attempts': max_attempts,
+            'retry_delay': retry_delay,
+            'timeout': timeout,
+            'atomic': atomic,
+        }
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        return func
+    return decorator
+
+
+def get_task_function(name):
+    func = import_string(name)
+    if not hasattr(func, 'task_options'):
+        raise ValueError(f'{name} is not a task')
+    return func
+
+
+def enqueue(func, kwargs=None, idempotency_key=None, delay=0):
+    """Queue ``func(**kwargs)`` as part of the current transaction."""
+    kwargs = kwargs or {}
+    if not hasattr(func, 'task_options'):
+        raise ValueError(f'{func!r} is not a task')
+
+    if settings.TASKS['BACKEND'] == 'immediate':
+        transaction.on_commit(lambda: run_immediately(func, kwargs))
+        return
+
+    # Workers cannot see the row until the transaction commits.
+    options = func.task_options
+    Task.objects.bulk_create([Task(
+        name=func.task_name,
+        kwargs=kwargs,
+        idempotency_key=idempotency_key,
+        max_attempts=options['max_attempts'],
+        timeout=options['timeout'],
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )], ignore_conflicts=idempotency_key is not None)
+
+
+def run_immediately(func, kwargs):
+    try:
+        if func.task_options['atomic']:
+            with transaction.atomic():
+                func(**kwargs)
+        else:
+            func(**kwargs)
+    except Exception:
+        logger.exception('Task %s failed', func.task_name)
+
+
+def claim_next(worker_id):
+    """Take the next due task (or one whose worker's lease expired)."""
+    now = timezone.now()
+    # A worker that died on its last attempt leaves the task running forever.
+    Task.objects.filter(status='running', lease_expires_at__lt=now, attempts__gte=F('max_attempts')).update(
+        status='failed', last_error='Worker lease expired', lease_expires_at=None, finished_at=now, updated_at=now,
+    )
+    due = Q(status='queued', run_at__lte=now) | Q(status='running', lease_expires_at__lt=now)
+    with transaction.atomic():
+        candidates = Task.objects.filter(due).order_by('run_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        for pk, timeout in candidates.values_list('pk', 'timeout')[:5]:
+            # The conditional update settles races on databases without
+            # SKIP LOCKED: only one worker can move the row.
+            claimed = Task.objects.filter(due, pk=pk).update(
+                status='running',
+                attempts=F('attempts') + 1,
+                locked_by=worker_id,
+                lease_expires_at=now + timedelta(seconds=timeout),
+                updated_at=now,
+            )
+            if claimed:
+                return Task.objects.get(pk=pk)
+    return None
+
+
+def finish(task_row, worker_id):
+    finished = Task.objects.filter(pk=task_row.pk, status='running', locked_by=worker_id).update(
+        status='succeeded', last_error='', lease_expires_at=None, finished_at=timezone.now(), updated_at=timezone.now(),
+    )
+    if not finished:
+        raise TaskLeaseLost(f'Task {task_row.pk} was taken over by another worker')
+
+
+def record_failure(task_row, worker_id, error, retry_delay):
+    now = timezone.now()
+    if task_row.attempts >= task_row.max_attempts:
+        changes = {'status': 'failed', 'finished_at': now}
+    else:
+        delay = retry_delay * 2 ** (task_row.attempts - 1)
+        changes = {'status': 'queued', 'run_at': now + timedelta(seconds=delay)}
+    Task.objects.filter(pk=task_row.pk, status='running', locked_by=worker_id).update(
+        last_error=error, lease_expires_at=None, updated_at=now, **changes,
+    )
+
+
+def execute(task_row, worker_id):
+    try:
+        func = get_task_function(task_row.name)
+    except (ImportError, ValueError) as exc:
+        record_failure(task_row, worker_id, str(exc), retry_delay=0)
+        return False
+
+    try:
+        if func.task_options['atomic']:
+            with transaction.atomic():
+                func(**task_row.kwargs)
+                finish(task_row, worker_id)
+        else:
+            func(**task_row.kwargs)
+            finish(task_row, worker_id)
+    except TaskLeaseLost:
+        logger.warning('Task %s (%s) outlived its lease; its result was discarded', task_row.pk, task_row.name)
+        return False
+    except Exception:
+        logger.exception('Task %s (%s) failed', task_row.pk, task_row.name)
+        record_failure(task_row, worker_id, traceback.format_exc(), func.task_options['retry_delay'])
+        return False
+    return True
+
+
+def purge_finished(older_than_days):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = Task.objects.filter(status='succeeded', finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def work(stop, poll_interval, once=False):
+    """One worker thread: run due tasks until ``stop`` is set (or, with ``once``, none are due)."""
+    worker_id = f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'[-100:]
+    try:
+        while not stop.is_set():
+            try:
+                task_row = claim_next(worker_id)
+                if task_row is not None:
+                    execute(task_row, worker_id)
+                    continue
+            except Exception:
+                # Typically a lost database connection; a task left running
+                # is picked up again once its lease expires.
+                logger.exception('Task worker %s hit an error', worker_id)
+                connections.close_all()
+            if once:
+                return
+            stop.wait(poll_interval)
+    finally:
+        connections.close_all()
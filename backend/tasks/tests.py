@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from .checks import check_task_backend
+
+
+class TaskBackendCheckTests(SimpleTestCase):
+    def test_immediate_tasks_fail_the_deploy_check_without_debug(self):
+        with override_settings(TASKS={**settings.TASKS, 'BACKEND': 'immediate'}):
+            with override_settings(DEBUG=False):
+                self.assertEqual([error.id for error in check_task_backend(None)], ['tasks.E001'])
+            with override_settings(DEBUG=True):
+                self.assertEqual(check_task_backend(None), [])
+        with override_settings(TASKS={**settings.TASKS, 'BACKEND': 'database'}, DEBUG=False):
+            self.assertEqual(check_task_backend(None), [])
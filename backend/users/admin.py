@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import User, RosterImport
 
 
 @admin.register(User)
@@ -13,3 +13,10 @@ class UserAdmin(BaseUserAdmin):
     add_fieldsets = BaseUserAdmin.add_fieldsets + (
         ('Role', {'fields': ('role',)}),
     )
+
+
+@admin.register(RosterImport)
+class RosterImportAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'processed_rows', 'created_count', 'failed_count', 'created_by', 'created_at']
+    list_filter = ['status', 'created_at']
+    readonly_fields = ['processed_rows', 'created_count', 'failed_count', 'failures', 'error', 'created_at', 'updated_at', 'finished_at']
@@ -0,0 +1,95 @@
+"""
+Stateless JWT authentication.
+
+``StatelessJWTAuthentication`` trusts the claims of a validated access token
+instead of loading the ``User`` row on every request. ``request.user`` is a
+``TokenUser`` that answers ``id``, ``role`` and ``student_id`` from the token
+and only loads the row when a view reads any other attribute.
+
+Because the role and student ID are taken from the token, changing either
+(or deactivating the user) revokes every access token issued before the
+change; see ``revoke_tokens``. Revocations live in the default cache, so the
+setting defaults to off without a shared cache (``REDIS_URL``) and
+``check --deploy`` rejects it on a process-local one.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser as BaseTokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+TOKEN_CLAIMS = ('role', 'student_id')
+
+
+def revocation_key(user_id):
+    return f'auth:revoked:{user_id}'
+
+
+def revoke_tokens(user_id):
+    """Reject every access token issued to ``user_id`` before now."""
+    # Tokens issued before the revocation expire within one lifetime, so the
+    # entry is not needed after that.
+    lifetime = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+    cache.set(revocation_key(user_id), int(time.time()), timeout=int(lifetime))
+
+
+def is_token_revoked(token):
+    revoked_at = cache.get(revocation_key(token[jwt_settings.USER_ID_CLAIM]))
+    # ``iat`` has one-second resolution; a token issued in the same second as
+    # the revocation is treated as issued after it.
+    return revoked_at is not None and token.get('iat', 0) < revoked_at
+
+
+class TokenUser(BaseTokenUser):
+    """
+    ``request.user`` backed by the access token's claims.
+
+    Attributes that are not claims (email, names, ...) are read from the
+    ``User`` row, which is loaded once, on first use.
+    """
+
+    @cached_property
+    def id(self):
+        return int(self.token[jwt_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def user(self):
+        return get_user_model().objects.get(pk=self.id)
+
+    @property
+    def username(self):
+        return self.user.username
+
+    @property
+    def is_staff(self):
+        return self.user.is_staff
+
+    @property
+    def is_superuser(self):
+        return self.user.is_superuser
+
+    def __getattr__(self, attr):
+        if attr.startswith('_') or attr == 'token':
+            raise AttributeError(attr)
+        if attr in TOKEN_CLAIMS and attr in self.token:
+            return self.token[attr]
+        return getattr(self.user, attr)
+
+    def __str__(self):
+        return f"{self.student_id} ({self.role})"
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT authentication that issues no database query."""
+
+    def get_user(self, validated_token):
+        if jwt_settings.USER_ID_CLAIM not in validated_token:
+            raise AuthenticationFailed('Token contained no recognizable user identification')
+        if is_token_revoked(validated_token):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return TokenUser(validated_token)
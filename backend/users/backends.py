@@ -1,9 +1,25 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from .login import get_password_verifier
 
 User = get_user_model()
 
 
+def unknown_student_key(student_id):
+    digest = hashlib.md5(student_id.encode('utf-8')).hexdigest()
+    return f'auth:unknown:{digest}'
+
+
+def forget_unknown_student_ids(student_ids):
+    """Drop cached misses for student_ids that now exist."""
+    cache.delete_many([unknown_student_key(student_id) for student_id in student_ids])
+
+
 class StudentIDBackend(ModelBackend):
     """
     Custom authentication backend that allows users to log in using their student_id (roll number)
@@ -15,14 +31,18 @@ class StudentIDBackend(ModelBackend):
         if student_id is None or password is None:
             return None
 
+        key = unknown_student_key(student_id)
+        if cache.get(key):
+            return None
+
         try:
             user = User.objects.get(student_id=student_id)
         except User.DoesNotExist:
+            cache.set(key, True, timeout=settings.LOGIN_THROTTLE['UNKNOWN_ID_TTL'])
             return None
 
-        if user.check_password(password) and self.user_can_authenticate(user):
+        if self.user_can_authenticate(user) and get_password_verifier().check(user, password):
             return user
-
         return None
 
     def get_user(self, user_id):
@@ -30,3 +50,15 @@ class StudentIDBackend(ModelBackend):
             return User.objects.get(pk=user_id)
         except User.DoesNotExist:
             return None
+
+
+class BoundedModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` for the logins ``StudentIDBackend`` turns down. It hashes
+    too, so it waits for a turn on the same verifier as the first attempt.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if password is None:
+            return None
+        with get_password_verifier().turn():
+            return super().authenticate(request, username, password, **kwargs)
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core import checks
+
+# Cache backends whose entries are only visible to the process that wrote them.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.security, deploy=True)
+def check_token_revocation_cache(app_configs, **kwargs):
+    """Stateless JWT auth needs revocations to reach every worker process."""
+    if not settings.JWT_STATELESS_AUTH:
+        return []
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [checks.Error(
+        'JWT_STATELESS_AUTH is on but the default cache is process-local, so revoked '
+        'access tokens stay valid in every other worker process.',
+        hint='Set REDIS_URL to use a shared cache, or set JWT_STATELESS_AUTH=False.',
+        id='users.E001',
+    )]
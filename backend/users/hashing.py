@@ -0,0 +1,15 @@
+"""
+Process pool set-up for hashing roster passwords.
+
+The importer's pool spawns fresh interpreters, which unpickle the initializer
+by importing its module before Django is set up. This module therefore must
+not import models or anything else that needs the app registry.
+"""
+import django
+from django.apps import apps
+
+
+def init_worker():
+    # The hashers read PASSWORD_HASHERS, so the worker needs configured settings.
+    if not apps.ready:
+        django.setup()
@@ -0,0 +1,195 @@
+"""
+Bulk student onboarding from a roster CSV.
+
+Columns: student_id, email, password (required) and first_name, last_name,
+department, year (optional). Rows are handled in chunks: passwords are hashed
+across a pool of spawned processes, then the chunk's users and profiles are written with
+bulk_create in one transaction together with the job's checkpoint, so a
+crashed or interrupted import can be resumed from the last committed chunk.
+The uploaded CSV is deleted once the job completes.
+"""
+import csv
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from achievements import leaderboard
+from backend.response_cache import invalidate_tags, list_tag
+from profiles.models import StudentProfile
+from .backends import forget_unknown_student_ids
+from .hashing import init_worker
+from .models import RosterImport, User
+
+REQUIRED_COLUMNS = ['student_id', 'email', 'password']
+# Failure details kept on the job; the counters stay exact beyond this.
+MAX_RECORDED_FAILURES = 1000
+
+
+def open_roster(job):
+    job.source.open('rb')
+    return csv.DictReader(io.TextIOWrapper(job.source.file, encoding='utf-8-sig', newline=''))
+
+
+def run_roster_import(job, chunk_size=None, workers=None):
+    chunk_size = chunk_size or settings.ROSTER_IMPORT['CHUNK_SIZE']
+    workers = workers or settings.ROSTER_IMPORT['WORKERS']
+
+    # Claim the job atomically so a resume cannot race a worker that is alive.
+    claimable = Q(status__in=['pending', 'failed']) | Q(status='running', updated_at__lt=RosterImport.stale_before())
+    claimed = RosterImport.objects.filter(claimable, pk=job.pk).update(
+        status='running', error='', updated_at=timezone.now(),
+    )
+    if not claimed:
+        job.refresh_from_db()
+        raise ValueError(f'Roster import {job.pk} is already {job.status}')
+    job.refresh_from_db()
+
+    try:
+        reader = open_roster(job)
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f'Missing required column(s): {", ".join(missing)}')
+
+        # Imports run on run_tasks worker threads (or request threads with
+        # the immediate backend); forking a threaded process can copy held
+        # locks and other threads' database connections, so spawn instead.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker) as pool:
+            rows = islice(enumerate(reader, start=1), job.processed_rows, None)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                import_chunk(job, chunk, pool)
+    except Exception as exc:
+        RosterImport.objects.filter(pk=job.pk).update(status='failed', error=str(exc))
+        raise
+    finally:
+        job.source.close()
+
+    # The roster holds plaintext initial passwords; drop it once it is used up.
+    job.source.delete(save=False)
+    RosterImport.objects.filter(pk=job.pk).update(status='completed', source='', finished_at=timezone.now())
+    job.refresh_from_db()
+    return job
+
+
+def validate_chunk(chunk):
+    valid = []
+    failures = []
+    seen_ids = set()
+    seen_emails = set()
+
+    for line, row in chunk:
+        row = {key: (value or '').strip() for key, value in row.items() if key}
+        student_id, email = row.get('student_id', ''), row.get('email', '').lower()
+
+        error = None
+        if not student_id or not email or not row.get('password'):
+            error = 'student_id, email and password are required'
+        elif len(student_id) > User._meta.get_field('student_id').max_length:
+            error = 'student_id is too long'
+        elif student_id in seen_ids:
+            error = 'Duplicate student_id in file'
+        elif email in seen_emails:
+            error = 'Duplicate email in file'
+        else:
+            try:
+                validate_email(email)
+            except ValidationError:
+                error = 'Invalid email'
+
+        if error:
+            failures.append({'row': line, 'student_id': student_id, 'email': email, 'error': error})
+            continue
+
+        seen_ids.add(student_id)
+        seen_emails.add(email)
+        valid.append((line, {**row, 'email': email}))
+
+    existing = User.objects.filter(
+        Q(student_id__in=seen_ids) | Q(username__in=seen_ids) | Q(email__in=seen_emails)
+    ).values_list('student_id', 'username', 'email')
+    taken_ids = set()
+    taken_emails = set()
+    for student_id, username, email in existing:
+        taken_ids.update([student_id, username])
+        taken_emails.add(email.lower())
+
+    remaining = []
+    for line, row in valid:
+        if row['student_id'] in taken_ids:
+            failures.append({'row': line, 'student_id': row['student_id'], 'email': row['email'], 'error': 'student_id already exists'})
+        elif row['email'] in taken_emails:
+            failures.append({'row': line, 'student_id': row['student_id'], 'email': row['email'], 'error': 'email already exists'})
+        else:
+            remaining.append((line, row))
+    return remaining, failures
+
+
+def build_user(row, password_hash):
+    return User(
+        username=row['student_id'],
+        student_id=row['student_id'],
+        email=row['email'],
+        password=password_hash,
+        first_name=row.get('first_name', ''),
+        last_name=row.get('last_name', ''),
+        role='student',
+    )
+
+
+def build_profile(user, row):
+    return StudentProfile(user=user, department=row.get('department', ''), year=row.get('year', ''))
+
+
+def import_chunk(job, chunk, pool):
+    rows, failures = validate_chunk(chunk)
+    hashes = list(pool.map(make_password, [row['password'] for _, row in rows], chunksize=16))
+    created_ids = []
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create([build_user(row, pw) for (_, row), pw in zip(rows, hashes)])
+                StudentProfile.objects.bulk_create([build_profile(user, row) for user, (_, row) in zip(users, rows)])
+                created_ids = [user.pk for user in users]
+        except IntegrityError:
+            # Someone registered one of these students since validation;
+            # fall back to row-by-row so only the conflicting rows fail.
+            for (line, row), pw in zip(rows, hashes):
+                try:
+                    with transaction.atomic():
+                        user = build_user(row, pw)
+                        User.objects.bulk_create([user])
+                        StudentProfile.objects.bulk_create([build_profile(user, row)])
+                    created_ids.append(user.pk)
+                except IntegrityError:
+                    failures.append({'row': line, 'student_id': row['student_id'], 'email': row['email'], 'error': 'student_id or email already exists'})
+
+        # bulk_create skips the profile signals that add leaderboard entries.
+        if created_ids:
+            leaderboard.refresh(created_ids)
+        created = len(created_ids)
+
+        job = RosterImport.objects.select_for_update().get(pk=job.pk)
+        job.processed_rows += len(chunk)
+        job.created_count += created
+        job.failed_count += len(failures)
+        room = MAX_RECORDED_FAILURES - len(job.failures)
+        job.failures = job.failures + sorted(failures, key=lambda failure: failure['row'])[:max(room, 0)]
+        job.save(update_fields=['processed_rows', 'created_count', 'failed_count', 'failures', 'updated_at'])
+
+    if created:
+        invalidate_tags('profiles', [list_tag({})])
+        forget_unknown_student_ids([row['student_id'] for _, row in rows])
+    return job
@@ -0,0 +1,60 @@
+"""
+Bounded password verification for logins.
+
+Password hashing is deliberately slow (PBKDF2), so a burst of logins can
+occupy every request thread while read endpoints wait. Each worker process
+therefore hashes at most ``MAX_CONCURRENT`` passwords at a time, on the
+request threads themselves, and admits only ``MAX_WAITING`` more logins to
+wait for a turn; beyond that a login is answered with 503 and Retry-After.
+Together they cap the threads and CPU that logins can hold at once.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class LoginBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, please retry shortly.'
+    default_code = 'login_busy'
+    # DRF's exception handler turns this into a Retry-After header.
+    wait = 1
+
+
+class PasswordVerifier:
+    def __init__(self, max_concurrent, max_waiting, wait_timeout):
+        self.running = threading.BoundedSemaphore(max_concurrent)
+        self.slots = threading.BoundedSemaphore(max_concurrent + max_waiting)
+        self.wait_timeout = wait_timeout
+
+    @contextmanager
+    def turn(self):
+        """Hold one of the hashing turns, or raise ``LoginBusy`` if too many logins wait."""
+        if not self.slots.acquire(timeout=self.wait_timeout):
+            raise LoginBusy()
+        try:
+            with self.running:
+                yield
+        finally:
+            self.slots.release()
+
+    def check(self, user, password):
+        with self.turn():
+            return user.check_password(password)
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_password_verifier():
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                config = settings.LOGIN_THROTTLE
+                _verifier = PasswordVerifier(config['MAX_CONCURRENT'], config['MAX_WAITING'], config['WAIT_TIMEOUT'])
+    return _verifier
@@ -0,0 +1,128 @@
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+from users.models import User
+
+BENCH_PREFIX = 'bench'
+BENCH_PASSWORD = 'bench-password'
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def timed_request(request):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            code = response.status
+    except urllib.error.HTTPError as error:
+        code = error.code
+    except OSError:
+        code = 0
+    return code, (time.perf_counter() - started) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a login storm against a running server and report login latency '
+        'and read-endpoint latency before and during the storm.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server.')
+        parser.add_argument('--users', type=int, default=200, help='Benchmark accounts to log in as.')
+        parser.add_argument('--logins', type=int, default=1000, help='Total login attempts.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent login clients.')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent read-endpoint clients.')
+        parser.add_argument('--read-path', default='/api/achievements/list/', help='Endpoint sampled during the storm.')
+        parser.add_argument('--unknown-ratio', type=float, default=0.1, help='Share of logins with an unknown student_id.')
+        parser.add_argument('--baseline-seconds', type=float, default=3, help='Read sampling time before the storm.')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the benchmark accounts afterwards.')
+
+    def handle(self, *args, **options):
+        base_url = options['url'].rstrip('/')
+        student_ids = self.ensure_users(options['users'])
+
+        read_url = base_url + options['read_path']
+        baseline = self.sample_reads(read_url, options['readers'], duration=options['baseline_seconds'])
+
+        login_url = base_url + '/api/auth/login/'
+        every = round(1 / options['unknown_ratio']) if options['unknown_ratio'] > 0 else 0
+
+        def login(n):
+            student_id = f'nobody{n}' if every and n % every == 0 else student_ids[n % len(student_ids)]
+            body = json.dumps({'student_id': student_id, 'password': BENCH_PASSWORD}).encode()
+            request = urllib.request.Request(login_url, data=body, headers={'Content-Type': 'application/json'})
+            return timed_request(request)
+
+        stop = threading.Event()
+        reads = []
+        readers = threading.Thread(target=lambda: reads.extend(self.sample_reads(read_url, options['readers'], stop=stop)))
+        readers.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            logins = list(pool.map(login, range(options['logins'])))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        readers.join()
+
+        # Rejected credentials (401) are answered logins too; 503 means shed.
+        self.report('Login', logins, answered=(200, 401))
+        self.stdout.write(f'  throughput: {len(logins) / elapsed:.1f} logins/s over {elapsed:.1f}s')
+        self.report('Reads before storm', baseline)
+        self.report('Reads during storm', reads)
+
+        if options['cleanup']:
+            deleted, _ = User.objects.filter(student_id__startswith=BENCH_PREFIX).delete()
+            self.stdout.write(f'Deleted {deleted} benchmark rows.')
+
+    def ensure_users(self, count):
+        student_ids = [f'{BENCH_PREFIX}{n:05d}' for n in range(count)]
+        existing = set(User.objects.filter(student_id__in=student_ids).values_list('student_id', flat=True))
+        password = make_password(BENCH_PASSWORD)
+        User.objects.bulk_create([
+            User(username=student_id, student_id=student_id, email=f'{student_id}@bench.invalid', password=password)
+            for student_id in student_ids if student_id not in existing
+        ])
+        return student_ids
+
+    def sample_reads(self, url, clients, duration=None, stop=None):
+        deadline = time.perf_counter() + duration if duration is not None else None
+        samples = []
+
+        def run():
+            while not (stop and stop.is_set()) and not (deadline and time.perf_counter() >= deadline):
+                samples.append(timed_request(urllib.request.Request(url)))
+
+        threads = [threading.Thread(target=run) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples
+
+    def report(self, label, results, answered=(200,)):
+        latencies = [latency for code, latency in results if code in answered]
+        codes = {}
+        for code, _ in results:
+            codes[code] = codes.get(code, 0) + 1
+        summary = ', '.join(f'{code or "error"}: {n}' for code, n in sorted(codes.items()))
+        self.stdout.write(f'{label}: {len(results)} requests ({summary})')
+        if latencies:
+            self.stdout.write(
+                f'  p50 {statistics.median(latencies):.1f} ms, '
+                f'p99 {percentile(latencies, 0.99):.1f} ms, max {max(latencies):.1f} ms'
+            )
@@ -0,0 +1,46 @@
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from users.importer import run_roster_import
+from users.models import RosterImport
+
+
+class Command(BaseCommand):
+    help = 'Create student accounts and profiles in bulk from a roster CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', nargs='?', help='Roster CSV with student_id, email and password columns.')
+        parser.add_argument('--resume', type=int, metavar='JOB_ID', help='Continue an interrupted import.')
+        parser.add_argument('--chunk-size', type=int, help='Rows written per transaction.')
+        parser.add_argument('--workers', type=int, help='Processes used for password hashing.')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                job = RosterImport.objects.get(pk=options['resume'])
+            except RosterImport.DoesNotExist:
+                raise CommandError(f'Roster import {options["resume"]} does not exist.')
+            if job.status == 'completed':
+                raise CommandError(f'Roster import {job.pk} has already completed.')
+            if job.status == 'running' and not job.is_stale:
+                raise CommandError(f'Roster import {job.pk} is still running.')
+            self.stdout.write(f'Resuming import {job.pk} after row {job.processed_rows}.')
+        elif options['csv_path']:
+            job = RosterImport()
+            with open(options['csv_path'], 'rb') as source:
+                job.source.save(source.name.rsplit('/', 1)[-1], File(source))
+            self.stdout.write(f'Started import {job.pk}.')
+        else:
+            raise CommandError('Pass a CSV path or --resume JOB_ID.')
+
+        try:
+            job = run_roster_import(job, chunk_size=options['chunk_size'], workers=options['workers'])
+        except Exception as exc:
+            raise CommandError(f'Import {job.pk} stopped: {exc}. Resume it with --resume {job.pk}.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Import {job.pk}: {job.created_count} created, {job.failed_count} failed '
+            f'out of {job.processed_rows} rows.'
+        ))
+        for failure in job.failures:
+            self.stdout.write(f"  row {failure['row']} ({failure['student_id'] or '-'}): {failure['error']}")
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:36
+
+import users.storage
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def move_rosters_to_private_storage(apps, schema_editor):
+    """Move uploads out of MEDIA_ROOT; finished jobs no longer need theirs."""
+    RosterImport = apps.get_model('users', 'RosterImport')
+    private = users.storage.get_roster_storage()
+    for job in RosterImport.objects.exclude(source=''):
+        name = job.source.name
+        if not default_storage.exists(name):
+            continue
+        if job.status == 'completed':
+            job.source = ''
+        else:
+            with default_storage.open(name, 'rb') as upload:
+                job.source = private.save(name, upload)
+        job.save(update_fields=['source'])
+        default_storage.delete(name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_rosterimport'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rosterimport',
+            name='source',
+            field=models.FileField(storage=users.storage.get_roster_storage, upload_to='roster_imports/'),
+        ),
+        migrations.RunPython(move_rosters_to_private_storage, migrations.RunPython.noop),
+    ]
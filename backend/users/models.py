@@ -1,8 +1,15 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
+
+from backend.tracking import TrackedFieldsMixin
+from .storage import get_roster_storage
 
 
-class User(AbstractUser):
+class User(TrackedFieldsMixin, AbstractUser):
     ROLE_CHOICES = [
         ('student', 'Student'),
         ('coordinator', 'Coordinator'),
@@ -20,3 +27,41 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ['-date_joined']
+
+
+class RosterImport(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='roster_imports')
+    source = models.FileField(upload_to='roster_imports/', storage=get_roster_storage)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Number of CSV data rows already handled; an interrupted import resumes here.
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    failures = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped by every committed chunk, so it doubles as the worker's heartbeat.
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Roster import {self.pk} ({self.status})"
+
+    @staticmethod
+    def stale_before():
+        return timezone.now() - timedelta(seconds=settings.ROSTER_IMPORT['STALE_AFTER'])
+
+    @property
+    def is_stale(self):
+        """A running import whose worker stopped checkpointing, e.g. because it died."""
+        return self.status == 'running' and self.updated_at < self.stale_before()
+
+    class Meta:
+        ordering = ['-created_at']
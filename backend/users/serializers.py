@@ -1,11 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from backend.metrics import TimedSerializerMixin
+from .models import RosterImport
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
 
     class Meta:
@@ -48,3 +50,18 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             'last_name': self.user.last_name,
         }
         return data
+
+
+class RosterImportSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = RosterImport
+        fields = [
+            'id', 'source', 'status', 'processed_rows', 'created_count', 'failed_count',
+            'failures', 'error', 'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'processed_rows', 'created_count', 'failed_count',
+            'failures', 'error', 'created_at', 'updated_at', 'finished_at'
+        ]
+        # The upload sits in private storage and has no public URL.
+        extra_kwargs = {'source': {'write_only': True}}
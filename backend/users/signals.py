@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .authentication import revoke_tokens
+from .backends import forget_unknown_student_ids
+from .models import User
+
+# Claims (or account state) that issued access tokens rely on.
+REVOKING_FIELDS = ('role', 'student_id', 'is_active')
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created or instance.has_changed('student_id'):
+        forget_unknown_student_ids([instance.student_id])
+    if not created and any(instance.has_changed(field) for field in REVOKING_FIELDS):
+        user_id = instance.pk
+        transaction.on_commit(lambda: revoke_tokens(user_id))
+    instance.reset_tracking()
@@ -0,0 +1,14 @@
+"""
+Storage for uploaded roster CSVs.
+
+Rosters carry plaintext initial passwords, so they are kept in a directory
+outside ``MEDIA_ROOT`` that is never served, and the importer deletes each
+file once its job completes. ``get_roster_storage`` is the ``storage``
+callable of ``RosterImport.source``.
+"""
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+
+def get_roster_storage():
+    return FileSystemStorage(location=settings.ROSTER_IMPORT['STORAGE_DIR'], base_url=None)
@@ -0,0 +1,11 @@
+from tasks.queue import task
+
+from .importer import run_roster_import
+from .models import RosterImport
+
+
+# Imports checkpoint every chunk in their own transactions and are resumed
+# explicitly (API or --resume) rather than retried.
+@task(max_attempts=1, timeout=6 * 3600, atomic=False)
+def import_roster(job_id):
+    run_roster_import(RosterImport.objects.get(pk=job_id))
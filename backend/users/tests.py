@@ -0,0 +1,117 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import is_token_revoked
+from .backends import BoundedModelBackend
+from .checks import check_token_revocation_cache
+from .login import LoginBusy, PasswordVerifier
+
+from .importer import run_roster_import
+from .models import RosterImport, User
+
+ROSTER = b'student_id,email,password\nR001,r001@example.com,initial-pw-1\nR002,r002@example.com,initial-pw-2\n'
+
+
+def make_job():
+    job = RosterImport()
+    job.source.save('roster.csv', ContentFile(ROSTER))
+    return job
+
+
+class RosterImportTests(TestCase):
+    def test_upload_is_private_and_deleted_after_import(self):
+        job = make_job()
+        path = job.source.path
+        self.assertTrue(path.startswith(str(settings.ROSTER_IMPORT['STORAGE_DIR'])))
+        self.assertFalse(path.startswith(str(settings.MEDIA_ROOT)))
+
+        job = run_roster_import(job, workers=1)
+        self.assertEqual((job.status, job.created_count), ('completed', 2))
+        self.assertEqual(job.source.name, '')
+        self.assertFalse(job.source.storage.exists(path))
+        self.assertTrue(User.objects.filter(student_id='R002').exists())
+
+
+class RosterImportResumeTests(TestCase):
+    def setUp(self):
+        coordinator = User.objects.create_user(
+            student_id='C001', username='C001', email='c001@example.com', password='pw', role='coordinator',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(coordinator)
+        self.job = make_job()
+        self.addCleanup(self.job.source.delete, save=False)
+
+    def mark_running(self, seconds_ago):
+        RosterImport.objects.filter(pk=self.job.pk).update(
+            status='running', updated_at=timezone.now() - timedelta(seconds=seconds_ago),
+        )
+
+    def resume(self):
+        return self.client.post(f'/api/auth/imports/{self.job.pk}/resume/')
+
+    def test_live_running_import_is_not_resumed(self):
+        self.mark_running(seconds_ago=5)
+        self.assertEqual(self.resume().status_code, 400)
+        with self.assertRaises(ValueError):
+            run_roster_import(RosterImport.objects.get(pk=self.job.pk), workers=1)
+
+    def test_stale_running_import_is_resumed(self):
+        self.mark_running(seconds_ago=settings.ROSTER_IMPORT['STALE_AFTER'] + 60)
+        self.assertEqual(self.resume().status_code, 202)
+        job = run_roster_import(RosterImport.objects.get(pk=self.job.pk), workers=1)
+        self.assertEqual((job.status, job.created_count), ('completed', 2))
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(student_id='S001', username='S001', email='s001@example.com', password='pw')
+
+    def test_student_id_change_revokes_issued_tokens(self):
+        token = AccessToken.for_user(self.user)
+        token['iat'] -= 1
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.student_id = 'S002'
+            self.user.save()
+        self.assertTrue(is_token_revoked(token))
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_deploy_check_rejects_process_local_cache(self):
+        self.assertEqual([error.id for error in check_token_revocation_cache(None)], ['users.E001'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with override_settings(CACHES=redis):
+            self.assertEqual(check_token_revocation_cache(None), [])
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(student_id='S001', username='S001', email='s001@example.com', password='right-pw')
+        self.client = APIClient()
+
+    def login(self, password):
+        return self.client.post('/api/auth/login/', {'student_id': 'S001', 'password': password}, format='json')
+
+    def test_rejected_login_falls_back_to_the_model_backend(self):
+        self.assertEqual(self.login('right-pw').status_code, 200)
+        with mock.patch.object(BoundedModelBackend, 'authenticate', return_value=None) as fallback:
+            self.assertEqual(self.login('wrong-pw').status_code, 401)
+        fallback.assert_called_once()
+
+    def test_logins_beyond_the_waiting_limit_are_turned_away(self):
+        verifier = PasswordVerifier(max_concurrent=1, max_waiting=0, wait_timeout=0)
+        with verifier.turn():
+            with self.assertRaises(LoginBusy):
+                with verifier.turn():
+                    pass
+        with verifier.turn():
+            pass
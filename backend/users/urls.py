@@ -1,8 +1,14 @@
 from django.urls import path
-from .views import CustomTokenObtainPairView, RegisterView, CurrentUserView
+from .views import (
+    CustomTokenObtainPairView, RegisterView, CurrentUserView,
+    RosterImportListCreateView, RosterImportDetailView, RosterImportResumeView,
+)
 
 urlpatterns = [
     path('login/', CustomTokenObtainPairView.as_view(), name='login'),
     path('register/', RegisterView.as_view(), name='register'),
     path('me/', CurrentUserView.as_view(), name='current_user'),
+    path('imports/', RosterImportListCreateView.as_view(), name='roster_import_list'),
+    path('imports/<int:pk>/', RosterImportDetailView.as_view(), name='roster_import_detail'),
+    path('imports/<int:pk>/resume/', RosterImportResumeView.as_view(), name='roster_import_resume'),
 ]
\ No newline at end of file
@@ -1,9 +1,14 @@
-from rest_framework import generics, permissions
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer, CustomTokenObtainPairSerializer
+from django.db import transaction
+from achievements.permissions import IsCoordinator
+from tasks.queue import enqueue
+from .models import RosterImport
+from .tasks import import_roster
+from .serializers import UserSerializer, CustomTokenObtainPairSerializer, RosterImportSerializer
 
 User = get_user_model()
 
@@ -13,6 +18,11 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = (permissions.AllowAny,)
     serializer_class = UserSerializer
 
+    def perform_create(self, serializer):
+        # The user and the student profile its signal creates commit together.
+        with transaction.atomic():
+            serializer.save()
+
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
@@ -24,3 +34,43 @@ class CurrentUserView(APIView):
     def get(self, request):
         serializer = UserSerializer(request.user)
         return Response(serializer.data)
+
+
+def start_roster_import(job):
+    enqueue(import_roster, {'job_id': job.pk})
+
+
+class RosterImportListCreateView(generics.ListCreateAPIView):
+    queryset = RosterImport.objects.all()
+    serializer_class = RosterImportSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCoordinator]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(created_by_id=request.user.id)
+        start_roster_import(job)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class RosterImportDetailView(generics.RetrieveAPIView):
+    queryset = RosterImport.objects.all()
+    serializer_class = RosterImportSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCoordinator]
+
+
+class RosterImportResumeView(generics.GenericAPIView):
+    queryset = RosterImport.objects.all()
+    serializer_class = RosterImportSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCoordinator]
+
+    def post(self, request, *args, **kwargs):
+        job = self.get_object()
+        # A running job may only be taken over once its worker stops checkpointing.
+        if job.status == 'completed' or (job.status == 'running' and not job.is_stale):
+            return Response(
+                {'error': f'Import is already {job.status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start_roster_import(job)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
@@ -82,7 +82,7 @@ const NotificationDrawer = ({ open, onClose, onUpdate }) => {
                   <Box display="flex" width="100%" justifyContent="space-between" alignItems="flex-start">
                     <Box flex={1}>
                       <Typography variant="subtitle2" fontWeight={600}>
-                        {notification.achievement_title}
+                        {notification.achievement_title || 'Announcement'}
                       </Typography>
                       <Typography variant="body2" color="text.secondary" sx={{ mt: 0.5 }}>
                         {notification.message}
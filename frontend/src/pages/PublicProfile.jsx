@@ -35,13 +35,10 @@ const PublicProfile = () => {
 
   const fetchProfileData = async () => {
     try {
-      const [profileRes, achievementsRes] = await Promise.all([
-        api.get(`/profiles/${id}/`),
-        api.get(`/achievements/list/?student_id=${id}&status=verified`),
-      ])
+      const response = await api.get(`/profiles/portfolio/${id}/`)
 
-      setProfile(profileRes.data)
-      setAchievements(achievementsRes.data)
+      setProfile(response.data.profile)
+      setAchievements(Object.values(response.data.achievements).flat())
     } catch (error) {
       console.error('Failed to fetch profile:', error)
       setError('Failed to load profile')
@@ -90,7 +87,7 @@ const PublicProfile = () => {
         <Grid container spacing={4}>
           <Grid item xs={12} md={4} sx={{ textAlign: 'center' }}>
             <Avatar
-              src={profile.profile_picture}
+              src={profile.profile_picture_variants?.medium?.webp || profile.profile_picture}
               sx={{ width: 180, height: 180, mx: 'auto', mb: 2 }}
             />
             <Typography variant="h4" fontWeight={600}>